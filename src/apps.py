@@ -6,21 +6,178 @@
     modules.
 """
 
-import logging
-from logging.config import dictConfig
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from centopy import CONFIG_LOG
-from centopy import FilesManager
+# The API is only loaded when first used, so the CLI starts fast
+import centopy
 
-dictConfig(CONFIG_LOG)
+# Operations of a batch manifest, mapped to their required fields
+BATCH_OPERATIONS = {
+    'read': ('file',),
+    'write': ('file', 'contents'),
+    'append': ('file', 'contents'),
+    'delete': ('file',),
+    'archive': ('archive', 'files'),
+}
 
 
 class Files:
     def __init__(self, *args, **kwargs):
-        self.manager = FilesManager(*args, **kwargs)
+        self.manager = centopy.FilesManager(*args, **kwargs)
+        self._archives = {}
+        self._archives_lock = threading.Lock()
     def show(self,):
         print(self.manager)
     def run(self, command, *args, **kwargs):
         action = getattr(self.manager, command)
         result = action(*args, **kwargs)
         return result
+    def archive(self,
+                name: str,
+                create: bool = True) -> 'centopy.Compressor':
+        """
+        Get the archive of the managed folder with a given name, opening it
+        once for the whole session.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the archive does not exist and `create` is False.
+        """
+        with self._archives_lock:
+            archive = self._archives.get(name)
+            if archive is None:
+                path = self.manager.file_path(f'{name}.zip')
+                if not create and not centopy.Compressor.exists(path):
+                    raise FileNotFoundError(path)
+                archive = centopy.Compressor(
+                    name, wdir=self.manager.folder_path
+                )
+                self._archives[name] = archive
+            return archive
+    def execute(self, operation: dict):
+        """
+        Execute one operation of a batch manifest.
+
+        Parameters
+        ----------
+        operation : dict
+            The operation, as {'op': name, ...fields}. 'read', 'write',
+            'append' and 'delete' act on a 'file', writing 'contents' with
+            an optional 'encoding'. 'archive' stores 'files' in the
+            'archive' of the folder, replacing changed members, and deletes
+            them if 'delete_source' is true.
+
+        Returns
+        -------
+        str or list or None
+            The contents read, the names archived, or None.
+
+        Raises
+        ------
+        ValueError
+            If the operation is unknown or misses a field.
+        FileNotFoundError
+            If a file to read or archive does not exist.
+        """
+        name = operation.get('op')
+        if name not in BATCH_OPERATIONS:
+            raise ValueError(f"Unknown operation: {name!r}")
+        missing = [
+            field for field in BATCH_OPERATIONS[name]
+            if field not in operation
+        ]
+        if missing:
+            raise ValueError(
+                f"Operation {name!r} misses {', '.join(missing)}"
+            )
+        encoding = operation.get('encoding', 'utf-8')
+        if name == 'read':
+            contents = self.manager.read(operation['file'], encoding)
+            if contents is None:
+                raise FileNotFoundError(operation['file'])
+            return contents
+        if name == 'write':
+            return self.manager.write(
+                operation['file'], operation['contents'], encoding
+            )
+        if name == 'append':
+            return self.manager.append(
+                operation['file'], operation['contents'], encoding
+            )
+        if name == 'delete':
+            return self.manager.delete_file(operation['file'])
+        archive = self.archive(operation['archive'])
+        delete_source = operation.get('delete_source', False)
+        for file_name in operation['files']:
+            if not self.manager.file_path(file_name).is_file():
+                raise FileNotFoundError(file_name)
+            archive.update(file_name, delete_source=delete_source)
+        return list(operation['files'])
+    def batch(self, operations, jobs: int = 1):
+        """
+        Execute the operations of a batch manifest, yielding their results
+        in order as they come.
+
+        Operations are dicts or JSON lines. Blank lines are skipped, and
+        lines that are not valid JSON fail like invalid operations.
+
+        With several jobs, operations run concurrently on a thread pool, a
+        bounded number at a time, so manifests of any length are streamed.
+        Operations on the same file may then run in any order.
+
+        Parameters
+        ----------
+        operations : Iterable[dict or str]
+            The operations, as accepted by `execute`, or JSON lines
+            encoding them.
+        jobs : int, optional
+            Number of operations run at once, by default 1.
+
+        Yields
+        ------
+        dict
+            {'line': number, 'op': name, 'ok': True, 'result': result}
+            or, if the operation failed, {'line', 'op', 'ok': False,
+            'error': message}, `number` being the position of the
+            operation in the manifest, from 1. An 'id' field of the
+            operation is echoed.
+        """
+        def outcome(line, operation):
+            result = {'line': line, 'op': None}
+            try:
+                if isinstance(operation, str):
+                    operation = json.loads(operation)
+                if not isinstance(operation, dict):
+                    raise TypeError("Operations must be JSON objects")
+                result['op'] = operation.get('op')
+                if 'id' in operation:
+                    result['id'] = operation['id']
+                result['result'] = self.execute(operation)
+                result['ok'] = True
+            except (ValueError, TypeError, OSError) as err:
+                result.pop('result', None)
+                result['ok'] = False
+                result['error'] = f"{type(err).__name__}: {err}"
+            return result
+
+        numbered = (
+            (line, operation)
+            for line, operation in enumerate(operations, start=1)
+            if not isinstance(operation, str) or operation.strip()
+        )
+        if jobs <= 1:
+            for line, operation in numbered:
+                yield outcome(line, operation)
+            return
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for line, operation in numbered:
+                pending.append(executor.submit(outcome, line, operation))
+                if len(pending) >= jobs * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
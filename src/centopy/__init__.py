@@ -2,22 +2,72 @@
     Package centopy
 
     <Write the package's description here>
+
+    Importing the package is cheap and has no side effects: the API,
+    submodules and package metadata are loaded on first access, and
+    logging is only configured by `configure_logging()`.
 """
 
 import logging
 from logging import NullHandler
-from logging.config import dictConfig
-from importlib.metadata import version
-
-from .settings import CONFIG_LOG
 
-from .core import *  # The core module is the packages's API
-from . import base
-from . import utils
+# The core module is the package's API. Its names, and those of the
+# modules below, are imported from their module on first access.
+_LAZY_NAMES = {
+    'FilesManager': 'core',
+    'Compressor': 'core',
+    'ShardedCompressor': 'core',
+    'LazyArchive': 'core',
+    'Archives': 'core',
+    'sync': 'core',
+    'MEMBER_OVERHEAD': 'core',
+    'ZIPINFO_OVERHEAD': 'core',
+    'COPY_BUFFER_SIZE': 'core',
+    'COMPRESSION_METHODS': 'formats',
+    'FILE_COMPRESSIONS': 'formats',
+    'BaseFilesManager': 'base',
+    'file_crc32': 'utils',
+    'clean_names': 'utils',
+    'RWLock': 'locks',
+    'FileLock': 'locks',
+    'LockStats': 'locks',
+    'LockTimeout': 'locks',
+    'Metrics': 'metrics',
+    'PackStore': 'packs',
+    'Watcher': 'watch',
+    'WalkEntry': 'walker',
+    'Codec': 'serializers',
+    'register_codec': 'serializers',
+    'CONFIG_LOG': 'settings',
+    'configure_logging': 'settings',
+}
+_SUBMODULES = (
+    'base', 'bench', 'core', 'formats', 'locks', 'metrics', 'packs',
+    'serializers', 'server', 'settings', 'tracing', 'utils', 'walker',
+    'watch',
+)
 
-dictConfig(CONFIG_LOG)
+__all__ = [*_LAZY_NAMES, '__version__']
 
 # Set default logging handler to avoid \"No handler found\" warnings.
 logging.getLogger(__name__).addHandler(NullHandler())
 
-__version__ = version("centopy")
+
+def __getattr__(name: str):
+    if name in _LAZY_NAMES:
+        module = __getattr__(_LAZY_NAMES[name])
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        from importlib import import_module
+        value = import_module(f'.{name}', __name__)
+    elif name == '__version__':
+        from importlib.metadata import version
+        value = version("centopy")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__, *_SUBMODULES})
@@ -3,6 +3,8 @@
 
     This module provides package's base logic, factories and abstractions
 """
+import os
+import hashlib
 import logging
 from pathlib import Path
 
@@ -17,6 +19,16 @@ class BaseFilesManager:
     ----------
     folder_path : str
         The path of the directory where the files will be stored.
+    fanout : int, optional
+        Number of levels of hashed subdirectories the files are spread
+        into, by default 0 (files are stored in `folder_path` itself). With
+        `fanout=2`, a file is stored as `folder_path/ab/cd/file_name`,
+        `abcd` starting the hash of its name, so directories stay small
+        however many files are stored. A folder must always be opened with
+        the same layout.
+    fanout_width : int, optional
+        Number of hexadecimal digits naming the subdirectories of each
+        level, by default 2 (256 subdirectories per level).
 
     Attributes
     ----------
@@ -29,6 +41,8 @@ class BaseFilesManager:
     -------
     file_path(file_name: str) -> Path object:
         Returns the absolute path to the specified file.
+    iter_entries() -> Iterator[os.DirEntry]:
+        Yields the directory entries of all files in the directory.
     get_file_state(file_name: str) -> str:
         Returns the state of the specified file.
     list_files() -> List[str]:
@@ -36,8 +50,18 @@ class BaseFilesManager:
     delete_file(file_name: str) -> None:
         Deletes the specified file from the directory.
     """
-    def __init__(self, folder_path: str):
+    def __init__(self,
+                 folder_path: str,
+                 fanout: int = 0,
+                 fanout_width: int = 2):
+        if fanout < 0 or not 1 <= fanout_width or fanout * fanout_width > 32:
+            raise ValueError(
+                "fanout must be non-negative and fanout_width positive, "
+                "with at most 32 digits in all"
+            )
         self.folder_path = Path(folder_path)
+        self.fanout = fanout
+        self.fanout_width = fanout_width
         self.file_state = {}
         try:
             self.folder_path.mkdir(parents=True, exist_ok=True)
@@ -57,8 +81,28 @@ class BaseFilesManager:
         -------
         Path
             The absolute path to the specified file.
+
+        Raises
+        ------
+        ValueError
+            If the layout has a fanout and `file_name` holds a directory.
         """
-        return self.folder_path / file_name
+        if not self.fanout:
+            return self.folder_path / file_name
+        if os.sep in file_name or (os.altsep and os.altsep in file_name):
+            raise ValueError(
+                f"File names cannot hold directories with a fanout: "
+                f"{file_name}"
+            )
+        digest = hashlib.blake2b(
+            file_name.encode('utf-8'), digest_size=16
+        ).hexdigest()
+        width = self.fanout_width
+        return self.folder_path.joinpath(
+            *(digest[level * width:(level + 1) * width]
+              for level in range(self.fanout)),
+            file_name
+        )
 
     def get_file_state(self, file_name):
         """
@@ -85,7 +129,38 @@ class BaseFilesManager:
         List[str]
             A list of the names of all files in the directory.
         """
-        return [f.name for f in self.folder_path.glob("*") if f.is_file()]
+        return [entry.name for entry in self.iter_entries()]
+
+    def iter_entries(self):
+        """
+        Yields the directory entries of all files in the directory, in a
+        single scan of each of its (sub)directories.
+
+        Yields
+        ------
+        os.DirEntry
+            The entry of a file, whose `name` is the file name.
+        """
+        def scan(path, depth):
+            try:
+                entries = os.scandir(path)
+            except FileNotFoundError:
+                return
+            with entries:
+                for entry in entries:
+                    try:
+                        if depth:
+                            # Hidden folders, e.g. of packs, are not part
+                            # of the layout
+                            if entry.is_dir(follow_symlinks=False) \
+                                    and not entry.name.startswith('.'):
+                                yield from scan(entry.path, depth - 1)
+                        elif entry.is_file():
+                            yield entry
+                    except FileNotFoundError:
+                        continue  # Deleted while scanning
+
+        yield from scan(self.folder_path, self.fanout)
 
     def delete_file(self, file_name):
         """
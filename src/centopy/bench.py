@@ -0,0 +1,401 @@
+"""
+    Package "centopy"
+
+    This module provides the benchmark suite of the package's hot paths,
+    and of its import time.
+
+    Run it with `python -m centopy.bench`. Results are printed as JSON and
+    can be saved as a baseline, then compared against it on later runs:
+
+        python -m centopy.bench --output baseline.json
+        python -m centopy.bench --baseline baseline.json --tolerance 0.25
+"""
+import sys
+import json
+import subprocess
+import time
+import random
+import string
+import shutil
+import tempfile
+import argparse
+import platform
+import statistics
+
+from pathlib import Path
+
+from .core import FilesManager, Compressor, COMPRESSION_METHODS
+
+COMPRESSIONS = COMPRESSION_METHODS
+DEFAULT_MEMBERS = (10, 100)
+DEFAULT_SIZES = (1024, 64 * 1024)
+DEFAULT_COMPRESSIONS = ('stored', 'deflated')
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+# Statements timing `import centopy`, and the start of the command line
+# interface up to its help, in a fresh interpreter
+IMPORT_STATEMENT = (
+    "import time; start = time.perf_counter(); import centopy; "
+    "print(time.perf_counter() - start)"
+)
+CLI_IMPORT_STATEMENT = (
+    "import time; start = time.perf_counter(); import cli; "
+    "cli.cli(['--help'], standalone_mode=False); "
+    "print(time.perf_counter() - start)"
+)
+
+
+def payload(size: int, seed: int = 0) -> str:
+    """
+    Build a reproducible ASCII text of a given size, half random and half
+    repetitive, so it compresses like typical data.
+    """
+    rng = random.Random(seed)
+    noise = ''.join(rng.choices(string.ascii_letters, k=size // 2))
+    filler = 'centopy ' * ((size - len(noise)) // 8 + 1)
+    return noise + filler[:size - len(noise)]
+
+
+def _timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_import(repeat: int):
+    """
+    Time `import centopy`, and the command line interface showing its
+    help, in `repeat` fresh interpreters each.
+
+    Returns
+    -------
+    dict
+        Operation names mapped to (latencies, bytes per operation).
+    """
+    results = {}
+    for name, statement in (('import.centopy', IMPORT_STATEMENT),
+                            ('import.cli', CLI_IMPORT_STATEMENT)):
+        latencies = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', statement],
+                check=True,
+                capture_output=True,
+                text=True
+            ).stdout
+            latencies.append(float(output.splitlines()[-1]))
+        results[name] = (latencies, 0)
+    return results
+
+
+def bench_files_manager(wdir: Path, members: int, size: int, repeat: int):
+    """
+    Time FilesManager write, read, append and list_files on a folder of
+    `members` files of `size` bytes.
+
+    Returns
+    -------
+    dict
+        Operation names mapped to (latencies, bytes per operation).
+    """
+    manager = FilesManager(wdir)
+    content = payload(size)
+    chunk = payload(max(size // 16, 1), seed=1)
+    names = [f'file{index:06d}.txt' for index in range(members)]
+    return {
+        'files.write': (
+            [_timed(manager.write, name, content) for name in names], size
+        ),
+        'files.read': (
+            [_timed(manager.read, name) for name in names], size
+        ),
+        'files.append': (
+            [_timed(manager.append, name, chunk) for name in names],
+            len(chunk)
+        ),
+        'files.list_files': (
+            [_timed(manager.list_files) for _ in range(repeat)], 0
+        ),
+    }
+
+
+def bench_compressor(wdir: Path,
+                     members: int,
+                     size: int,
+                     repeat: int,
+                     compression: str):
+    """
+    Time Compressor add, read, append, remove and update on an archive of
+    `members` members of `size` bytes.
+
+    Returns
+    -------
+    dict
+        Operation names mapped to (latencies, bytes per operation).
+    """
+    archive = Compressor(
+        'bench', wdir=wdir, compression=COMPRESSIONS[compression]
+    )
+    manager = archive.manager
+    content = payload(size)
+    chunk = payload(max(size // 16, 1), seed=1)
+    names = [f'member{index:06d}.txt' for index in range(members)]
+    for name in names:
+        manager.write(name, content)
+    results = {
+        'archive.add': (
+            [_timed(archive.add, name, delete_source=True) for name in names],
+            size
+        ),
+        'archive.read': (
+            [_timed(archive.read, name) for name in names], size
+        ),
+    }
+    targets = names[:min(repeat, members)]
+    results['archive.append'] = (
+        [_timed(archive.append, name, chunk) for name in targets], len(chunk)
+    )
+    updated = payload(size, seed=2)
+    latencies = []
+    for name in targets:
+        manager.write(name, updated)
+        latencies.append(_timed(archive.update, name, delete_source=True))
+    results['archive.update'] = (latencies, size)
+    results['archive.remove'] = (
+        [_timed(archive.remove, name) for name in targets], 0
+    )
+    return results
+
+
+def summarize(name: str, latencies: list, nbytes: int, **params) -> dict:
+    """
+    Summarize the latencies of a benchmarked operation.
+    """
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    result = {'name': name}
+    result.update(params)
+    result.update({
+        'ops': len(latencies),
+        'ops_per_s': len(latencies) / total if total else None,
+        'bytes_per_s': nbytes * len(latencies) / total if total else None,
+        'latency': {
+            'mean': statistics.fmean(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max': ordered[-1],
+        },
+    })
+    return result
+
+
+def run(members=DEFAULT_MEMBERS,
+        sizes=DEFAULT_SIZES,
+        compressions=DEFAULT_COMPRESSIONS,
+        repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Run the benchmark sweep.
+
+    Parameters
+    ----------
+    members : Iterable[int], optional
+        Numbers of files or members to sweep.
+    sizes : Iterable[int], optional
+        File or member sizes, in bytes, to sweep.
+    compressions : Iterable[str], optional
+        Names of the archive compression methods to sweep, among
+        `COMPRESSIONS`.
+    repeat : int, optional
+        Number of repetitions of operations that are not run once per file
+        or member (the package and CLI imports, list_files and the
+        rewriting archive operations).
+
+    Returns
+    -------
+    dict
+        The run's 'environment' and its 'results', one per operation and
+        set of parameters.
+    """
+    results = [
+        summarize(name, latencies, nbytes,
+                  members=None, size=None, compression=None)
+        for name, (latencies, nbytes) in bench_import(repeat).items()
+    ]
+    for count in members:
+        for size in sizes:
+            wdir = Path(tempfile.mkdtemp(prefix='centopy-bench-'))
+            try:
+                timings = bench_files_manager(wdir, count, size, repeat)
+            finally:
+                shutil.rmtree(wdir, ignore_errors=True)
+            for name, (latencies, nbytes) in timings.items():
+                results.append(summarize(
+                    name, latencies, nbytes,
+                    members=count, size=size, compression=None
+                ))
+            for compression in compressions:
+                wdir = Path(tempfile.mkdtemp(prefix='centopy-bench-'))
+                try:
+                    timings = bench_compressor(
+                        wdir, count, size, repeat, compression
+                    )
+                finally:
+                    shutil.rmtree(wdir, ignore_errors=True)
+                for name, (latencies, nbytes) in timings.items():
+                    results.append(summarize(
+                        name, latencies, nbytes,
+                        members=count, size=size, compression=compression
+                    ))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def _key(result: dict) -> tuple:
+    return (
+        result['name'],
+        result['members'],
+        result['size'],
+        result['compression'],
+    )
+
+
+def compare(current: dict,
+            baseline: dict,
+            tolerance: float = DEFAULT_TOLERANCE,
+            tolerances: dict = None) -> list[dict]:
+    """
+    Compare a run against a baseline run.
+
+    An operation regresses when its median latency grew by more than its
+    tolerance, relative to the baseline.
+
+    Parameters
+    ----------
+    current : dict
+        The results of `run`.
+    baseline : dict
+        The results of a previous `run`.
+    tolerance : float, optional
+        Allowed relative slowdown, by default 0.2 (20%).
+    tolerances : dict, optional
+        Operation names mapped to their own allowed slowdown, overriding
+        `tolerance`.
+
+    Returns
+    -------
+    List[dict]
+        One entry per regression, with the operation's parameters, its
+        baseline and current median latencies and the relative slowdown.
+    """
+    tolerances = tolerances or {}
+    reference = {_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        previous = reference.get(_key(result))
+        if previous is None:
+            continue
+        before = previous['latency']['p50']
+        after = result['latency']['p50']
+        if not before:
+            continue
+        slowdown = after / before - 1
+        allowed = tolerances.get(result['name'], tolerance)
+        if slowdown > allowed:
+            regressions.append({
+                'name': result['name'],
+                'members': result['members'],
+                'size': result['size'],
+                'compression': result['compression'],
+                'baseline_p50': before,
+                'current_p50': after,
+                'slowdown': slowdown,
+                'tolerance': allowed,
+            })
+    return regressions
+
+
+def _tolerance_override(text: str) -> tuple[str, float]:
+    name, _, value = text.partition('=')
+    if not value:
+        raise argparse.ArgumentTypeError(
+            f"Expected NAME=TOLERANCE, got '{text}'"
+        )
+    return name, float(value)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m centopy.bench',
+        description="Benchmark centopy's FilesManager and Compressor.",
+    )
+    parser.add_argument(
+        '--members', type=int, nargs='+', default=DEFAULT_MEMBERS,
+        help='numbers of files or archive members to sweep'
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+        help='file or member sizes, in bytes, to sweep'
+    )
+    parser.add_argument(
+        '--compressions', nargs='+', default=DEFAULT_COMPRESSIONS,
+        choices=sorted(COMPRESSIONS),
+        help='archive compression methods to sweep'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=DEFAULT_REPEAT,
+        help=('repetitions of the package import, list_files and rewriting'
+              ' archive operations')
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help='file to save the results to, e.g. as a new baseline'
+    )
+    parser.add_argument(
+        '--baseline', type=Path,
+        help='results of a previous run to compare against'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='allowed relative slowdown of median latencies (default 0.2)'
+    )
+    parser.add_argument(
+        '--tolerance-for', type=_tolerance_override, action='append',
+        default=[], metavar='NAME=TOLERANCE',
+        help='allowed slowdown of a single operation, e.g. archive.remove=0.5'
+    )
+    args = parser.parse_args(argv)
+
+    results = run(
+        members=args.members,
+        sizes=args.sizes,
+        compressions=args.compressions,
+        repeat=args.repeat,
+    )
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if args.baseline is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    regressions = compare(
+        results,
+        baseline,
+        tolerance=args.tolerance,
+        tolerances=dict(args.tolerance_for),
+    )
+    results['regressions'] = regressions
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
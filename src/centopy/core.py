@@ -4,27 +4,163 @@
     This module provides package's api
 """
 import os
+import re
+import io
+import copy
+import time
+import errno
+import zlib
+import bisect
+import fnmatch
 import logging
+import itertools
 import zipfile
 import tempfile
 import shutil
+import threading
+import functools
 
 from pathlib import Path
 from typing import Type
+from importlib import import_module
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext, ExitStack
+from concurrent.futures import ThreadPoolExecutor
 
 from .base import BaseFilesManager
+from .formats import COMPRESSION_METHODS, FILE_COMPRESSIONS
+from .utils import (
+    file_crc32, copy_stream, copy_fd, write_buffers, clean_string, clean_names
+)
+from .serializers import Codec, BuffersReader, get_codec
+from .packs import PackStore, PACKS_FOLDER
+from .walker import walk
+from .locks import RWLock, FileLock, LockStats, require_locking
+from .metrics import Metrics, measured
+from .tracing import span
 
 logger = logging.getLogger('standard')
 debugger = logging.getLogger('debug')
 
-class FilesManager(BaseFilesManager):
+# Rough per-entry cost, in bytes, of the member index and of the ZipInfo
+# objects held by an open archive. Used to estimate archive memory usage.
+MEMBER_OVERHEAD = 120
+ZIPINFO_OVERHEAD = 400
+# Buffer size used when streaming data between files and archives
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _reading(method):
+    """
+    Run an archive method holding the archive's lock for reading, and
+    measure it in the archive's metrics.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read_lock(), self._archive_lock(shared=True), \
+                self._using_reader():
+            return method(self, *args, **kwargs)
+    return measured(wrapper)
+
+
+def _writing(method):
+    """
+    Run an archive method holding the archive's lock for writing, and
+    notify the archive's observers once the outermost write is done. The
+    method is measured in the archive's metrics, lock waits included.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write_lock(), self._archive_lock(shared=False), \
+                self._using_reader():
+            self._write_depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    for observer in self._observers:
+                        observer(self)
+    return measured(wrapper)
+
+
+def _as_buffers(contents) -> list[memoryview]:
+    """
+    Get flat byte views of a buffer, or of each buffer of an iterable.
+    """
+    try:
+        view = memoryview(contents)
+    except TypeError:
+        return [memoryview(buffer).cast('B') for buffer in contents]
+    return [view.cast('B')]
+
+
+class FilesManager(BaseFilesManager, MutableMapping):
     """
     A class for managing files in a specified folder.
 
+    The manager is also a mutable mapping of file names to their binary
+    contents: `manager[name]` reads a file, `manager[name] = data` writes
+    it (str as UTF-8 text), `del manager[name]` deletes it, and `in`
+    checks the file exists. `len` and iteration use an index of the file
+    names, built by a single scan of the folder on first use and kept up
+    to date by the manager's own writes and deletions. Call `reindex` to
+    pick up changes made by others. Combined with a `fanout` layout, this
+    makes the manager an on-disk key-value store for millions of files.
+
+    The mapping methods inherited from `MutableMapping` act on the files
+    too: `pop` and `popitem` read and delete a file, `update` writes
+    many, and `clear` deletes every file of the folder.
+
     Parameters
     ----------
     folder_path : str
         The path to the folder to manage.
+    fanout, fanout_width : int, optional
+        The hashed subdirectory layout of the files, by default 0 and 2
+        (files are stored flat). See `BaseFilesManager`.
+    locking : bool, optional
+        If True, take advisory `fcntl` locks around reads (shared) and writes
+        (exclusive), so several processes can safely share the folder, by
+        default False. Raises `RuntimeError` on platforms without `fcntl`.
+    lock_timeout : float, optional
+        Seconds to wait for a lock before raising `LockTimeout`, by default
+        None (wait forever).
+    metrics : bool or Metrics, optional
+        Whether to collect operation metrics, or the `Metrics` to collect
+        them in, by default True.
+    hooks : list, optional
+        Tracing hooks called with the events of this manager only, by
+        default None. See `centopy.tracing`.
+    compression : str, optional
+        Compress files transparently: 'auto' picks the compression from
+        the file extension ('.gz', '.bz2', '.xz' or '.lzma'), a name of
+        `FILE_COMPRESSIONS` ('gzip', 'bz2' or 'lzma') applies it to every
+        file, by default None (files are read and written as is).
+    compresslevel : int, optional
+        The level of compressed writes, by default None (the default of
+        the compression).
+    pack_threshold : int, optional
+        Size in bytes up to which files are stored in pack files instead of
+        files of their own, by default None (files are never packed). See
+        `centopy.packs.PackStore`: packed files are written with one
+        append and read with one `pread`, sparing an inode, a disk block
+        and an `open` each. Appended files stay packed while they fit,
+        but every append rewrites the whole file in the packs, leaving
+        the previous copy as garbage: appending n times costs O(n²) bytes
+        written.
+        Only plain (not compressed) files named without a directory are
+        packed. Only one manager at a time may pack the files of a folder:
+        another one raises `RuntimeError` until `packs.close()` is called.
+    sanitize : bool or str, optional
+        Clean up the names of the files written with `clean_name`, so
+        untrusted names cannot escape the folder or hold odd characters:
+        True uses the default pattern of `centopy.utils.clean_string`, a
+        string is the pattern to use, by default False (names are used as
+        given). Mapping keys are cleaned up too, so `manager[name]` finds
+        the file `manager[name] = data` wrote. Other reads use names as
+        given, e.g. as returned by `clean_name`.
 
     Attributes
     ----------
@@ -33,10 +169,157 @@ class FilesManager(BaseFilesManager):
         loaded.
         A `loaded' state simply means that the contents of the file were saved
         in a variable
+    lock_stats : LockStats
+        Counters of lock acquisitions and of the time spent waiting for
+        them.
+    metrics : Metrics
+        Counts and latencies of the operations, and the number of bytes
+        read and written.
+    packs : PackStore or None
+        The pack files of small files, if `pack_threshold` is set.
 
     """
-    def __init__(self, folder_path: str, *args, **kwargs):
+    def __init__(self,
+                 folder_path: str,
+                 *args,
+                 locking: bool = False,
+                 lock_timeout: float = None,
+                 metrics: bool | Metrics = True,
+                 hooks: list = None,
+                 compression: str = None,
+                 compresslevel: int = None,
+                 pack_threshold: int = None,
+                 sanitize: bool | str = False,
+                 **kwargs):
         super().__init__(folder_path, *args, **kwargs)
+        if locking:
+            require_locking()
+        self.sanitize = sanitize
+        if compression not in (None, 'auto', *FILE_COMPRESSIONS):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self._index = None
+        self.pack_threshold = pack_threshold
+        self.packs = None
+        if pack_threshold is not None:
+            self.packs = PackStore(self.folder_path / PACKS_FOLDER)
+        self.locking = locking
+        self.lock_timeout = lock_timeout
+        self.lock_stats = LockStats()
+        if not isinstance(metrics, Metrics):
+            metrics = Metrics(enabled=metrics)
+        self.metrics = metrics
+        self.hooks = hooks if hooks is not None else []
+
+    def _file_lock(self, file_name: str, shared: bool = False):
+        """
+        Get a context manager locking a file across processes, or doing
+        nothing if locking is disabled.
+        """
+        if not self.locking:
+            return nullcontext()
+        path = self.file_path(file_name)
+        if self.fanout and not shared:
+            # Exclusive locks create the file, so its hashed subdirectory
+            # must exist first
+            path.parent.mkdir(parents=True, exist_ok=True)
+        return FileLock(
+            path,
+            shared=shared,
+            timeout=self.lock_timeout,
+            stats=self.lock_stats
+        )
+
+    def file_compression(self, file_name: str) -> str | None:
+        """
+        Get the compression applied to a file.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file.
+
+        Returns
+        -------
+        str or None
+            The name of the compression in `FILE_COMPRESSIONS`, or None if
+            the file is read and written as is.
+        """
+        if self.compression != 'auto':
+            return self.compression
+        suffix = Path(file_name).suffix.lower()
+        for name, (suffixes, _) in FILE_COMPRESSIONS.items():
+            if suffix in suffixes:
+                return name
+        return None
+
+    def clean_name(self, file_name: str) -> str:
+        """
+        Clean up a file name with `centopy.utils.clean_string`, with the
+        pattern of `sanitize` if it is one.
+        """
+        pattern = self.sanitize if isinstance(self.sanitize, str) else None
+        return clean_string(file_name, pattern)
+
+    def clean_names(self, names):
+        """
+        Clean up file names lazily, renaming those colliding with the
+        files of the folder or with each other, as by
+        `centopy.utils.clean_names`.
+
+        The files of the folder are those of the name index, built by a
+        single scan on first use. Names are not reserved: write the files
+        before cleaning another batch against the folder.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names to clean up, consumed one at a time.
+
+        Yields
+        ------
+        tuple
+            Each name, and its cleaned up name, free in the folder.
+        """
+        pattern = self.sanitize if isinstance(self.sanitize, str) else None
+        return clean_names(names, taken=self._names(), pattern=pattern)
+
+    def _open(self,
+              file_name: str,
+              mode: str,
+              encoding=None,
+              raw: bool = False,
+              **kwargs):
+        """
+        Open a file, through its compression if any, streaming the data
+        through the compressor in both directions. With `raw`, the file is
+        opened as stored, compressed or not.
+        """
+        path = self.file_path(file_name)
+        writing = 'r' not in mode or '+' in mode
+        compression = None if raw else self.file_compression(file_name)
+        if compression is None:
+            opener = open
+        else:
+            if 'b' not in mode:
+                mode += 't'
+            if self.compresslevel is not None and 'r' not in mode:
+                key = 'preset' if compression == 'lzma' else 'compresslevel'
+                kwargs[key] = self.compresslevel
+            opener = import_module(FILE_COMPRESSIONS[compression][1]).open
+        try:
+            file_ = opener(path, mode, encoding=encoding, **kwargs)
+        except FileNotFoundError:
+            if not (writing and self.fanout):
+                raise
+            # First file of its subdirectory
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file_ = opener(path, mode, encoding=encoding, **kwargs)
+        if writing and self._index is not None \
+                and Path(file_name).name == file_name:
+            self._index.add(file_name)
+        return file_
 
     def _open_write(
             self,
@@ -52,8 +335,10 @@ class FilesManager(BaseFilesManager):
         ----------
         file_name : str
             The name of the file to save.
-        file_contents : str
-            The contents to save to the file.
+        file_contents : str or bytes-like or Iterable[bytes-like]
+            The contents to save to the file. In binary modes, any object
+            supporting the buffer protocol, or an iterable of them, written
+            in order with vectored I/O.
         mode: str, optional
             Specifies the mode in which the file is opened, by default 'w'.
         encoding : str, optional
@@ -62,10 +347,31 @@ class FilesManager(BaseFilesManager):
             Additional keyword arguments to pass to the open() function.
 
         """
-        with open(
-            self.file_path(file_name), mode, encoding=encoding, **kwargs
-        ) as file_:
-            file_.write(file_contents)
+        if self.sanitize:
+            file_name = self.clean_name(file_name)
+        operation = 'append' if 'a' in mode else 'write'
+        binary = 'b' in mode
+        if binary:
+            file_contents = _as_buffers(file_contents)
+            size = sum(view.nbytes for view in file_contents)
+        else:
+            size = len(file_contents)
+        with span(self, operation, file_name, size), \
+                self._file_lock(file_name):
+            if not self._write_packed(
+                    file_name, file_contents, mode, encoding):
+                with self._open(
+                        file_name, mode, encoding=encoding, **kwargs
+                ) as file_:
+                    if binary and self.file_compression(file_name) is None:
+                        # Written straight to the descriptor, unjoined
+                        write_buffers(file_.fileno(), file_contents)
+                    elif binary:
+                        for view in file_contents:
+                            file_.write(view)
+                    else:
+                        file_.write(file_contents)
+        self.metrics.add('bytes_written', size)
         state = self.file_state.setdefault(file_name, [])
         state.append("saved")
         self.file_state[file_name] = state
@@ -89,21 +395,279 @@ class FilesManager(BaseFilesManager):
             The contents of the file, or None if the file was not found.
 
         """
-        file_contents = None
+        try:
+            return self._read(file_name, mode, encoding, **kwargs)
+        except FileNotFoundError:
+            logger.error("File not found: %s. Returning None", file_name)
+            return None
+
+    def _read(self, file_name, mode='r', encoding="utf-8", **kwargs):
+        """
+        Load the contents of a file, as `_open_read`, but raising
+        FileNotFoundError if the file does not exist.
+        """
         state = self.file_state.setdefault(file_name, [])
         try:
-            with open(
-                self.file_path(file_name), mode, encoding=encoding, **kwargs
-            ) as file_:
-                file_contents = file_.read()
-            state.append("loaded")
+            with span(self, 'read', file_name) as read, \
+                    self._file_lock(file_name, shared=True):
+                file_contents = self._read_packed(file_name, mode, encoding)
+                if file_contents is None:
+                    with self._open(
+                            file_name, mode, encoding=encoding, **kwargs
+                    ) as file_:
+                        file_contents = file_.read()
+                read.nbytes = len(file_contents)
         except FileNotFoundError:
             state.append("failed")
-            logger.error("File not found: %s. Returning None", file_name)
-        self.file_state[file_name] = state
+            raise
+        self.metrics.add('bytes_read', len(file_contents))
+        state.append("loaded")
         return file_contents
-        
 
+    def _packable(self, file_name: str) -> bool:
+        return (
+            self.packs is not None
+            and Path(file_name).name == file_name
+            and self.file_compression(file_name) is None
+        )
+
+    def _write_packed(self, file_name, file_contents, mode, encoding):
+        """
+        Write a file to the packs if it is small enough, moving it out of
+        them if it grew too large.
+
+        Returns
+        -------
+        bool
+            Whether the file was written, or False if it is to be written
+            as a file of its own.
+        """
+        if not self._packable(file_name):
+            return False
+        packs = self.packs
+        if 'b' in mode:
+            buffers = list(file_contents)
+        else:
+            buffers = [file_contents.encode(encoding)]
+        path = self.file_path(file_name)
+        if 'a' in mode:
+            def move_out(contents):
+                with self._open(file_name, 'wb') as file_:
+                    write_buffers(file_.fileno(), contents)
+
+            try:
+                packs.append(
+                    file_name, buffers, self.pack_threshold, move_out
+                )
+                return True
+            except KeyError:
+                if path.exists():
+                    return False  # Appended to its own file
+        size = sum(memoryview(buffer).nbytes for buffer in buffers)
+        if size > self.pack_threshold:
+            if file_name in packs:
+                packs.delete(file_name)
+            return False
+        packs.put(file_name, buffers)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        if self._index is not None:
+            self._index.add(file_name)
+        return True
+
+    def _read_packed(self, file_name, mode='rb', encoding=None):
+        """
+        Read a file from the packs.
+
+        Returns
+        -------
+        bytes or str or None
+            The contents of the file, or None if it is not packed.
+        """
+        if self.packs is None or file_name not in self.packs:
+            return None
+        try:
+            data = self.packs.get(file_name)
+        except KeyError:
+            return None  # Deleted meanwhile
+        return data if 'b' in mode else data.decode(encoding)
+
+    def compact(self,) -> dict:
+        """
+        Compact the pack files, reclaiming the space of the files deleted
+        or overwritten since. Compaction also runs in the background once
+        garbage makes up half of the packs.
+
+        Returns
+        -------
+        dict
+            The report of `PackStore.compact`, empty if files are not
+            packed.
+        """
+        if self.packs is None:
+            return {}
+        return self.packs.compact()
+
+    def stats(self,) -> dict:
+        """
+        Get the metrics of the manager.
+
+        Returns
+        -------
+        dict
+            The 'operations' and 'counters' of `Metrics.stats`, the
+            'locks' statistics and, if files are packed, the 'packs'
+            statistics of `PackStore.stats`.
+        """
+        stats = self.metrics.stats()
+        stats['locks'] = self.lock_stats.as_dict()
+        if self.packs is not None:
+            stats['packs'] = self.packs.stats()
+        return stats
+
+    @measured
+    def list_files(self):
+        with span(self, 'list_files'):
+            files = super().list_files()
+            if self.packs is not None:
+                loose = set(files)
+                files += [name for name in self.packs if name not in loose]
+            return files
+
+    def walk(self,
+             include=None,
+             exclude=None,
+             max_depth: int = None,
+             workers: int = None,
+             directories: bool = False,
+             stat: bool = False,
+             follow_symlinks: bool = False):
+        """
+        Walk the whole tree of the folder, yielding its files, as
+        `centopy.walker.walk`.
+
+        Unlike `list_files`, the walk goes down every subdirectory, up to
+        `max_depth`, and can scan them with `workers` threads at once. The
+        pack files are left out, and so are the files they hold.
+
+        Parameters
+        ----------
+        include, exclude : str or Iterable[str], optional
+            Globs of the files to yield, and of the files and directories
+            to leave out, matched against names and paths relative to the
+            folder, by default None.
+        max_depth : int, optional
+            Number of levels of subdirectories to walk, by default None
+            (no limit).
+        workers : int, optional
+            Number of threads scanning directories at once, by default
+            None (walked in the calling thread).
+        directories : bool, optional
+            If True, also yield directories, by default False.
+        stat : bool, optional
+            If True, stat the files while scanning, by default False.
+        follow_symlinks : bool, optional
+            If True, walk symlinks to directories, by default False.
+
+        Yields
+        ------
+        centopy.walker.WalkEntry
+            The entry of each file, with its cached stat.
+        """
+        exclude = [PACKS_FOLDER, *(
+            (exclude,) if isinstance(exclude, str) else exclude or ()
+        )]
+        return walk(
+            self.folder_path, include=include, exclude=exclude,
+            max_depth=max_depth, workers=workers, directories=directories,
+            stat=stat, follow_symlinks=follow_symlinks
+        )
+
+    @measured
+    def delete_file(self, file_name):
+        with span(self, 'delete_file', file_name):
+            if self.packs is not None and self.packs.delete(file_name):
+                self.file_state.setdefault(file_name, []).append("deleted")
+            else:
+                super().delete_file(file_name)
+        if self._index is not None:
+            self._index.discard(file_name)
+
+    def _names(self,) -> set:
+        """
+        Get the index of the file names, scanning the folder if it is not
+        built yet.
+        """
+        index = self._index
+        if index is None:
+            index = {entry.name for entry in self.iter_entries()}
+            if self.packs is not None:
+                index.update(self.packs)
+            self._index = index
+        return index
+
+    def reindex(self,) -> int:
+        """
+        Rebuild the index of the file names with a scan of the folder, to
+        pick up files created or deleted by others.
+
+        Returns
+        -------
+        int
+            The number of files.
+        """
+        self._index = None
+        return len(self._names())
+
+    def __getitem__(self, file_name: str) -> bytes:
+        if self.sanitize:
+            file_name = self.clean_name(file_name)
+        try:
+            return self._read(file_name, mode='rb', encoding=None)
+        except (FileNotFoundError, IsADirectoryError, ValueError):
+            raise KeyError(file_name) from None
+
+    def __setitem__(self, file_name: str, contents) -> None:
+        if isinstance(contents, str):
+            self.write(file_name, contents)
+        else:
+            self.writeb(file_name, contents)
+
+    def __delitem__(self, file_name: str) -> None:
+        if self.sanitize:
+            file_name = self.clean_name(file_name)
+        if file_name not in self:
+            raise KeyError(file_name)
+        self.delete_file(file_name)
+
+    def __contains__(self, file_name) -> bool:
+        if not isinstance(file_name, str):
+            return False
+        if self.sanitize:
+            file_name = self.clean_name(file_name)
+        if self.packs is not None and file_name in self.packs:
+            return True
+        try:
+            return self.file_path(file_name).is_file()
+        except ValueError:
+            return False
+
+    def __iter__(self,):
+        return iter(list(self._names()))
+
+    def __len__(self,) -> int:
+        return len(self._names())
+
+    # A manager is one of a kind, and true even without any file
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __bool__(self,) -> bool:
+        return True
+
+    @measured
     def write(
             self,
             file_name: str,
@@ -127,6 +691,7 @@ class FilesManager(BaseFilesManager):
         """
         self._open_write(file_name, file_contents, 'w', encoding, **kwargs)
 
+    @measured
     def writeb(
             self,
             file_name: str,
@@ -136,14 +701,17 @@ class FilesManager(BaseFilesManager):
         """
         Save the binary contents to a file.
 
+        The contents may be any object supporting the buffer protocol, such
+        as bytes, bytearray, memoryview or array.array, or an iterable of
+        them. Fragments are written with `os.writev`, without being joined
+        first.
+
         Parameters
         ----------
         file_name : str
             The name of the file to save.
-        file_contents : bytes
+        file_contents : bytes-like or Iterable[bytes-like]
             The contents to save to the file.
-        encoding : str, optional
-            The encoding of the file, by default "utf-8".
         **kwargs
             Additional keyword arguments to pass to the open() function.
 
@@ -152,6 +720,7 @@ class FilesManager(BaseFilesManager):
             file_name, file_contents, 'wb', encoding=None, **kwargs
         )
 
+    @measured
     def append(
             self,
             file_name: str,
@@ -176,6 +745,7 @@ class FilesManager(BaseFilesManager):
         """
         self._open_write(file_name, file_contents, 'a', encoding, **kwargs)
 
+    @measured
     def appendb(
             self,
             file_name: str,
@@ -183,22 +753,26 @@ class FilesManager(BaseFilesManager):
             **kwargs
     ):
         """
-        Save the contents to a file.
+        Append binary contents to a file.
+
+        The contents may be any object supporting the buffer protocol, or
+        an iterable of them, written with `os.writev` as in `writeb`.
 
         Parameters
         ----------
         file_name : str
-            The name of the file to save.
-        file_contents : str
-            The contents to save to the file.
-        encoding : str, optional
-            The encoding of the file, by default "utf-8".
+            The name of the file to append to.
+        file_contents : bytes-like or Iterable[bytes-like]
+            The contents to append to the file.
         **kwargs
             Additional keyword arguments to pass to the open() function.
 
         """
-        self._open_write(file_name, file_contents, 'ab', encoding=None, **kwargs)
+        self._open_write(
+            file_name, file_contents, 'ab', encoding=None, **kwargs
+        )
 
+    @measured
     def read(self, file_name, encoding="utf-8", **kwargs):
         """
         Load the contents of a file.
@@ -220,6 +794,7 @@ class FilesManager(BaseFilesManager):
         """
         return self._open_read(file_name, encoding=encoding, **kwargs)
 
+    @measured
     def readb(self, file_name: str, **kwargs):
         """
         Load the contents of a file.
@@ -241,151 +816,939 @@ class FilesManager(BaseFilesManager):
         """
         return self._open_read(file_name, mode='rb', encoding=None, **kwargs)
 
-
-class Compressor:
-    def __init__(self,
-                 filename: str,
-                 wdir: str = '',
-                 extension: str = 'zip') -> None:
+    @measured
+    def read_into(self,
+                  file_name: str,
+                  stream,
+                  chunk_size: int = COPY_BUFFER_SIZE) -> int | None:
         """
-        Initialize the Compressor object.
+        Copy the contents of a file to a binary stream, in chunks, so files
+        of any size are copied in constant memory.
 
         Parameters
         ----------
-        filename : str
-            The base filename for the compressed archive.
-        wdir : str, optional
-            The working directory path where the archive will be managed, by default ''.
-        extension : str, optional
-            The extension for the compressed archive, by default 'zip'.
+        file_name : str
+            The name of the file to read.
+        stream : file-like
+            The binary stream to write to.
+        chunk_size : int, optional
+            The number of bytes copied at once, by default 1 MiB.
+
+        Returns
+        -------
+        int or None
+            The number of bytes copied, or None if the file was not found.
+
         """
-        self.extension = extension
-        self.filename = f"{filename}.{self.extension}"
-        self.manager = FilesManager(wdir)
-        self.file_path = self.manager.folder_path / self.filename
-        self.members = {}
-        if self.file_path.name not in self.manager.list_files():
-            self.clean()
-        else:
-            with zipfile.ZipFile(self.file_path, mode='r') as archive:
-                for name in archive.namelist():
-                    self.members[Path(name).name] = name
+        state = self.file_state.setdefault(file_name, [])
+        try:
+            with span(self, 'read', file_name) as read, \
+                    self._file_lock(file_name, shared=True):
+                data = self._read_packed(file_name)
+                if data is not None:
+                    copied = len(data)
+                    stream.write(data)
+                else:
+                    with self._open(file_name, 'rb') as file_:
+                        copied = copy_stream(file_, stream, chunk_size)
+                read.nbytes = copied
+        except FileNotFoundError:
+            state.append("failed")
+            logger.error("File not found: %s. Returning None", file_name)
+            return None
+        self.metrics.add('bytes_read', copied)
+        state.append("loaded")
+        return copied
+
+    @measured
+    def write_from(self,
+                   file_name: str,
+                   stream,
+                   chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        """
+        Save the contents of a binary stream to a file, in chunks, so
+        streams of any size are saved in constant memory.
 
-    def clean(self,):
-        with zipfile.ZipFile(self.file_path, mode="w") as _:
-            pass
+        Parameters
+        ----------
+        file_name : str
+            The name of the file to save.
+        stream : file-like
+            The binary stream to read from, until its end.
+        chunk_size : int, optional
+            The number of bytes copied at once, by default 1 MiB.
+
+        Returns
+        -------
+        int
+            The number of bytes saved.
 
-    def path(self,):
         """
-        Get the full path to the compressed archive file.
+        if self.sanitize:
+            file_name = self.clean_name(file_name)
+        with span(self, 'write', file_name) as write, \
+                self._file_lock(file_name), self._open(
+                    file_name, 'wb'
+                ) as file_:
+            copied = copy_stream(stream, file_, chunk_size)
+            write.nbytes = copied
+            if self.packs is not None:
+                # Streams are saved to files of their own
+                self.packs.delete(file_name)
+        self.metrics.add('bytes_written', copied)
+        self.file_state.setdefault(file_name, []).append("saved")
+        return copied
+
+    @measured
+    def save_obj(self,
+                 file_name: str,
+                 obj,
+                 codec: str | Codec = 'pickle') -> int:
+        """
+        Serialize an object to a file.
+
+        The buffers of the codec are written with vectored I/O, or
+        streamed through the compression of compressed files, so they are
+        never joined in memory. With the 'pickle' codec, the buffers of
+        objects such as bytearrays or NumPy arrays are written out of band,
+        without being copied into the pickle.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file to save.
+        obj : object
+            The object to serialize.
+        codec : str or Codec, optional
+            The name of a registered codec ('pickle', 'json', 'marshal'),
+            or a codec, by default 'pickle'. See
+            `centopy.serializers.register_codec`.
 
         Returns
         -------
-        Path
-            The full path to the compressed archive file.
+        int
+            The number of bytes saved.
+
         """
-        return self.manager.folder_path / self.file_path
+        buffers = _as_buffers(get_codec(codec).encode(obj))
+        self._open_write(file_name, buffers, 'wb', encoding=None)
+        return sum(view.nbytes for view in buffers)
 
-    def namelist(self,):
+    def _decode_file(self, file_name: str, codec: Codec) -> tuple:
         """
-        Get a list of filenames present in the compressed archive.
+        Decode a file of its own, memory-mapped unless it is compressed.
 
         Returns
         -------
-        List[str]
-            A list of filenames present in the compressed archive.
+        tuple
+            The object, and the size of the data it was decoded from.
         """
-        if self.file_path.name in self.manager.list_files():
-            with zipfile.ZipFile(self.file_path, mode="r") as archive:
-                return [Path(name).name for name in archive.namelist()]
-        return []
+        with self._open(file_name, 'rb') as file_:
+            if self.file_compression(file_name) is not None:
+                # Decompressed data cannot be mapped
+                data = file_.read()
+                return codec.decode(memoryview(data)), len(data)
+            size = os.fstat(file_.fileno()).st_size
+            if not size:
+                return codec.decode(memoryview(b'')), 0
+            import mmap  # Only needed by mapped reads
+            mapping = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_COPY)
+        with memoryview(mapping) as data:
+            obj = codec.decode(data)
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # Still used by the object, closed with it
+        return obj, size
 
-    def add(self, filename: str, delete_source=False, mode='a') -> None:
+    @measured
+    def load_obj(self, file_name: str, codec: str | Codec = 'pickle'):
         """
-        Add a file to the compressed archive.
+        Deserialize an object from a file.
+
+        The file is memory-mapped, copy-on-write, and decoded in place:
+        with the 'pickle' codec, out-of-band buffers are handed to the
+        objects as views of the mapping, which stays open as long as they
+        live. Compressed files are decompressed in memory first, and
+        packed files decoded from their single read.
 
         Parameters
         ----------
-        filename : str
-            The name of the file to be added.
-        delete_source : bool, optional
-            If True, delete the source file after adding, by default True.
-        mode : str, optional
-            The mode to open the compressed archive, by default 'a'.
+        file_name : str
+            The name of the file to load.
+        codec : str or Codec, optional
+            The codec the object was saved with, by default 'pickle'.
+
+        Returns
+        -------
+        object or None
+            The object, or None if the file was not found.
+
         """
-        if filename in self.manager.list_files():
-            with zipfile.ZipFile(self.file_path, mode=mode) as archive:
-                archive.write(self.manager.file_path(filename), filename)
-                if delete_source:
-                    self.manager.delete_file(filename)
-                self.members[filename] = archive.namelist()[-1]
-        else:
-            logger.warning(
-                'File %s not found in working directory %s',
-                filename,
-                self.manager.folder_path
-            )
+        codec = get_codec(codec)
+        state = self.file_state.setdefault(file_name, [])
+        try:
+            with span(self, 'read', file_name) as read, \
+                    self._file_lock(file_name, shared=True):
+                data = self._read_packed(file_name)
+                if data is not None:
+                    size = len(data)
+                    obj = codec.decode(memoryview(data))
+                else:
+                    obj, size = self._decode_file(file_name, codec)
+                read.nbytes = size
+        except FileNotFoundError:
+            state.append("failed")
+            logger.error("File not found: %s. Returning None", file_name)
+            return None
+        self.metrics.add('bytes_read', size)
+        state.append("loaded")
+        return obj
 
-    def add_from(self, filename: str, delete_source=False, mode='a') -> None:
+    def _transfer_locks(self, file_name, target, target_name, move):
         """
-        Add a file to the compressed archive.
+        Lock a file to copy or move and its target, always in the same
+        order, so transfers running the other way cannot deadlock.
+        """
+        locks = sorted(
+            [
+                (str(self.file_path(file_name)),
+                 self._file_lock(file_name, shared=not move)),
+                (str(target.file_path(target_name)),
+                 target._file_lock(target_name)),
+            ],
+            key=lambda item: item[0]
+        )
+        stack = ExitStack()
+        with stack:
+            for _, lock in locks:
+                stack.enter_context(lock)
+            return stack.pop_all()
+
+    def _transfer(self, file_name, target, target_name, move) -> tuple:
+        """
+        Copy or move a file to a manager, the fastest way the layouts of
+        both allow.
+
+        Returns
+        -------
+        tuple
+            The number of bytes copied, or moved, and the method used:
+            'rename', one of `copy_fd`, 'stream' or 'write'.
+        """
+        data = self._read_packed(file_name)
+        compression = self.file_compression(file_name)
+        if data is None:
+            path = self.file_path(file_name)
+            size = path.stat().st_size
+            if target._packable(target_name) and compression is None \
+                    and size <= target.pack_threshold:
+                with self._file_lock(file_name, shared=True), \
+                        self._open(file_name, 'rb') as source:
+                    data = source.read()
+            elif compression == target.file_compression(target_name):
+                with self._transfer_locks(
+                        file_name, target, target_name, move):
+                    if move:
+                        target_path = target.file_path(target_name)
+                        try:
+                            try:
+                                os.replace(path, target_path)
+                            except FileNotFoundError:
+                                if not target.fanout or not path.exists():
+                                    raise
+                                # First file of its subdirectory
+                                target_path.parent.mkdir(
+                                    parents=True, exist_ok=True
+                                )
+                                os.replace(path, target_path)
+                            result = size, 'rename'
+                        except OSError as err:
+                            if err.errno != errno.EXDEV:
+                                raise
+                            move = False  # Across file systems
+                    if not move:
+                        with self._open(file_name, 'rb', raw=True) as source, \
+                                target._open(
+                                    target_name, 'wb', raw=True
+                                ) as file_:
+                            result = copy_fd(source.fileno(), file_.fileno())
+                if target.packs is not None:
+                    # Stored as a file of its own from now on
+                    target.packs.delete(target_name)
+                if target._index is not None \
+                        and Path(target_name).name == target_name:
+                    target._index.add(target_name)
+                target.file_state.setdefault(target_name, []).append("saved")
+                return result
+            else:
+                with self._file_lock(file_name, shared=True), \
+                        self._open(file_name, 'rb') as source:
+                    target.write_from(target_name, source)
+                return size, 'stream'
+        target.writeb(target_name, data)
+        return len(data), 'write'
+
+    @measured
+    def copy(self,
+             file_name: str,
+             target_name: str = None,
+             target: 'FilesManager' = None) -> int:
+        """
+        Copy a file, within the folder or to the folder of another manager.
+
+        Files of their own are copied by the kernel with
+        `centopy.utils.copy_fd`: as a reflink where the file system
+        supports it, else with `os.copy_file_range` or `os.sendfile`, so
+        the data never goes through Python. Compressed files are copied as
+        stored when both names have the same compression. Otherwise files
+        are streamed through the decompression and compression of each
+        side, and small files the target packs are read and packed.
 
         Parameters
         ----------
-        filename : str
-            The name of the file to be added.
-        delete_source : bool, optional
-            If True, delete the source file after adding, by default True.
-        mode : str, optional
-            The mode to open the compressed archive, by default 'a'.
+        file_name : str
+            The name of the file to copy.
+        target_name : str, optional
+            The name of the copy, by default `file_name`.
+        target : FilesManager, optional
+            The manager of the folder to copy to, by default this one.
+
+        Returns
+        -------
+        int
+            The number of bytes copied, as stored in this folder.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist.
+        ValueError
+            If the copy would overwrite the file itself.
         """
-        file_path = Path(filename)
-        if file_path.exists():
-            with zipfile.ZipFile(self.file_path, mode=mode) as archive:
-                archive.write(file_path, file_path.name)
-                if delete_source:
-                    if file_path.exists():
-                        os.remove(file_path)
-                self.members[file_path.name] = archive.namelist()[-1]
-        else:
-            logger.warning(
-                'File %s not found.',
-                file_path
-            )
+        return self._copy_or_move(file_name, target_name, target, False)
 
-    def write(self,
-              filename: str,
-              content: str,
-              delete_source=False,
-              mode='a') -> None:
+    @measured
+    def move(self,
+             file_name: str,
+             target_name: str = None,
+             target: 'FilesManager' = None) -> int:
         """
-        Write content to a new file and add it to the compressed archive,
-        or overwrite if it's already a member of archive.
+        Move a file, within the folder or to the folder of another manager.
+
+        Files of their own are renamed when both names have the same
+        compression, and the target does not pack the file, so nothing is
+        copied. Across file systems, and in the other cases, the file is
+        copied as by `copy` and then deleted.
 
         Parameters
         ----------
-        filename : str
-            The name of the file to be written and added.
-        content : str
-            The content to be written to the new file.
-        delete_source : bool, optional
+        file_name : str
+            The name of the file to move.
+        target_name : str, optional
+            The new name of the file, by default `file_name`.
+        target : FilesManager, optional
+            The manager of the folder to move to, by default this one.
+
+        Returns
+        -------
+        int
+            The number of bytes moved, as stored in this folder.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file does not exist.
+        ValueError
+            If the file would be moved onto itself.
+        """
+        return self._copy_or_move(file_name, target_name, target, True)
+
+    def _copy_or_move(self, file_name, target_name, target, move) -> int:
+        target = self if target is None else target
+        target_name = file_name if target_name is None else target_name
+        if target.sanitize:
+            target_name = target.clean_name(target_name)
+        if target.file_path(target_name) == self.file_path(file_name):
+            raise ValueError(f"Cannot copy a file onto itself: {file_name}")
+        operation = 'move' if move else 'copy'
+        with span(self, operation, file_name) as transfer:
+            copied, method = self._transfer(
+                file_name, target, target_name, move
+            )
+            if method == 'rename':
+                if self._index is not None:
+                    self._index.discard(file_name)
+                self.file_state.setdefault(file_name, []).append("deleted")
+            elif move:
+                self.delete_file(file_name)
+            transfer.nbytes = copied
+        debugger.debug(
+            "%s %s to %s: %d bytes by %s",
+            operation, file_name, target_name, copied, method
+        )
+        self.metrics.add('bytes_moved' if move else 'bytes_copied', copied)
+        return copied
+
+
+class Compressor:
+    def __init__(self,
+                 filename: str,
+                 wdir: str = '',
+                 extension: str = 'zip',
+                 locking: bool = False,
+                 lock_timeout: float = None,
+                 compression: int = zipfile.ZIP_STORED,
+                 compresslevel: int = None,
+                 metrics: bool | Metrics = True,
+                 hooks: list = None) -> None:
+        """
+        Initialize the Compressor object.
+
+        Parameters
+        ----------
+        filename : str
+            The base filename for the compressed archive.
+        wdir : str, optional
+            The working directory path where the archive will be managed, by default ''.
+        extension : str, optional
+            The extension for the compressed archive, by default 'zip'.
+        locking : bool, optional
+            If True, hold an advisory `fcntl` lock on the archive file while
+            reading (shared) or mutating it (exclusive), so several
+            processes can safely share the archive, by default False.
+        lock_timeout : float, optional
+            Seconds to wait for a lock before raising `LockTimeout`, by
+            default None (wait forever).
+        compression : int, optional
+            The zipfile compression method of new members, by default
+            zipfile.ZIP_STORED.
+        compresslevel : int, optional
+            The compression level of new members, by default None (the
+            method's default).
+        metrics : bool or Metrics, optional
+            Whether to collect operation metrics, or the `Metrics` to
+            collect them in, by default True. Rewrites of the archive are
+            counted in the 'rewrites' and 'rewrite_bytes' counters.
+        hooks : list, optional
+            Tracing hooks called with the events of this archive only, by
+            default None. See `centopy.tracing`.
+        """
+        self._setup(
+            filename, wdir, extension, locking, lock_timeout, compression,
+            compresslevel, metrics, hooks
+        )
+        self.skipped_writes = 0
+        self.file_path = self.manager.folder_path / self.filename
+        if not self.file_path.is_file():
+            self._create()
+
+    def _setup(self,
+               filename: str,
+               wdir: str,
+               extension: str,
+               locking: bool,
+               lock_timeout: float,
+               compression: int,
+               compresslevel: int,
+               metrics: bool | Metrics,
+               hooks: list) -> None:
+        """
+        Set the state shared by all archives, before any file is opened.
+        """
+        self.extension = extension
+        self.filename = f"{filename}.{self.extension}"
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.locking = locking
+        self.lock_timeout = lock_timeout
+        self.lock_stats = LockStats()
+        if not isinstance(metrics, Metrics):
+            metrics = Metrics(enabled=metrics)
+        self.metrics = metrics
+        self.hooks = hooks if hooks is not None else []
+        self.manager = FilesManager(
+            wdir,
+            locking=locking,
+            lock_timeout=lock_timeout,
+            metrics=metrics.enabled,
+            hooks=self.hooks
+        )
+        self._members = None
+        self._reader = None
+        self._reader_signature = None
+        self._readers = 0
+        self._pooled = False
+        self._usage = (None, 0)
+        self._handle_lock = threading.Lock()
+        self._lock = RWLock()
+        self._lock_owner = None
+        self._write_depth = 0
+        self._observers = []
+
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        """
+        Tell whether an archive exists on disk.
+
+        Parameters
+        ----------
+        path : Path
+            The path of the archive, as `wdir/filename.extension`.
+
+        Returns
+        -------
+        bool
+            True if the archive exists.
+        """
+        return path.exists()
+
+    @property
+    def members(self,):
+        """
+        Mapping of member names to their paths inside the archive.
+
+        The archive is only opened and indexed on first access.
+
+        Returns
+        -------
+        dict
+            Member names mapped to their names in the archive.
+        """
+        if self._members is None:
+            members = {}
+            if self.file_path.is_file():
+                with self._using_reader():
+                    for name in self._handle().namelist():
+                        members[Path(name).name] = name
+            self._members = members
+        return self._members
+
+    @members.setter
+    def members(self, members: dict):
+        self._members = members
+
+    @_writing
+    def _create(self,):
+        """
+        Create the archive empty, unless another process did it first.
+        """
+        if not self.file_path.is_file() or self.file_path.stat().st_size == 0:
+            self.clean()
+
+    @_writing
+    def clean(self,):
+        with span(self, 'clean'), self._zipfile(mode="w") as _:
+            pass
+        self._members = {}
+
+    @contextmanager
+    def _archive_lock(self, shared: bool):
+        """
+        Lock the archive file across processes while the block runs.
+
+        Nested acquisitions by the thread holding the exclusive lock are
+        no-ops: `flock` locks are per file description, so locking again
+        through a new descriptor would deadlock with ourselves.
+        """
+        me = threading.get_ident()
+        if not self.locking or self._lock_owner == me:
+            yield
+            return
+        with FileLock(
+            self.file_path,
+            shared=shared,
+            timeout=self.lock_timeout,
+            stats=self.lock_stats
+        ):
+            if shared:
+                yield
+                return
+            self._lock_owner = me
+            try:
+                yield
+            finally:
+                self._lock_owner = None
+
+    def _zipfile(self, mode: str = 'a') -> zipfile.ZipFile:
+        """
+        Open the archive for writing, releasing the cached read handle
+        first so it never sees a half-written file.
+        """
+        self._release()
+        return zipfile.ZipFile(
+            self.file_path,
+            mode=mode,
+            compression=self.compression,
+            compresslevel=self.compresslevel
+        )
+
+    def _signature(self,) -> tuple | None:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        # ctime also catches same-size rewrites within mtime granularity
+        return (
+            stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
+        )
+
+    def _handle(self,) -> zipfile.ZipFile:
+        """
+        Get a read handle to the archive.
+
+        While the archive is pooled by `Archives`, the handle is kept open
+        between calls, so the central directory is parsed once instead of
+        on every read. It is reopened, and the member index rebuilt, if the
+        archive file changed behind our back. Otherwise it is closed once
+        the operation using it is done, see `_using_reader`.
+
+        Returns
+        -------
+        zipfile.ZipFile
+            An archive opened in read mode.
+        """
+        with self._handle_lock:
+            signature = self._signature()
+            if self._reader is not None:
+                if self._reader_signature == signature:
+                    return self._reader
+                self._release()
+                self._members = None
+            elif self._reader_signature not in (None, signature):
+                # Changed since our last operation
+                self._members = None
+            self._reader = zipfile.ZipFile(self.file_path, mode='r')
+            self._reader_signature = signature
+            return self._reader
+
+    @contextmanager
+    def _using_reader(self,):
+        """
+        Share the read handle between the calls nested in one operation.
+
+        Unless the archive is pooled, the handle is closed once the last
+        operation using it is done, so standalone archives hold no open
+        file between calls. The signature of the archive is then kept
+        instead, to tell on next use whether it changed in between.
+        """
+        with self._handle_lock:
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._handle_lock:
+                self._readers -= 1
+                if not self._readers:
+                    if not self._pooled:
+                        self._release()
+                    if self._reader is None:
+                        self._reader_signature = self._signature()
+
+    def _release(self,) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self._reader_signature = None
+
+    @_writing
+    def close(self,) -> None:
+        """
+        Release the open read handle and the member index of the archive.
+
+        Both are restored transparently on next use.
+        """
+        self._release()
+        self._members = None
+
+    def memory_usage(self,) -> int:
+        """
+        Estimate the memory held by the member index and the open handle.
+
+        The estimate is cached until the index or the handle change.
+
+        Returns
+        -------
+        int
+            Approximate number of bytes.
+        """
+        members = self._members
+        reader = self._reader
+        key = (
+            id(members), len(members) if members is not None else 0,
+            id(reader)
+        )
+        if self._usage[0] == key:
+            return self._usage[1]
+        usage = 0
+        if members is not None:
+            usage += sum(
+                len(name) + len(member) + MEMBER_OVERHEAD
+                for name, member in list(members.items())
+            )
+        if reader is not None:
+            usage += sum(
+                len(info.filename) + ZIPINFO_OVERHEAD
+                for info in list(reader.filelist)
+            )
+        self._usage = (key, usage)
+        return usage
+
+    def stats(self,) -> dict:
+        """
+        Get the metrics of the archive.
+
+        Returns
+        -------
+        dict
+            The 'operations' and 'counters' of `Metrics.stats`, and the
+            'locks' statistics and number of 'skipped_writes'.
+        """
+        stats = self.metrics.stats()
+        stats['locks'] = self.lock_stats.as_dict()
+        stats['skipped_writes'] = self.skipped_writes
+        return stats
+
+    def path(self,):
+        """
+        Get the full path to the compressed archive file.
+
+        Returns
+        -------
+        Path
+            The full path to the compressed archive file.
+        """
+        return self.manager.folder_path / self.file_path
+
+    @_reading
+    def namelist(self,):
+        """
+        Get a list of filenames present in the compressed archive.
+
+        Returns
+        -------
+        List[str]
+            A list of filenames present in the compressed archive.
+        """
+        if self.file_path.is_file():
+            return [Path(name).name for name in self._handle().namelist()]
+        return []
+
+    @_writing
+    def add(self, filename: str, delete_source=False, mode='a') -> None:
+        """
+        Add a file to the compressed archive.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be added.
+        delete_source : bool, optional
+            If True, delete the source file after adding, by default True.
+        mode : str, optional
+            The mode to open the compressed archive, by default 'a'.
+        """
+        file_path = self.manager.file_path(filename)
+        if file_path.is_file():
+            with span(self, 'add', filename) as add, \
+                    self._zipfile(mode=mode) as archive:
+                archive.write(file_path, filename)
+                add.nbytes = archive.filelist[-1].file_size
+                self.metrics.add(
+                    'bytes_written', archive.filelist[-1].file_size
+                )
+                if delete_source:
+                    self.manager.delete_file(filename)
+                self.members[filename] = archive.namelist()[-1]
+        else:
+            logger.warning(
+                'File %s not found in working directory %s',
+                filename,
+                self.manager.folder_path
+            )
+
+    @_writing
+    def add_from(self, filename: str, delete_source=False, mode='a') -> None:
+        """
+        Add a file to the compressed archive.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be added.
+        delete_source : bool, optional
+            If True, delete the source file after adding, by default True.
+        mode : str, optional
+            The mode to open the compressed archive, by default 'a'.
+        """
+        file_path = Path(filename)
+        if file_path.is_file():
+            with span(self, 'add', file_path.name) as add, \
+                    self._zipfile(mode=mode) as archive:
+                archive.write(file_path, file_path.name)
+                add.nbytes = archive.filelist[-1].file_size
+                self.metrics.add(
+                    'bytes_written', archive.filelist[-1].file_size
+                )
+                if delete_source:
+                    if file_path.exists():
+                        os.remove(file_path)
+                self.members[file_path.name] = archive.namelist()[-1]
+        else:
+            logger.warning(
+                'File %s not found.',
+                file_path
+            )
+
+    @_writing
+    def add_fd(self,
+               filename: str,
+               source,
+               chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        """
+        Add the contents of a file descriptor to the compressed archive.
+
+        The descriptor is read from its current offset to its end, so
+        pipes, sockets and files outside the working directory are
+        archived without being staged in the working directory. It is
+        first copied next to the archive by the kernel, with
+        `centopy.utils.copy_fd`, then stored as with `write_from`: a
+        failed read leaves the archive unchanged, and an existing member
+        is only replaced if its content differs.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the member.
+        source : int or file-like
+            The file descriptor, or a binary file object with a `fileno`,
+            read from its position. The object is to be closed after.
+        chunk_size : int, optional
+            The number of bytes read at once, by default 1 MiB.
+
+        Returns
+        -------
+        int
+            The number of bytes read from `source`.
+        """
+        if isinstance(source, int):
+            fd = source
+        else:
+            fd = source.fileno()
+            if source.seekable():
+                # Buffered files read ahead of their position
+                os.lseek(fd, source.tell(), os.SEEK_SET)
+        temp_fd, temp_path = tempfile.mkstemp(
+            dir=self.file_path.parent, prefix=f'.{self.filename}.'
+        )
+        try:
+            with os.fdopen(temp_fd, 'wb') as spool:
+                copied, _ = copy_fd(fd, spool.fileno(), chunk_size=chunk_size)
+            self._store_file(filename, Path(temp_path))
+        finally:
+            os.remove(temp_path)
+        return copied
+
+    @_writing
+    def add_many(self,
+                 paths,
+                 delete_source: bool = False) -> list[str]:
+        """
+        Add files to the compressed archive in a single opening of it.
+
+        New files are appended in order, each compressed while it is
+        written with `zipfile.ZipFile.write`. Files replacing existing
+        members are stored in a single rewrite instead.
+
+        Parameters
+        ----------
+        paths : Iterable[str or Path]
+            The paths of the files. Members are named after the files.
+        delete_source : bool, optional
+            If True, delete the files once archived, by default False.
+
+        Returns
+        -------
+        List[str]
+            The names of the members added or replaced.
+
+        Raises
+        ------
+        FileNotFoundError
+            If a path is not a file. Nothing is archived then.
+        """
+        paths = [Path(path) for path in paths]
+        for path in paths:
+            if not path.is_file():
+                raise FileNotFoundError(path)
+        members = self.members
+        # The last file of a given name wins, as with successive adds
+        sources = {path.name: path for path in paths}
+        new = [(name, path) for name, path in sources.items()
+               if name not in members]
+        replaced = {name: path for name, path in sources.items()
+                    if name in members}
+        if new:
+            with self._zipfile(mode='a') as archive:
+                for name, path in new:
+                    with span(self, 'compress', name) as compress:
+                        archive.write(path, name)
+                        compress.nbytes = archive.getinfo(name).file_size
+                    members[name] = name
+        if replaced:
+            self._rewrite(add=replaced)
+        self.metrics.add(
+            'bytes_written', sum(path.stat().st_size for path in paths)
+        )
+        if delete_source:
+            for path in sources.values():
+                path.unlink(missing_ok=True)
+        return list(sources)
+
+    @_writing
+    def write(self,
+              filename: str,
+              content: str,
+              delete_source=False,
+              mode='a') -> None:
+        """
+        Write content to a new file and add it to the compressed archive,
+        or overwrite if it's already a member of archive.
+
+        Overwriting is skipped if the member already holds `content` (same
+        size and CRC-32). Skips are counted in `skipped_writes`.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be written and added.
+        content : str
+            The content to be written to the new file.
+        delete_source : bool, optional
             If True, delete the source file after adding, by default True.
         mode : str, optional
             The mode to open the compressed archive, by default 'a'.
         """
         self.manager.write(filename, content)
-        if filename in self.namelist():
-            self.append(filename, content='')
-            return
-        self.add(filename, delete_source=delete_source, mode=mode)
+        self._store(
+            filename,
+            content.encode('utf-8'),
+            delete_source=delete_source,
+            mode=mode
+        )
 
+    @_writing
     def writeb(self,
                filename: str,
                content: bytes,
                delete_source=False,
                mode='a') -> None:
         """
-        Write bytes content to a new file and add it to the compressed archive.
+        Write bytes content to a new file and add it to the compressed archive,
+        or overwrite if it's already a member of archive.
+
+        Overwriting is skipped if the member already holds `content` (same
+        size and CRC-32). Skips are counted in `skipped_writes`.
 
         Parameters
         ----------
@@ -399,11 +1762,83 @@ class Compressor:
             The mode to open the compressed archive, by default 'a'.
         """
         self.manager.writeb(filename, content)
-        if filename in self.namelist():
-            self.appendb(filename, content=b'')
-            return
-        self.add(filename, delete_source=delete_source, mode=mode)
+        self._store(filename, content, delete_source=delete_source, mode=mode)
+
+    def _info(self, filename: str) -> zipfile.ZipInfo | None:
+        """
+        Get the metadata of a member, or None if it is not in the archive.
+        """
+        member = self.members.get(filename)
+        if member is None:
+            return None
+        return self._handle().getinfo(member)
+
+    def _member_unchanged(self,
+                          info: zipfile.ZipInfo,
+                          size: int,
+                          crc) -> bool:
+        """
+        Tell whether a member already holds some content, given the
+        content's size and a callable computing its CRC-32. The CRC is
+        only computed if the sizes match. Matches are counted in
+        `skipped_writes`.
+        """
+        if info.file_size != size or info.CRC != crc():
+            return False
+        self.skipped_writes += 1
+        logger.debug(
+            "Member %s of %s unchanged, skipping rewrite",
+            info.filename,
+            self.filename
+        )
+        return True
+
+    def _store(self,
+               filename: str,
+               content: bytes,
+               delete_source=False,
+               mode='a') -> None:
+        """
+        Add in-memory content to the archive, replacing the member of the
+        same name unless it already holds that exact content.
 
+        The member is built from `content` instead of the copy staged in the
+        working directory, which archives sharing that directory may
+        overwrite concurrently.
+        """
+        info = self._info(filename)
+        if info is None:
+            with span(self, 'store', filename, len(content)), \
+                    self._zipfile(mode=mode) as archive:
+                archive.writestr(filename, content)
+            self.members[filename] = filename
+            self.metrics.add('bytes_written', len(content))
+        elif not self._member_unchanged(
+                info, len(content), lambda: zlib.crc32(content)):
+            self._rewrite(add={filename: content})
+            self.metrics.add('bytes_written', len(content))
+        if delete_source:
+            self.manager.delete_file(filename)
+
+    def _store_file(self, filename: str, source: Path) -> None:
+        """
+        Add a file to the archive, replacing the member of the same name
+        unless it already holds the file's exact content.
+        """
+        info = self._info(filename)
+        size = source.stat().st_size
+        if info is None:
+            with span(self, 'store', filename, size), \
+                    self._zipfile(mode='a') as archive:
+                archive.write(source, filename)
+            self.members[filename] = filename
+            self.metrics.add('bytes_written', size)
+        elif not self._member_unchanged(
+                info, size, lambda: file_crc32(source)):
+            self._rewrite(add={filename: source})
+            self.metrics.add('bytes_written', size)
+
+    @_writing
     def append(self, filename: str, content: str) -> None:
         """
         Append content to an existing text file within the compressed archive.
@@ -415,27 +1850,9 @@ class Compressor:
         content : str
             The content to be appended to the existing text file.
         """
-        temp_dir = Path(tempfile.mkdtemp())
-        data = self.read(filename)
-        for member in self.namelist():
-            if member != filename:
-                self.extract(member, path=temp_dir)
-        if filename in self.namelist():
-            with zipfile.ZipFile(self.file_path, mode="w") as archive:
-                with archive.open(self.members[filename], mode='w') as member:
-                    data += content
-                    member.write(data.encode('utf-8'))
-            for member in temp_dir.glob('**/*'):
-                self.add_from(member, delete_source=True)
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
-        else:
-            logger.warning(
-                'File %s not found in working directory %s',
-                filename,
-                self.manager.folder_path
-            )
+        self.appendb(filename, content.encode('utf-8'))
 
+    @_writing
     def appendb(self, filename: str, content: bytes) -> None:
         """
         Append content to an existing binary file within the compressed
@@ -444,138 +1861,1123 @@ class Compressor:
         Parameters
         ----------
         filename : str
-            The name of the file to which content will be appended.
-        content : bytes
-            The bytes content to be appended to the existing binary file.
+            The name of the file to which content will be appended.
+        content : bytes
+            The bytes content to be appended to the existing binary file.
+        """
+        if filename not in self.members:
+            logger.warning(
+                'File %s not found in archive %s', filename, self.filename
+            )
+            return
+        data = self._handle().read(self.members[filename]) + content
+        self._rewrite(add={filename: data})
+        self.metrics.add('bytes_written', len(content))
+
+    @_reading
+    def read(self, filename: str, as_text=True) -> str | bytes:
+        """
+        Read the content of a file within the compressed archive.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be read.
+        as_text : bool, optional
+            If True, return content as text, otherwise as bytes, by default True.
+
+        Returns
+        -------
+        str or bytes
+            The content of the specified file.
+        """
+        archive = self._handle()
+        with span(self, 'read', filename) as read, \
+                archive.open(self.members[filename], mode='r') as member:
+            data = member.read()
+            read.nbytes = len(data)
+        self.metrics.add('bytes_read', len(data))
+        if as_text:
+            return data.decode('utf-8')
+        return data
+
+    @_reading
+    def readb(self, filename: str) -> str | bytes:
+        """
+        Read the content of a file within the compressed archive.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be read.
+        as_text : bool, optional
+            If True, return content as text, otherwise as bytes, by default True.
+
+        Returns
+        -------
+        str or bytes
+            The content of the specified file.
+        """
+        archive = self._handle()
+        with span(self, 'read', filename) as read, \
+                archive.open(self.members[filename], mode='r') as member:
+            data = member.read()
+            read.nbytes = len(data)
+        self.metrics.add('bytes_read', len(data))
+        return data
+
+    @_reading
+    def read_into(self,
+                  filename: str,
+                  stream,
+                  chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        """
+        Copy the content of a file within the compressed archive to a
+        binary stream, in chunks, so members of any size are copied in
+        constant memory.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be read.
+        stream : file-like
+            The binary stream to write to.
+        chunk_size : int, optional
+            The number of bytes copied at once, by default 1 MiB.
+
+        Returns
+        -------
+        int
+            The number of bytes copied.
+        """
+        archive = self._handle()
+        with span(self, 'read', filename) as read, \
+                archive.open(self.members[filename], mode='r') as member:
+            copied = copy_stream(member, stream, chunk_size)
+            read.nbytes = copied
+        self.metrics.add('bytes_read', copied)
+        return copied
+
+    @_writing
+    def write_from(self,
+                   filename: str,
+                   stream,
+                   chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        """
+        Write the content of a binary stream to a file within the
+        compressed archive, in chunks, so streams of any size are archived
+        in constant memory.
+
+        The stream is first spooled to a temporary file next to the
+        archive, so a stream failing midway leaves the archive unchanged.
+        An existing member is only replaced if its content differs.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be written.
+        stream : file-like
+            The binary stream to read from, until its end.
+        chunk_size : int, optional
+            The number of bytes copied at once, by default 1 MiB.
+
+        Returns
+        -------
+        int
+            The number of bytes read from `stream`.
+        """
+        temp_fd, temp_path = tempfile.mkstemp(
+            dir=self.file_path.parent, prefix=f'.{self.filename}.'
+        )
+        try:
+            with os.fdopen(temp_fd, 'wb') as spool:
+                copied = copy_stream(stream, spool, chunk_size)
+            self._store_file(filename, Path(temp_path))
+        finally:
+            os.remove(temp_path)
+        return copied
+
+    @_writing
+    def save_obj(self,
+                 filename: str,
+                 obj,
+                 codec: str | Codec = 'pickle') -> int:
+        """
+        Serialize an object to a file within the compressed archive.
+
+        The buffers of the codec are streamed into the member, as with
+        `write_from`, without being joined in memory or staged in the
+        working directory.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be written.
+        obj : object
+            The object to serialize.
+        codec : str or Codec, optional
+            The name of a registered codec ('pickle', 'json', 'marshal'),
+            or a codec, by default 'pickle'.
+
+        Returns
+        -------
+        int
+            The number of bytes serialized.
+        """
+        buffers = get_codec(codec).encode(obj)
+        return self.write_from(filename, BuffersReader(buffers))
+
+    @_reading
+    def load_obj(self, filename: str, codec: str | Codec = 'pickle'):
+        """
+        Deserialize an object from a file within the compressed archive.
+
+        The member is read once into a writable buffer the object is
+        decoded from in place, so out-of-band pickle buffers are not
+        copied again.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be read.
+        codec : str or Codec, optional
+            The codec the object was saved with, by default 'pickle'.
+
+        Returns
+        -------
+        object
+            The deserialized object.
+        """
+        codec = get_codec(codec)
+        stream = io.BytesIO()
+        self.read_into(filename, stream)
+        return codec.decode(stream.getbuffer())
+
+    @_reading
+    def extract(self, filename: str, path: str = None) -> str:
+        """
+        Extract a file from the compressed archive to the working directory.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be extracted.
+        path : str
+            Path to extract 'filename' to, by default self.manager.folder_path
+        Returns
+        -------
+        str
+            The path to the extracted file in the working directory.
+        """
+        if path is None:
+            path = self.manager.folder_path
+        archive = self._handle()
+        member = self.members[filename]
+        size = archive.getinfo(member).file_size
+        with span(self, 'extract', filename, size):
+            extracted = archive.extract(member, path=path)
+        self.metrics.add('bytes_read', size)
+        return extracted
+
+    def extract_many(self,
+                     filenames=None,
+                     path: str = None,
+                     workers: int = None) -> list[str]:
+        """
+        Extract files from the compressed archive in parallel.
+
+        Parameters
+        ----------
+        filenames : Iterable[str], optional
+            The names of the files to extract, by default every member.
+        path : str, optional
+            Path to extract the files to, by default
+            self.manager.folder_path.
+        workers : int, optional
+            Maximum number of files extracted at once, by default the
+            ThreadPoolExecutor default.
+
+        Returns
+        -------
+        List[str]
+            The paths of the extracted files, in the order of `filenames`.
+        """
+        if filenames is None:
+            filenames = self.namelist()
+        if path is None:
+            path = self.manager.folder_path
+        # Create the folders up front, workers creating them concurrently
+        # would race each other.
+        members = self.members
+        for filename in filenames:
+            folder = Path(path, members[filename]).parent
+            folder.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda filename: self.extract(filename, path=path),
+                filenames
+            ))
+
+    @_writing
+    def remove(self, filename: str):
+        """
+        Remove a file from the compressed archive.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file to be removed.
+        """
+        if filename not in self.members:
+            logger.warning(
+                'File %s not found in archive %s', filename, self.filename
+            )
+            return
+        self._rewrite(remove=[filename])
+
+    @_writing
+    def remove_many(self, filenames) -> list[str]:
+        """
+        Remove files from the compressed archive, in a single rewrite.
+
+        Parameters
+        ----------
+        filenames : Iterable[str]
+            The names of the files to be removed.
+
+        Returns
+        -------
+        List[str]
+            The names of the files removed. Names that are not members are
+            skipped with a warning.
+        """
+        removed = []
+        for filename in filenames:
+            if filename in self.members:
+                removed.append(filename)
+            else:
+                logger.warning(
+                    'File %s not found in archive %s', filename, self.filename
+                )
+        if removed:
+            self._rewrite(remove=removed)
+        return removed
+
+    @_writing
+    def update(self, filename: str, delete_source=False):
+        """
+        Replace a member with the file of the same name in the working
+        directory, or add it if it is not a member yet.
+
+        The archive is left untouched if the member already holds the
+        file's exact content (same size and CRC-32).
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file in the working directory.
+        delete_source : bool, optional
+            If True, delete the source file after updating, by default
+            False.
         """
-        temp_dir = Path(tempfile.mkdtemp())
-        data = self.read(filename, as_text=False)
-        for member in self.namelist():
-            if member != filename:
-                self.extract(member, path=temp_dir)
-        if filename in self.namelist():
-            with zipfile.ZipFile(self.file_path, mode="w") as archive:
-                with archive.open(self.members[filename], mode='w') as member:
-                    data += content
-                    member.write(data)
-            for member in temp_dir.glob('**/*'):
-                self.add_from(member, delete_source=True)
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
-        else:
+        source = self.manager.file_path(filename)
+        if not source.is_file():
             logger.warning(
                 'File %s not found in working directory %s',
                 filename,
                 self.manager.folder_path
             )
+            return
+        self._store_file(filename, source)
+        if delete_source:
+            self.manager.delete_file(filename)
 
-    def read(self, filename: str, as_text=True) -> str | bytes:
+    @_writing
+    def update_from(self, filename: str, delete_source=False):
         """
-        Read the content of a file within the compressed archive.
+        Replace a member with a file from anywhere, or add it if it is not
+        a member yet.
+
+        The archive is left untouched if the member already holds the
+        file's exact content (same size and CRC-32).
 
         Parameters
         ----------
         filename : str
-            The name of the file to be read.
-        as_text : bool, optional
-            If True, return content as text, otherwise as bytes, by default True.
+            The path of the file.
+        delete_source : bool, optional
+            If True, delete the source file after updating, by default
+            False.
+        """
+        source = Path(filename)
+        if not source.is_file():
+            logger.warning('File %s not found.', source)
+            return
+        self._store_file(source.name, source)
+        if delete_source:
+            os.remove(source)
+
+    @_reading
+    def infolist(self,) -> list[zipfile.ZipInfo]:
+        """
+        Get the metadata of the members of the compressed archive.
 
         Returns
         -------
-        str or bytes
-            The content of the specified file.
+        List[zipfile.ZipInfo]
+            The ZipInfo of each member, holding its size, date and CRC.
         """
-        with zipfile.ZipFile(self.file_path, mode="r") as archive:
-            with archive.open(self.members[filename], mode='r') as member:
-                data = member.read()
-                if as_text:
-                    return data.decode('utf-8')
-                return data
+        if not self.file_path.is_file():
+            return []
+        return self._handle().infolist()
 
-    def readb(self, filename: str) -> str | bytes:
+    def archive_paths(self,) -> list[Path]:
         """
-        Read the content of a file within the compressed archive.
-
-        Parameters
-        ----------
-        filename : str
-            The name of the file to be read.
-        as_text : bool, optional
-            If True, return content as text, otherwise as bytes, by default True.
+        Get the paths of the files backing the compressed archive.
 
         Returns
         -------
-        str or bytes
-            The content of the specified file.
+        List[Path]
+            The path of the archive file.
         """
-        with zipfile.ZipFile(self.file_path, mode="r") as archive:
-            with archive.open(self.members[filename], mode='r') as member:
-                data = member.read()
-                return data
+        return [self.file_path]
 
-    def extract(self, filename: str, path: str = None) -> str:
+    @_writing
+    def _rewrite(self, add: dict = None, remove=()) -> None:
         """
-        Extract a file from the compressed archive to the working directory.
+        Rewrite the archive in a single pass.
+
+        Kept members are streamed, with their metadata, into a new archive
+        built next to the current one, which then replaces it.
 
         Parameters
         ----------
-        filename : str
-            The name of the file to be extracted.
-        path : str
-            Path to extract 'filename' to, by default self.manager.folder_path
+        add : dict, optional
+            Member names mapped to the paths of the files, or to the bytes,
+            to store under them, replacing any existing member of the same
+            name.
+        remove : Iterable[str], optional
+            Names of the members to drop.
+        """
+        add = add or {}
+        dropped = set(remove) | set(add)
+        with span(self, 'rewrite') as rewrite:
+            temp_fd, temp_path = tempfile.mkstemp(
+                dir=self.file_path.parent, prefix=f'.{self.filename}.'
+            )
+            os.close(temp_fd)
+            try:
+                with zipfile.ZipFile(
+                    temp_path,
+                    mode='w',
+                    compression=self.compression,
+                    compresslevel=self.compresslevel
+                ) as archive:
+                    for info in self.infolist():
+                        if Path(info.filename).name in dropped:
+                            continue
+                        info = copy.copy(info)
+                        zip64 = info.file_size > zipfile.ZIP64_LIMIT
+                        with span(
+                            self, 'rewrite.copy', info.filename,
+                            info.file_size
+                        ), self._handle().open(info) as source, archive.open(
+                            info, mode='w', force_zip64=zip64
+                        ) as target:
+                            shutil.copyfileobj(
+                                source, target, COPY_BUFFER_SIZE
+                            )
+                    for name, source in add.items():
+                        if isinstance(source, bytes):
+                            with span(
+                                self, 'rewrite.add', name, len(source)
+                            ):
+                                archive.writestr(name, source)
+                        else:
+                            with span(self, 'rewrite.add', name):
+                                archive.write(source, name)
+                    names = archive.namelist()
+                size = os.path.getsize(temp_path)
+                rewrite.nbytes = size
+                if self.file_path.is_file():
+                    shutil.copymode(self.file_path, temp_path)
+                self._release()
+                os.replace(temp_path, self.file_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        self._members = {Path(name).name: name for name in names}
+        self.metrics.add('rewrites')
+        self.metrics.add('rewrite_bytes', size)
+
+
+class ShardedCompressor(Compressor):
+    """
+    A compressed archive split into shards of bounded size.
+
+    Members are stored in shards named `filename-0001.extension`,
+    `filename-0002.extension`, and so on. New members go to the last shard,
+    and a new shard is started once the last one reaches `max_shard_size`
+    bytes or `max_shard_members` members. A shard map routes every
+    operation on a member to the shard holding it, so rewrite-style
+    operations (`append`, `remove`, `update`) only rewrite that shard,
+    however large the archive as a whole grows.
+
+    Parameters
+    ----------
+    filename : str
+        The base filename for the shards.
+    wdir : str, optional
+        The working directory path where the shards will be managed, by
+        default ''.
+    extension : str, optional
+        The extension for the shards, by default 'zip'.
+    max_shard_size : int, optional
+        Size in bytes from which a shard takes no new members, by default
+        None (unbounded).
+    max_shard_members : int, optional
+        Number of members from which a shard takes no new members, by
+        default None (unbounded).
+    locking : bool, optional
+        If True, every shard holds an advisory `fcntl` lock while it is
+        read or mutated, by default False.
+    lock_timeout : float, optional
+        Seconds to wait for a lock before raising `LockTimeout`, by default
+        None (wait forever).
+    compression : int, optional
+        The zipfile compression method of new members, by default
+        zipfile.ZIP_STORED.
+    compresslevel : int, optional
+        The compression level of new members, by default None.
+    metrics : bool or Metrics, optional
+        Whether to collect operation metrics, or the `Metrics` to collect
+        them in, by default True. The shards share the archive's metrics.
+    hooks : list, optional
+        Tracing hooks called with the events of this archive and of its
+        shards, by default None. See `centopy.tracing`.
+
+    Notes
+    -----
+    `file_path` is the path of the first shard.
+    """
+    def __init__(self,
+                 filename: str,
+                 wdir: str = '',
+                 extension: str = 'zip',
+                 max_shard_size: int = None,
+                 max_shard_members: int = None,
+                 locking: bool = False,
+                 lock_timeout: float = None,
+                 compression: int = zipfile.ZIP_STORED,
+                 compresslevel: int = None,
+                 metrics: bool | Metrics = True,
+                 hooks: list = None) -> None:
+        # Shards manage their own files: nothing is opened for the
+        # logical archive itself.
+        self._setup(
+            filename, wdir, extension, locking, lock_timeout, compression,
+            compresslevel, metrics, hooks
+        )
+        self.basename = filename
+        self.max_shard_size = max_shard_size
+        self.max_shard_members = max_shard_members
+        self._shard_map = None
+        numbers = self._discover(
+            self.manager.folder_path, self.basename, self.extension
+        )
+        self.shards = [self._shard(number) for number in numbers or [1]]
+        self._next_shard = (numbers[-1] if numbers else 1) + 1
+        self.file_path = self.shards[0].file_path
+
+    @staticmethod
+    def _discover(folder: Path, basename: str, extension: str) -> list[int]:
+        """
+        List the numbers of the existing shards of an archive, in order.
+        """
+        pattern = re.compile(
+            rf"{re.escape(basename)}-(\d{{4,}})\.{re.escape(extension)}"
+        )
+        numbers = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    match = pattern.fullmatch(entry.name)
+                    if match is not None and entry.is_file():
+                        numbers.append(int(match.group(1)))
+        except FileNotFoundError:
+            pass
+        return sorted(numbers)
+
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        return bool(cls._discover(path.parent, path.stem, path.suffix[1:]))
+
+    def _shard(self, number: int) -> Compressor:
+        shard = Compressor(
+            f"{self.basename}-{number:04d}",
+            self.manager.folder_path,
+            extension=self.extension,
+            locking=self.locking,
+            lock_timeout=self.lock_timeout,
+            compression=self.compression,
+            compresslevel=self.compresslevel,
+            metrics=self.metrics,
+            hooks=self.hooks
+        )
+        shard._pooled = self._pooled
+        return shard
+
+    @property
+    def _pooled(self,) -> bool:
+        return self._pooled_shards
+
+    @_pooled.setter
+    def _pooled(self, pooled: bool):
+        # Shards keep their readers only while the whole archive is pooled
+        self._pooled_shards = pooled
+        for shard in getattr(self, 'shards', ()):
+            shard._pooled = pooled
+
+    @contextmanager
+    def _archive_lock(self, shared: bool):
+        # Every shard locks its own file
+        yield
+
+    def _map(self,) -> dict:
+        """
+        Map each member name to the shard holding it, indexing the shards
+        on first use.
+        """
+        if self._shard_map is None:
+            shard_map = {}
+            members = {}
+            for shard in self.shards:
+                for name, member in shard.members.items():
+                    shard_map[name] = shard
+                    members[name] = member
+            self._shard_map = shard_map
+            self._members = members
+        return self._shard_map
+
+    def _owner(self, filename: str) -> Compressor:
+        try:
+            return self._map()[filename]
+        except KeyError:
+            raise KeyError(
+                f"There is no item named '{filename}' in the archive"
+            ) from None
+
+    def _writable(self,) -> Compressor:
+        """
+        Get the shard taking new members, rolling over to a new shard if
+        the last one is full.
+        """
+        shard = self.shards[-1]
+        if self._full(shard):
+            shard = self._shard(self._next_shard)
+            self._next_shard += 1
+            self.shards.append(shard)
+            logger.debug(
+                "Archive %s rolled over to %s", self.filename, shard.filename
+            )
+        return shard
+
+    def _full(self, shard: Compressor) -> bool:
+        if (self.max_shard_members is not None
+                and len(shard.members) >= self.max_shard_members):
+            return True
+        if (self.max_shard_size is not None
+                and shard.file_path.stat().st_size >= self.max_shard_size):
+            return True
+        return False
+
+    def _route(self, filename: str, method: str, *args, **kwargs):
+        """
+        Run a Compressor method on the shard holding a member, or on the
+        writable shard for new members, then update the shard map.
+        """
+        name = Path(filename).name
+        shard = self._map().get(name)
+        if shard is None:
+            shard = self._writable()
+        result = getattr(shard, method)(filename, *args, **kwargs)
+        if name in shard.members:
+            self._shard_map[name] = shard
+            self._members[name] = shard.members[name]
+        elif self._shard_map.get(name) is shard:
+            del self._shard_map[name]
+            del self._members[name]
+        return result
+
+    @property
+    def members(self,):
+        self._map()
+        return self._members
+
+    @members.setter
+    def members(self, members: dict):
+        self._members = members
+
+    def shard_map(self,) -> dict:
+        """
+        Get the shard holding each member.
+
         Returns
         -------
-        str
-            The path to the extracted file in the working directory.
+        dict
+            Member names mapped to the paths of their shards.
+        """
+        with self._lock.read_lock():
+            return {
+                name: shard.file_path for name, shard in self._map().items()
+            }
+
+    @_writing
+    def clean(self,):
+        for shard in self.shards[1:]:
+            shard.close()
+            shard.file_path.unlink(missing_ok=True)
+        self.shards = self.shards[:1]
+        self.shards[0].clean()
+        self._next_shard = 2
+        self._shard_map = {}
+        self._members = {}
+
+    @_writing
+    def close(self,) -> None:
+        for shard in self.shards:
+            shard.close()
+        self._shard_map = None
+        self._members = None
+
+    def memory_usage(self,) -> int:
+        return sum(shard.memory_usage() for shard in self.shards)
+
+    @property
+    def skipped_writes(self,) -> int:
+        return sum(shard.skipped_writes for shard in self.shards)
+
+    @_reading
+    def namelist(self,):
+        return [name for shard in self.shards for name in shard.namelist()]
+
+    @_reading
+    def infolist(self,) -> list[zipfile.ZipInfo]:
+        return [info for shard in self.shards for info in shard.infolist()]
+
+    def archive_paths(self,) -> list[Path]:
+        return [shard.file_path for shard in self.shards]
+
+    @_writing
+    def _rewrite(self, add: dict = None, remove=()) -> None:
         """
+        Rewrite every shard concerned in a single pass each. New members
+        go to the writable shard.
+        """
+        add = add or {}
+        shard_map = self._map()
+        changes = {}
+        for name in remove:
+            if name in shard_map:
+                changes.setdefault(shard_map[name], ({}, []))[1].append(name)
+        for name, source in add.items():
+            shard = shard_map.get(name)
+            if shard is None:
+                shard = self._writable()
+            changes.setdefault(shard, ({}, []))[0][name] = source
+        for shard, (shard_add, shard_remove) in changes.items():
+            shard._rewrite(add=shard_add, remove=shard_remove)
+        self._shard_map = None
+        self._map()
+
+    @_writing
+    def add(self, filename: str, delete_source=False, mode='a') -> None:
+        self._route(filename, 'add', delete_source=delete_source, mode=mode)
+
+    @_writing
+    def add_from(self, filename: str, delete_source=False, mode='a') -> None:
+        self._route(
+            filename, 'add_from', delete_source=delete_source, mode=mode
+        )
+
+    @_writing
+    def add_fd(self,
+               filename: str,
+               source,
+               chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        return self._route(filename, 'add_fd', source, chunk_size)
+
+    @_writing
+    def write(self,
+              filename: str,
+              content: str,
+              delete_source=False,
+              mode='a') -> None:
+        self._route(
+            filename, 'write', content, delete_source=delete_source, mode=mode
+        )
+
+    @_writing
+    def writeb(self,
+               filename: str,
+               content: bytes,
+               delete_source=False,
+               mode='a') -> None:
+        self._route(
+            filename, 'writeb', content, delete_source=delete_source, mode=mode
+        )
+
+    @_writing
+    def append(self, filename: str, content: str) -> None:
+        self._route(filename, 'append', content)
+
+    @_writing
+    def appendb(self, filename: str, content: bytes) -> None:
+        self._route(filename, 'appendb', content)
+
+    @_reading
+    def read(self, filename: str, as_text=True) -> str | bytes:
+        return self._owner(filename).read(filename, as_text=as_text)
+
+    @_reading
+    def read_into(self,
+                  filename: str,
+                  stream,
+                  chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        return self._owner(filename).read_into(filename, stream, chunk_size)
+
+    @_writing
+    def write_from(self,
+                   filename: str,
+                   stream,
+                   chunk_size: int = COPY_BUFFER_SIZE) -> int:
+        return self._route(filename, 'write_from', stream, chunk_size)
+
+    @_reading
+    def readb(self, filename: str) -> str | bytes:
+        return self._owner(filename).readb(filename)
+
+    @_reading
+    def extract(self, filename: str, path: str = None) -> str:
         if path is None:
             path = self.manager.folder_path
-        with zipfile.ZipFile(self.file_path, mode="r") as archive:
-            return archive.extract(
-                self.members[filename],
-                path=path
-            )
+        return self._owner(filename).extract(filename, path=path)
+
+    @_writing
+    def add_many(self,
+                 paths,
+                 delete_source: bool = False) -> list[str]:
+        """
+        Add files to the archive in a single opening of the writable shard.
 
+        New members all go to the writable shard, which may then grow past
+        its limits. Replaced members are rewritten in their own shards.
+        """
+        paths = [Path(path) for path in paths]
+        for path in paths:
+            if not path.is_file():
+                raise FileNotFoundError(path)
+        shard_map = self._map()
+        sources = {path.name: path for path in paths}
+        new = [path for name, path in sources.items() if name not in shard_map]
+        replaced = {
+            name: path for name, path in sources.items() if name in shard_map
+        }
+        if new:
+            self._writable().add_many(new)
+        if replaced:
+            self._rewrite(add=replaced)
+            self.metrics.add(
+                'bytes_written',
+                sum(path.stat().st_size for path in replaced.values())
+            )
+        self._shard_map = None
+        self._map()
+        if delete_source:
+            for path in sources.values():
+                path.unlink(missing_ok=True)
+        return list(sources)
+
+    @_writing
     def remove(self, filename: str):
-        temp_dir = Path(tempfile.mkdtemp())
-        for member in self.namelist():
-            if member != filename:
-                self.extract(member, path=temp_dir)
-        self.clean()
-        for member in temp_dir.glob('**/*'):
-            self.add_from(member)
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        if filename not in self._map():
+            logger.warning(
+                'File %s not found in archive %s', filename, self.filename
+            )
+            return
+        self._route(filename, 'remove')
 
+    @_writing
     def update(self, filename: str, delete_source=False):
-        temp_dir = Path(tempfile.mkdtemp())
-        for member in self.namelist():
-            if member != filename:
-                self.extract(member, path=temp_dir)
-        self.clean()
-        self.add(filename, delete_source=delete_source, mode='w')
-        for member in temp_dir.glob('**/*'):
-            self.add_from(member)
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        self._route(filename, 'update', delete_source=delete_source)
 
+    @_writing
     def update_from(self, filename: str, delete_source=False):
-        temp_dir = Path(tempfile.mkdtemp())
-        for member in self.namelist():
-            if member != filename:
-                self.extract(member, path=temp_dir)
-        self.clean()
-        self.add_from(filename, delete_source=delete_source, mode='w')
-        for member in temp_dir.glob('**/*'):
-            self.add_from(member)
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        self._route(filename, 'update_from', delete_source=delete_source)
+
+
+def _unchanged(path: Path,
+               stat: os.stat_result,
+               info: zipfile.ZipInfo,
+               archived_at: float,
+               checksum: bool = False) -> bool:
+    """
+    Tell whether a file matches an archive member, comparing sizes, then
+    modification times (at the 2 seconds resolution of zip files), and
+    CRCs when times differ or `checksum` is True.
+
+    Times are not trusted for files modified less than 2 seconds before
+    the archive was last written (`archived_at`): a later change within
+    the same 2 seconds would go unnoticed.
+    """
+    if stat.st_size != info.file_size:
+        return False
+    if not checksum and stat.st_mtime < archived_at - 2:
+        mtime = time.localtime(stat.st_mtime)[:6]
+        if mtime[:5] + (mtime[5] - mtime[5] % 2,) == info.date_time:
+            return True
+    return file_crc32(path) == info.CRC
+
+
+def sync(manager: FilesManager,
+         archive: Compressor,
+         delete: bool = True,
+         checksum: bool = False) -> dict:
+    """
+    Bring an archive up to date with the files of a folder.
+
+    Files missing from the archive are added, members whose file changed
+    are replaced and, if `delete` is True, members without a file are
+    removed. Everything is applied in a single rewrite of the archive,
+    which is skipped altogether when nothing changed. Files held in the
+    manager's packs are synced too.
+
+    Parameters
+    ----------
+    manager : FilesManager
+        The manager of the folder to mirror.
+    archive : Compressor
+        The archive to update.
+    delete : bool, optional
+        If True, remove members whose file no longer exists, by default
+        True.
+    checksum : bool, optional
+        If True, compare the CRC of files whose size and modification time
+        match their member too, by default False.
+
+    Returns
+    -------
+    dict
+        The names of the members 'added', 'replaced' and 'removed', and the
+        number of members left 'unchanged'.
+    """
+    infos = {Path(info.filename).name: info for info in archive.infolist()}
+    own_files = {path.resolve() for path in archive.archive_paths()}
+    archived_at = min(
+        (path.stat().st_mtime for path in own_files if path.exists()),
+        default=0
+    )
+    report = {'added': [], 'replaced': [], 'removed': [], 'unchanged': 0}
+    sources = {}
+    for name in manager.list_files():
+        # Packed files have no file of their own: their content is
+        # archived as bytes, and compared by CRC
+        source = manager._read_packed(name)
+        if source is None:
+            source = manager.file_path(name)
+            if source.resolve() in own_files:
+                continue
+        info = infos.pop(name, None)
+        if info is None:
+            report['added'].append(name)
+        elif isinstance(source, bytes):
+            if len(source) == info.file_size \
+                    and zlib.crc32(source) == info.CRC:
+                report['unchanged'] += 1
+                continue
+            report['replaced'].append(name)
+        elif _unchanged(
+                source, os.stat(source), info, archived_at,
+                checksum=checksum):
+            report['unchanged'] += 1
+            continue
+        else:
+            report['replaced'].append(name)
+        sources[name] = source
+    if delete:
+        report['removed'] = sorted(infos)
+    if sources or report['removed']:
+        archive._rewrite(add=sources, remove=report['removed'])
+    return report
+
+
+class LazyArchive:
+    """
+    A lightweight stand-in for an archive handler that is only built on
+    first use.
+
+    Registering a `LazyArchive` costs no file system access. The wrapped
+    handler is instantiated the first time one of its attributes is
+    requested, and the instance then forwards every attribute access to
+    it. `isinstance` checks against the handler class keep working.
+
+    Parameters
+    ----------
+    handler : Type[Compressor]
+        The archive handler class to instantiate.
+    filename : str
+        The base filename of the archive.
+    wdir : str, optional
+        The working directory of the archive, by default ''.
+    extension : str, optional
+        The extension of the archive, by default 'zip'.
+    on_use : callable, optional
+        Called as `on_use(proxy, opened)` every time the archive is used,
+        `opened` telling whether the handler had to be built for it.
+    on_change : callable, optional
+        Registered as an observer of every handler built, so it is called
+        with the handler after each of its mutations.
+    options : dict, optional
+        Additional keyword arguments for the handler, by default None.
+    pooled : bool, optional
+        If True, handlers keep their read handle open between calls, by
+        default True. Only bounded pools should keep them, since each
+        holds a file open.
+
+    Notes
+    -----
+    The proxy owns the archive's reader/writer lock and hands it to every
+    handler it builds, so an archive that is closed and reopened keeps
+    serializing writers that still hold the previous handler. It owns the
+    archive's `Metrics` too, so they survive the archive being closed.
+    """
+    __slots__ = (
+        '_handler', '_filename', '_wdir', '_extension', '_archive',
+        '_on_use', '_on_change', '_options', '_lock', '_guard', '_metrics',
+        '_pooled'
+    )
+
+    def __init__(self,
+                 handler: Type[Compressor],
+                 filename: str,
+                 wdir: str = '',
+                 extension: str = 'zip',
+                 on_use: callable = None,
+                 on_change: callable = None,
+                 options: dict = None,
+                 pooled: bool = True) -> None:
+        object.__setattr__(self, '_handler', handler)
+        object.__setattr__(self, '_filename', filename)
+        object.__setattr__(self, '_wdir', wdir)
+        object.__setattr__(self, '_extension', extension)
+        object.__setattr__(self, '_archive', None)
+        object.__setattr__(self, '_on_use', on_use)
+        object.__setattr__(self, '_on_change', on_change)
+        options = dict(options or {})
+        metrics = options.get('metrics', True)
+        if not isinstance(metrics, Metrics):
+            metrics = Metrics(enabled=metrics)
+        options['metrics'] = metrics
+        # Hooks registered on the archive outlive its handlers too
+        options.setdefault('hooks', [])
+        object.__setattr__(self, '_options', options)
+        object.__setattr__(self, '_lock', RWLock())
+        object.__setattr__(self, '_guard', threading.Lock())
+        object.__setattr__(self, '_metrics', metrics)
+        object.__setattr__(self, '_pooled', pooled)
+
+    @property
+    def __class__(self):
+        return self._handler
+
+    @property
+    def _is_open(self,) -> bool:
+        return self._archive is not None
+
+    def _open(self,) -> Compressor:
+        """
+        Build the wrapped archive handler if needed and return it.
+        """
+        return self._acquire()[0]
+
+    def _acquire(self,) -> tuple[Compressor, bool]:
+        with self._guard:
+            archive = self._archive
+            if archive is not None:
+                return archive, False
+            archive = self._handler(
+                self._filename,
+                self._wdir,
+                extension=self._extension,
+                **self._options
+            )
+            archive._lock = self._lock
+            archive._pooled = self._pooled
+            if self._on_change is not None:
+                archive._observers.append(self._on_change)
+            object.__setattr__(self, '_archive', archive)
+            return archive, True
+
+    def _peek(self,) -> Compressor:
+        """
+        Get the wrapped archive handler if it is open, or else a handler
+        built for a one-off read, which is neither kept nor pooled and so
+        holds no open file once done.
+        """
+        with self._guard:
+            archive = self._archive
+        if archive is not None:
+            return archive
+        archive = self._handler(
+            self._filename,
+            self._wdir,
+            extension=self._extension,
+            **self._options
+        )
+        archive._lock = self._lock
+        return archive
+
+    def _use(self,) -> Compressor:
+        """
+        Open the wrapped archive handler and report its use.
+        """
+        archive, opened = self._acquire()
+        if self._on_use is not None:
+            self._on_use(self, opened)
+        return archive
+
+    def _close(self,) -> None:
+        """
+        Close and drop the wrapped archive handler. It is rebuilt on next
+        use.
+        """
+        with self._guard:
+            archive = self._archive
+            object.__setattr__(self, '_archive', None)
+        if archive is not None:
+            archive.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self._use(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._use(), name, value)
+
+    def __repr__(self,):
+        state = 'open' if self._is_open else 'closed'
+        return (
+            f"<LazyArchive '{self._filename}.{self._extension}' ({state})>"
+        )
 
 
 class Archives:
     def __init__(self,
                  extension: str = '.zip',
-                 archive_handler: Type[Compressor] = Compressor):
+                 archive_handler: Type[Compressor] = Compressor,
+                 max_open: int = None,
+                 max_memory: int = None,
+                 handler_options: dict = None):
         """
         Initialize an Archives object.
 
@@ -585,6 +2987,21 @@ class Archives:
             archive_handler (Type[Compressor], optional): Archive handler
             class. Defaults to Compressor.
                 Must be a subclass of centopy.Compressor.
+            max_open (int, optional): Maximum number of archives kept open
+            at once. Defaults to None (unbounded).
+                Open archives keep their read handle between calls only
+                when this is set, so an unbounded pool holds no file open
+                between operations.
+            max_memory (int, optional): Maximum estimated memory, in bytes,
+            held by open archives. Defaults to None (unbounded).
+                When a limit is exceeded, the least recently used archives
+                are closed. They are reopened transparently on next use.
+            handler_options (dict, optional): Additional keyword arguments
+            for the archive handler, e.g. `{'locking': True}`, or
+            `{'metrics': False}` to disable metrics. Defaults to None.
+                Sharded archives are managed with
+                `archive_handler=ShardedCompressor` and, e.g.,
+                `handler_options={'max_shard_size': 2**30}`.
 
         Raises:
             TypeError: If 'archive_handler' is not a subclass of
@@ -599,6 +3016,21 @@ class Archives:
         self._file = {}
         self._extension = extension
         self._archive_handler = archive_handler
+        self._handler_options = handler_options or {}
+        self._max_open = max_open
+        self._max_memory = max_memory
+        self._opened = OrderedDict()
+        self._evicted = set()
+        # Estimated memory of each open archive, as of its last use or
+        # mutation, and their total
+        self._usage = {}
+        self._usage_total = 0
+        self._pool_stats = {'opens': 0, 'reopens': 0, 'evictions': 0}
+        self._lock = threading.RLock()
+        self._member_index = {}
+        self._indexed = {}
+        self._unindexed = set()
+        self._sorted_members = None
 
     def __len__(self,):
         return len(self._file)
@@ -611,17 +3043,302 @@ class Archives:
 
         return self._file[archive_name]
 
+    def __contains__(self, archive_name: str):
+        return archive_name in self._file
+
     def __iter__(self,):
         for archive_name in self._file.values():
             yield archive_name
         return
 
     def __repr__(self,):
-        names = ",".join(name for name in self)
+        names = ",".join(self._file)
         text = f"Opened archives: {len(self)}\n"
         text += f"Archives list: {names}\n"
         return text
 
+    def _resolve(self, filename: str, wdir='') -> tuple[str, Path]:
+        """
+        Split an archive name into its collection key and its file path.
+        """
+        path = Path(f'{filename}.{self._extension}')
+        if filename.split('.')[-1] == self._extension:
+            path = Path(f'{filename}')
+            filename = str(path.with_suffix(''))
+        if wdir != '':
+            path = Path(wdir) / path
+        return filename, path
+
+    def _register(self, filename: str, wdir='') -> LazyArchive:
+        archive = LazyArchive(
+            self._archive_handler,
+            filename,
+            wdir,
+            self._extension,
+            on_use=self._touch,
+            on_change=functools.partial(self._changed, filename),
+            options=self._handler_options,
+            pooled=self._max_open is not None
+        )
+        with self._lock:
+            self._file[filename] = archive
+            self._unindex(filename)
+            self._unindexed.add(filename)
+        return archive
+
+    def _touch(self, archive: LazyArchive, opened: bool):
+        """
+        Mark an archive as the most recently used one, closing the least
+        recently used archives if the pool is over its limits.
+        """
+        name = archive._filename
+        evicted = []
+        with self._lock:
+            if opened:
+                self._pool_stats['opens'] += 1
+                if name in self._evicted:
+                    self._evicted.discard(name)
+                    self._pool_stats['reopens'] += 1
+            self._opened[name] = archive
+            self._opened.move_to_end(name)
+            handler = archive._archive
+            if self._max_memory is not None and handler is not None:
+                self._measure(name, handler)
+            while len(self._opened) > 1 and self._over_limit():
+                evicted_name, evicted_archive = self._opened.popitem(
+                    last=False
+                )
+                self._usage_total -= self._usage.pop(evicted_name, 0)
+                evicted.append(evicted_archive)
+                self._evicted.add(evicted_name)
+                self._pool_stats['evictions'] += 1
+        # Closing waits for running operations on the archive, so it is
+        # done without holding the collection lock.
+        for evicted_archive in evicted:
+            evicted_archive._close()
+            logger.debug(
+                "Archive '%s' closed to free the pool",
+                evicted_archive._filename
+            )
+
+    def _over_limit(self,) -> bool:
+        if self._max_open is not None and len(self._opened) > self._max_open:
+            return True
+        if self._max_memory is not None:
+            return self._usage_total > self._max_memory
+        return False
+
+    def _measure(self, archive_name: str, archive: Compressor):
+        """
+        Update the memory estimate of an open archive. The collection lock
+        must be held.
+        """
+        usage = archive.memory_usage()
+        self._usage_total += usage - self._usage.get(archive_name, 0)
+        self._usage[archive_name] = usage
+
+    def _changed(self, archive_name: str, archive: Compressor):
+        """
+        Observe the mutations of an archive, keeping the member index and
+        the memory estimate of the pool up to date.
+        """
+        self._reindex(archive_name, archive)
+        if self._max_memory is not None:
+            with self._lock:
+                if self._opened.get(archive_name) is not None \
+                        and self._opened[archive_name]._archive is archive:
+                    self._measure(archive_name, archive)
+
+    def pool_stats(self,) -> dict:
+        """
+        Report the state of the open-archive pool.
+
+        Returns:
+            dict: Number of currently open archives ('open'), how many
+            times archives were opened ('opens'), reopened after eviction
+            ('reopens') and evicted ('evictions').
+        """
+        with self._lock:
+            stats = {'open': len(self._opened)}
+            stats.update(self._pool_stats)
+        return stats
+
+    def stats(self, per_archive: bool = False) -> dict:
+        """
+        Report the metrics of the archives in the collection.
+
+        Metrics are kept across archive evictions, and dropped when an
+        archive is closed.
+
+        Args:
+            per_archive (bool, optional): Also report the metrics of each
+            archive. Defaults to False.
+
+        Returns:
+            dict: The 'operations' and 'counters' of every archive summed
+            up, as in `Metrics.stats`, and the 'pool' statistics. With
+            `per_archive`, 'archives' maps each archive name to its own
+            'operations' and 'counters'.
+        """
+        with self._lock:
+            archives = dict(self._file)
+        metrics = {
+            name: archive._metrics for name, archive in archives.items()
+        }
+        stats = Metrics.merge(metrics.values()).stats()
+        stats['pool'] = self.pool_stats()
+        if per_archive:
+            stats['archives'] = {
+                name: archive_metrics.stats()
+                for name, archive_metrics in metrics.items()
+            }
+        return stats
+
+    def _reindex(self, archive_name: str, archive: Compressor):
+        """
+        Bring the member index up to date with an archive's members.
+
+        Only the difference with the previously indexed members is applied.
+        """
+        members = archive._members
+        if members is None:
+            # Closed: the members did not change
+            return
+        members = frozenset(members)
+        with self._lock:
+            if self._file.get(archive_name) is None:
+                return
+            previous = self._indexed.get(archive_name, frozenset())
+            if members == previous and archive_name in self._indexed:
+                return
+            self._unindex(archive_name)
+            for member in members:
+                self._member_index.setdefault(member, set()).add(archive_name)
+            self._indexed[archive_name] = members
+            self._unindexed.discard(archive_name)
+            self._sorted_members = None
+
+    def _unindex(self, archive_name: str):
+        members = self._indexed.pop(archive_name, ())
+        for member in members:
+            holders = self._member_index.get(member)
+            if holders is not None:
+                holders.discard(archive_name)
+                if not holders:
+                    del self._member_index[member]
+        if members:
+            self._sorted_members = None
+
+    def index(self,):
+        """
+        Index the members of every archive not indexed yet.
+
+        Archives are indexed the first time they are searched, or after
+        each of their mutations. This builds the whole index up front.
+        Archives not open are read without being opened in the pool, so
+        indexing leaves no file open.
+        """
+        with self._lock:
+            if not self._unindexed:
+                return
+            pending = [
+                (name, self._file[name]) for name in self._unindexed
+            ]
+        for name, archive in pending:
+            handler = archive._peek()
+            with handler._lock.read_lock():
+                _ = handler.members
+            self._reindex(name, handler)
+
+    def find(self, member: str) -> list[str]:
+        """
+        Find the archives holding a member.
+
+        Args:
+            member (str): Name of the member.
+
+        Returns:
+            list[str]: Sorted names of the archives holding `member`.
+        """
+        self.index()
+        with self._lock:
+            return sorted(self._member_index.get(member, ()))
+
+    def find_prefix(self, prefix: str) -> dict[str, list[str]]:
+        """
+        Find the members starting with a prefix, and the archives holding
+        them.
+
+        Args:
+            prefix (str): Prefix of the member names.
+
+        Returns:
+            dict[str, list[str]]: Member names mapped to the sorted names
+            of the archives holding them.
+        """
+        self.index()
+        with self._lock:
+            if self._sorted_members is None:
+                self._sorted_members = sorted(self._member_index)
+            members = self._sorted_members
+            start = bisect.bisect_left(members, prefix)
+            found = {}
+            for member in itertools.islice(members, start, None):
+                if not member.startswith(prefix):
+                    break
+                found[member] = sorted(self._member_index[member])
+        return found
+
+    def find_glob(self, pattern: str) -> dict[str, list[str]]:
+        """
+        Find the members matching a shell-style pattern, and the archives
+        holding them.
+
+        Only members sharing the literal prefix of `pattern` are tested.
+
+        Args:
+            pattern (str): Pattern as understood by `fnmatch`.
+
+        Returns:
+            dict[str, list[str]]: Member names mapped to the sorted names
+            of the archives holding them.
+        """
+        prefix = re.split(r'[*?\[]', pattern, maxsplit=1)[0]
+        return {
+            member: archives
+            for member, archives in self.find_prefix(prefix).items()
+            if fnmatch.fnmatchcase(member, pattern)
+        }
+
+    def map(self, func: callable, names=None, workers: int = None) -> list:
+        """
+        Apply a function to several archives on a thread pool.
+
+        Operations on the same archive are serialized by its
+        reader/writer lock: reads run concurrently, writes exclusively.
+        Operations on different archives run in parallel.
+
+        Args:
+            func (callable): Function called with each archive.
+            names (Iterable[str], optional): Names of the archives to
+            process. Defaults to every archive in the collection.
+            workers (int, optional): Maximum number of worker threads.
+            Defaults to the ThreadPoolExecutor default.
+
+        Returns:
+            list: The results of `func`, in the order of `names`.
+
+        Raises:
+            KeyError: If a name was not created or loaded. Exceptions raised
+            by `func` are propagated.
+        """
+        if names is None:
+            with self._lock:
+                names = tuple(self._file)
+        archives = [self[name] for name in names]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, archives))
+
     def new(self,
             filename: str,
             wdir='',
@@ -640,20 +3357,18 @@ class Archives:
             bool: True if the archive was created, False otherwise.
         """
         proceed = True
-        path = Path(f'{filename}.{self._extension}')
-        if filename.split('.')[-1] == self._extension:
-            path = Path(f'{filename}')
-            filename = path.with_suffix('')
-        if wdir != '':
-            path = Path(wdir) / path
-        if path.exists():
-            proceed = confirm_func(str(filename), wdir)
+        filename, path = self._resolve(filename, wdir)
+        exists = self._archive_handler.exists(path)
+        if exists:
+            proceed = confirm_func(filename, wdir)
         if proceed:
-            archive = self._archive_handler(
-                str(filename), wdir, extension=self._extension
-            )
-            archive.clean()
-            self._file[filename] = archive
+            archive = self._register(filename, wdir)
+            # The handler creates missing archives itself, so only
+            # existing ones need to be emptied.
+            if exists:
+                archive.clean()
+            else:
+                archive._use()
             return True
         return False
 
@@ -661,6 +3376,9 @@ class Archives:
         """
         Load an existing archive and add it to the collection.
 
+        The archive is registered as a `LazyArchive`: it is neither opened
+        nor indexed until it is first used.
+
         Args:
             filename (str): Name of the archive.
             wdir (str, optional): Working directory. Defaults to
@@ -672,21 +3390,12 @@ class Archives:
         Raises:
             FileNotFoundError: If the specified archive file doesn't exist.
         """
-        path = Path(f'{filename}.{self._extension}')
-        if filename.split('.')[-1] == self._extension:
-            path = Path(f'{filename}')
-            filename = path.with_suffix('')
-        if wdir != '':
-            path = Path(wdir) / path
+        filename, path = self._resolve(filename, wdir)
 
-        if not path.exists():
+        if not self._archive_handler.exists(path):
             raise FileNotFoundError
 
-        self._file[filename] = self._archive_handler(
-            str(filename), wdir, extension=self._extension
-        )
-
-        return self._file[filename]
+        return self._register(filename, wdir)
 
     def close(self, archive_name: str):
         """
@@ -698,7 +3407,13 @@ class Archives:
         Returns:
             None
         """
-        closed = self._file.pop(archive_name, None)
+        with self._lock:
+            closed = self._file.pop(archive_name, None)
+            self._unindex(archive_name)
+            self._unindexed.discard(archive_name)
+            self._opened.pop(archive_name, None)
+            self._usage_total -= self._usage.pop(archive_name, 0)
+            self._evicted.discard(archive_name)
         if closed is None:
             logger.warning(
                 "'%s' was not created or loaded. "
@@ -706,7 +3421,7 @@ class Archives:
                 archive_name
             )
             return
-        del closed
+        closed._close()
 
     def close_all(self, ):
         """
@@ -715,8 +3430,16 @@ class Archives:
         Returns:
             None
         """
-        keys = tuple(self._file.keys())
-        for archive_name in keys:
-            closed = self._file.pop(archive_name, None)
-            if closed is not None:
-                del closed
+        with self._lock:
+            closed = tuple(self._file.values())
+            self._file.clear()
+            self._member_index.clear()
+            self._indexed.clear()
+            self._unindexed.clear()
+            self._sorted_members = None
+            self._opened.clear()
+            self._usage.clear()
+            self._usage_total = 0
+            self._evicted.clear()
+        for archive in closed:
+            archive._close()
@@ -0,0 +1,25 @@
+"""
+    Package "centopy"
+
+    This module provides the names of the compressions supported, without
+    importing any of them
+"""
+
+# Names of the zipfile compression methods, mapped to their zipfile
+# constants (ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2 and ZIP_LZMA), whose
+# values are fixed by the zip format
+COMPRESSION_METHODS = {
+    'stored': 0,
+    'deflated': 8,
+    'bzip2': 12,
+    'lzma': 14,
+}
+
+# Compressions of single files, mapped to the file extensions they are
+# chosen for and to the module whose `open` function they are read and
+# written with, imported on first use
+FILE_COMPRESSIONS = {
+    'gzip': (('.gz',), 'gzip'),
+    'bz2': (('.bz2',), 'bz2'),
+    'lzma': (('.xz', '.lzma'), 'lzma'),
+}
@@ -0,0 +1,335 @@
+"""
+    Package "centopy"
+
+    This module provides the locks used to make file and archive
+    operations safe to run concurrently
+"""
+import os
+import time
+import threading
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+def require_locking() -> None:
+    """
+    Check that file locks can be taken on this platform.
+
+    Raises
+    ------
+    RuntimeError
+        If `fcntl` is not available, e.g. on Windows.
+    """
+    if fcntl is None:
+        raise RuntimeError(
+            "File locking requires fcntl, which this platform lacks"
+        )
+
+
+class RWLock:
+    """
+    A reader/writer lock.
+
+    Any number of threads may hold the lock for reading at the same time,
+    while a writer holds it exclusively. Waiting writers take precedence
+    over new readers, so writers are not starved.
+
+    The lock is reentrant: a thread holding it for reading may acquire it
+    for reading again, and a thread holding it for writing may acquire it
+    again for either reading or writing. Upgrading a read lock to a write
+    lock is not supported.
+
+    Methods
+    -------
+    acquire_read() -> None:
+        Acquires the lock for reading.
+    release_read() -> None:
+        Releases a read acquisition.
+    acquire_write() -> None:
+        Acquires the lock for writing.
+    release_write() -> None:
+        Releases a write acquisition.
+    read_lock() -> ContextManager:
+        Holds the lock for reading within a `with` block.
+    write_lock() -> ContextManager:
+        Holds the lock for writing within a `with` block.
+    """
+    def __init__(self,):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = {}
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self,):
+        """
+        Acquires the lock for reading, blocking while another thread
+        writes or waits to write.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self,):
+        """
+        Releases a read acquisition.
+
+        Raises
+        ------
+        RuntimeError
+            If the calling thread does not hold the lock for reading.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            count = self._readers.get(me)
+            if count is None:
+                raise RuntimeError("Cannot release an unacquired read lock")
+            if count == 1:
+                del self._readers[me]
+                self._condition.notify_all()
+            else:
+                self._readers[me] = count - 1
+
+    def acquire_write(self,):
+        """
+        Acquires the lock for writing, blocking while other threads hold
+        it.
+
+        Raises
+        ------
+        RuntimeError
+            If the calling thread holds only a read lock.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to write")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self,):
+        """
+        Releases a write acquisition.
+
+        Raises
+        ------
+        RuntimeError
+            If the calling thread does not hold the lock for writing.
+        """
+        with self._condition:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Cannot release an unacquired write lock")
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read_lock(self,):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_lock(self,):
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+
+class LockTimeout(TimeoutError):
+    """
+    Raised when a file lock cannot be acquired within its timeout.
+    """
+
+
+class LockStats:
+    """
+    Thread-safe counters describing how long file locks were waited for.
+
+    Attributes
+    ----------
+    acquired : int
+        Number of locks acquired.
+    contended : int
+        Number of acquisitions that had to wait for another holder.
+    timeouts : int
+        Number of acquisitions that gave up after their timeout.
+    wait_total : float
+        Total time, in seconds, spent waiting for locks.
+    wait_max : float
+        Longest single wait, in seconds.
+    """
+    def __init__(self,):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, contended: bool, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquired += 1
+            if contended:
+                self.contended += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def as_dict(self,) -> dict:
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'contended': self.contended,
+                'timeouts': self.timeouts,
+                'wait_total': self.wait_total,
+                'wait_max': self.wait_max,
+            }
+
+
+class FileLock:
+    """
+    An advisory, cross-process lock on a file, built on `fcntl.flock`.
+
+    Shared locks may be held by any number of processes at once, while an
+    exclusive lock excludes every other holder. Only processes that also
+    lock the file are excluded: the lock is advisory.
+
+    The lock is taken on the file itself. If the file is replaced while
+    waiting for it, the lock is retaken on the new file, so writers that
+    swap files in with `os.replace` stay serialized.
+
+    Parameters
+    ----------
+    path : str or Path
+        The path of the file to lock.
+    shared : bool, optional
+        Take a shared (reader) lock instead of an exclusive one, by default
+        False.
+    timeout : float, optional
+        Seconds to wait for the lock before raising `LockTimeout`, by
+        default None (wait forever).
+    stats : LockStats, optional
+        Counters updated on every acquisition, by default None.
+
+    Notes
+    -----
+    Exclusive locks create the file if it does not exist. Shared locks on a
+    missing file succeed without locking anything, since there is nothing
+    to read.
+    """
+    poll_interval = 0.005
+    max_poll_interval = 0.1
+
+    def __init__(self,
+                 path,
+                 shared: bool = False,
+                 timeout: float = None,
+                 stats: LockStats = None):
+        require_locking()
+        self.path = os.fspath(path)
+        self.shared = shared
+        self.timeout = timeout
+        self.stats = stats
+        self._fd = None
+
+    def _try_lock(self,) -> bool:
+        """
+        Make one attempt at locking the file.
+
+        Returns
+        -------
+        bool
+            True if the lock is held, or if no lock is needed.
+        """
+        operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        flags = os.O_RDONLY if self.shared else os.O_RDWR | os.O_CREAT
+        try:
+            fd = os.open(self.path, flags, 0o644)
+        except FileNotFoundError:
+            if self.shared:
+                return True
+            raise
+        try:
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        try:
+            same_file = os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            same_file = False
+        if not same_file:
+            # The file was replaced or removed while we were locking it
+            os.close(fd)
+            return self._try_lock()
+        self._fd = fd
+        return True
+
+    def acquire(self,):
+        """
+        Acquire the lock, polling until it is free.
+
+        Raises
+        ------
+        LockTimeout
+            If the lock was not acquired within `timeout` seconds.
+        """
+        start = time.monotonic()
+        interval = self.poll_interval
+        contended = False
+        while not self._try_lock():
+            contended = True
+            waited = time.monotonic() - start
+            if self.timeout is not None and waited >= self.timeout:
+                if self.stats is not None:
+                    self.stats.record(waited, contended, timed_out=True)
+                raise LockTimeout(
+                    f"Could not lock {self.path} within {self.timeout}s"
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+        if self.stats is not None:
+            self.stats.record(
+                time.monotonic() - start, contended, timed_out=False
+            )
+
+    def release(self,):
+        """
+        Release the lock, if held.
+        """
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def __enter__(self,):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,500 @@
+"""
+    Package "centopy"
+
+    This module provides the pack files storing small files in bulk
+"""
+import os
+import struct
+import logging
+import threading
+
+from pathlib import Path
+
+from .locks import RWLock
+from .utils import write_buffers
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger('standard')
+
+# Name of the folder holding the packs, within the managed folder
+PACKS_FOLDER = '.packs'
+# Name of the file locked by the store holding the packs open
+LOCK_FILE = '.lock'
+# Start of every pack file
+PACK_MAGIC = b'CNTPACK1'
+# Header of every record: flags, name length and data length
+_RECORD = struct.Struct('<BHI')
+# Flag of the records deleting a name
+_DELETED = 1
+
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    data = os.pread(fd, length, offset)
+    while len(data) < length:
+        chunk = os.pread(fd, length - len(data), offset + len(data))
+        if not chunk:
+            raise EOFError("Pack truncated")
+        data += chunk
+    return data
+
+
+class PackStore:
+    """
+    Append-only pack files holding many small files, with an in-memory
+    index of where each one is.
+
+    Every write appends a record (header, name and data) to the current
+    pack, in a single vectored write, and every deletion appends a short
+    record marking the name deleted. The index is rebuilt on opening by
+    reading the record headers of the packs in order. Reading a file is
+    a single `os.pread` from a pack kept open.
+
+    Overwritten and deleted records are garbage until the pack holding
+    them is compacted: its live records are copied to the current pack
+    and the pack is removed. Compaction runs in a background thread once
+    garbage exceeds `compact_ratio` of the packs' size.
+
+    A store locks its folder, with `fcntl.flock`, for as long as it is
+    open: opening the folder with another store, in this process or any
+    other, raises `RuntimeError` until it is closed. Only a store's own
+    threads may share it.
+
+    Parameters
+    ----------
+    folder_path : str or Path
+        The folder holding the packs.
+    max_pack_size : int, optional
+        Size in bytes from which a new pack is started, by default 64 MiB.
+    compact_ratio : float or None, optional
+        Fraction of garbage from which packs are compacted in the
+        background, by default 0.5. None disables automatic compaction.
+    min_compact_size : int, optional
+        Garbage bytes below which packs are never compacted automatically,
+        by default 1 MiB.
+
+    Methods
+    -------
+    get(name: str) -> bytes:
+        Returns the contents stored under a name.
+    put(name: str, buffers: list) -> int:
+        Stores contents under a name.
+    append(name: str, buffers: list) -> int:
+        Appends contents to those stored under a name.
+    delete(name: str) -> bool:
+        Deletes a name.
+    compact(min_garbage: float = 0.0) -> dict:
+        Compacts the packs holding garbage.
+    """
+    def __init__(self,
+                 folder_path,
+                 max_pack_size: int = 64 * 1024 * 1024,
+                 compact_ratio: float = 0.5,
+                 min_compact_size: int = 1024 * 1024) -> None:
+        self.folder_path = Path(folder_path)
+        self.folder_path.mkdir(parents=True, exist_ok=True)
+        self.max_pack_size = max_pack_size
+        self.compact_ratio = compact_ratio
+        self.min_compact_size = min_compact_size
+        # Names mapped to (pack number, record offset, record size, data
+        # offset, data size)
+        self._index = {}
+        # Pack numbers mapped to their open file, and to their [size, live
+        # bytes], the header being live
+        self._files = {}
+        self._sizes = {}
+        self._current = None
+        self._lock = RWLock()
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+        self._lock_file = None
+        self._lock_folder()
+        try:
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    def _lock_folder(self,):
+        """
+        Lock the folder of the packs, as only one store may append to
+        them.
+
+        Raises
+        ------
+        RuntimeError
+            If another store holds the folder.
+        """
+        self._lock_file = open(self.folder_path / LOCK_FILE, 'ab')
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(
+                self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB
+            )
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(
+                f"Packs already opened by another store: {self.folder_path}"
+            ) from None
+
+    def _path(self, number: int) -> Path:
+        return self.folder_path / f'pack-{number:06d}.pack'
+
+    def _records(self, number: int, fd: int):
+        """
+        Read the record headers of a pack, truncating a record left
+        incomplete by a crash at its end.
+
+        Yields
+        ------
+        tuple
+            (flags, name, record offset, record size, data offset, data
+            size) of every record.
+        """
+        size = os.fstat(fd).st_size
+        offset = len(PACK_MAGIC)
+        while offset < size:
+            if offset + _RECORD.size > size:
+                break
+            flags, name_size, data_size = _RECORD.unpack(
+                _pread(fd, _RECORD.size, offset)
+            )
+            data_offset = offset + _RECORD.size + name_size
+            end = data_offset + data_size
+            if end > size:
+                break
+            name = _pread(fd, name_size, offset + _RECORD.size)
+            yield (flags, name.decode('utf-8'), offset, end - offset,
+                   data_offset, data_size)
+            offset = end
+        if offset < size:
+            logger.warning(
+                "Truncating incomplete record at %d of %s",
+                offset, self._path(number)
+            )
+            os.ftruncate(fd, offset)
+
+    def _load(self,):
+        numbers = sorted(
+            int(path.stem.split('-')[1])
+            for path in self.folder_path.glob('pack-*.pack')
+        )
+        for number in numbers:
+            file_ = open(self._path(number), 'r+b', buffering=0)
+            if file_.read(len(PACK_MAGIC)) != PACK_MAGIC:
+                file_.close()
+                raise ValueError(f"Not a pack: {self._path(number)}")
+            self._files[number] = file_
+            self._sizes[number] = [len(PACK_MAGIC), len(PACK_MAGIC)]
+            for record in self._records(number, file_.fileno()):
+                self._apply(number, *record)
+            self._current = number
+
+    def _apply(self, number, flags, name, offset, size, data_offset,
+               data_size):
+        """
+        Index a record appended to a pack, accounting the records it
+        makes garbage.
+        """
+        sizes = self._sizes[number]
+        sizes[0] += size
+        previous = self._index.pop(name, None)
+        if previous is not None:
+            self._sizes[previous[0]][1] -= previous[2]
+        if not flags & _DELETED:
+            self._index[name] = (number, offset, size, data_offset, data_size)
+            sizes[1] += size
+
+    def _new_pack(self,) -> int:
+        number = (self._current or 0) + 1
+        file_ = open(self._path(number), 'x+b', buffering=0)
+        file_.write(PACK_MAGIC)
+        self._files[number] = file_
+        self._sizes[number] = [len(PACK_MAGIC), len(PACK_MAGIC)]
+        self._current = number
+        return number
+
+    def _append(self, name: str, buffers: list, flags: int = 0):
+        """
+        Append a record to the current pack, starting a new one if it is
+        full. The write lock must be held.
+        """
+        number = self._current
+        if number is None or self._sizes[number][0] >= self.max_pack_size:
+            number = self._new_pack()
+        encoded = name.encode('utf-8')
+        data_size = sum(memoryview(buffer).nbytes for buffer in buffers)
+        header = _RECORD.pack(flags, len(encoded), data_size)
+        offset = self._sizes[number][0]
+        fd = self._files[number].fileno()
+        os.lseek(fd, offset, os.SEEK_SET)
+        size = write_buffers(fd, [header, encoded, *buffers])
+        self._apply(
+            number, flags, name, offset, size,
+            offset + _RECORD.size + len(encoded), data_size
+        )
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def __len__(self,) -> int:
+        return len(self._index)
+
+    def __iter__(self,):
+        return iter(list(self._index))
+
+    def size(self, name: str) -> int:
+        """
+        Get the size of the contents stored under a name.
+
+        Raises
+        ------
+        KeyError
+            If nothing is stored under `name`.
+        """
+        return self._index[name][4]
+
+    def signature(self, name: str) -> tuple:
+        """
+        Get where, and how large, the contents stored under a name are.
+        The signature changes whenever the contents are stored again.
+
+        Raises
+        ------
+        KeyError
+            If nothing is stored under `name`.
+        """
+        number, offset, _, _, size = self._index[name]
+        return number, offset, size
+
+    def get(self, name: str) -> bytes:
+        """
+        Get the contents stored under a name, in a single read.
+
+        Raises
+        ------
+        KeyError
+            If nothing is stored under `name`.
+        """
+        with self._lock.read_lock():
+            number, _, _, offset, size = self._index[name]
+            return _pread(self._files[number].fileno(), size, offset)
+
+    def put(self, name: str, buffers) -> int:
+        """
+        Store contents under a name, replacing any previous contents.
+
+        Parameters
+        ----------
+        name : str
+            The name, of at most 65535 bytes in UTF-8.
+        buffers : list
+            The contents, as a list of bytes-like objects written in order.
+
+        Returns
+        -------
+        int
+            The number of bytes stored.
+        """
+        with self._lock.write_lock():
+            self._append(name, buffers)
+            size = self._index[name][4]
+        self._maybe_compact()
+        return size
+
+    def append(self,
+               name: str,
+               buffers,
+               max_size: int = None,
+               overflow: callable = None) -> int | None:
+        """
+        Append contents to those stored under a name.
+
+        The stored contents are read and stored again, with the new ones,
+        under the write lock, so concurrent appends are never lost. Every
+        append thus rewrites the whole contents and makes the previous
+        record garbage: appending n times costs O(n²) bytes written.
+
+        Parameters
+        ----------
+        name : str
+            The name.
+        buffers : list
+            The contents to append, as a list of bytes-like objects.
+        max_size : int, optional
+            Size in bytes the contents may not exceed, by default None (no
+            limit).
+        overflow : callable, optional
+            Called, under the write lock, with the buffers of the whole
+            contents when they would exceed `max_size`, e.g. to store them
+            elsewhere, by default None.
+
+        Returns
+        -------
+        int or None
+            The number of bytes stored, or None if the contents exceeded
+            `max_size`: the name is then deleted.
+
+        Raises
+        ------
+        KeyError
+            If nothing is stored under `name`.
+        """
+        with self._lock.write_lock():
+            number, _, _, offset, size = self._index[name]
+            buffers = [
+                _pread(self._files[number].fileno(), size, offset), *buffers
+            ]
+            total = sum(memoryview(buffer).nbytes for buffer in buffers)
+            if max_size is not None and total > max_size:
+                if overflow is not None:
+                    overflow(buffers)
+                self._append(name, [], flags=_DELETED)
+                total = None
+            else:
+                self._append(name, buffers)
+        self._maybe_compact()
+        return total
+
+    def delete(self, name: str) -> bool:
+        """
+        Delete a name.
+
+        Returns
+        -------
+        bool
+            Whether something was stored under `name`.
+        """
+        with self._lock.write_lock():
+            if name not in self._index:
+                return False
+            self._append(name, [], flags=_DELETED)
+        self._maybe_compact()
+        return True
+
+    def stats(self,) -> dict:
+        """
+        Get the size of the packs.
+
+        Returns
+        -------
+        dict
+            The number of 'packs' and 'files', and the 'size' of the packs
+            and the part of it that is 'garbage', in bytes.
+        """
+        with self._lock.read_lock():
+            size = sum(total for total, _ in self._sizes.values())
+            live = sum(live for _, live in self._sizes.values())
+            return {
+                'packs': len(self._files),
+                'files': len(self._index),
+                'size': size,
+                'garbage': size - live,
+            }
+
+    def _maybe_compact(self,):
+        if self.compact_ratio is None:
+            return
+        stats = self.stats()
+        garbage = stats['garbage']
+        if garbage < self.min_compact_size \
+                or garbage < self.compact_ratio * stats['size']:
+            return
+        with self._compact_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self.compact,
+                kwargs={'min_garbage': self.compact_ratio},
+                daemon=True
+            )
+            self._compactor.start()
+
+    def compact(self, min_garbage: float = 0.0) -> dict:
+        """
+        Compact the packs holding garbage, oldest first: their live
+        records are copied to the current pack, and they are removed.
+        Reads and writes may go on meanwhile.
+
+        Parameters
+        ----------
+        min_garbage : float, optional
+            Fraction of garbage from which a pack is compacted, by default
+            0.0 (any pack holding garbage).
+
+        Returns
+        -------
+        dict
+            The number of 'packs' removed, of records 'moved' and of bytes
+            'reclaimed'.
+        """
+        report = {'packs': 0, 'moved': 0, 'reclaimed': 0}
+        with self._lock.write_lock():
+            current = self._sizes.get(self._current)
+            if current is not None and current[1] < current[0]:
+                # The current pack holds garbage: compact it too
+                self._new_pack()
+            candidates = [
+                number for number, (size, live) in sorted(self._sizes.items())
+                if number != self._current and size - live > 0
+                and size - live >= min_garbage * size
+            ]
+        for number in candidates:
+            size, live = self._sizes[number]
+            report['moved'] += self._compact_pack(number)
+            with self._lock.write_lock():
+                del self._sizes[number]
+                self._files.pop(number).close()
+                os.remove(self._path(number))
+            report['packs'] += 1
+            report['reclaimed'] += size - live
+        return report
+
+    def _compact_pack(self, number: int) -> int:
+        """
+        Copy the live records of a pack to the current pack, with the
+        deletions still hiding records of older packs.
+        """
+        moved = 0
+        fd = self._files[number].fileno()
+        for flags, name, offset, _, data_offset, data_size in list(
+                self._records(number, fd)):
+            if flags & _DELETED:
+                with self._lock.write_lock():
+                    older = any(other < number for other in self._files)
+                    if older and name not in self._index:
+                        self._append(name, [], flags=_DELETED)
+                continue
+            data = _pread(fd, data_size, data_offset)
+            with self._lock.write_lock():
+                entry = self._index.get(name)
+                # Skipped if overwritten or deleted meanwhile
+                if entry is not None and entry[:2] == (number, offset):
+                    self._append(name, [data])
+                    moved += 1
+        return moved
+
+    def close(self,):
+        """
+        Wait for a background compaction, close the packs and unlock their
+        folder.
+        """
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock.write_lock():
+            for file_ in self._files.values():
+                file_.close()
+            self._files.clear()
+            self._sizes.clear()
+            self._index.clear()
+            self._current = None
+            if self._lock_file is not None:
+                # Closing the file releases its lock
+                self._lock_file.close()
+                self._lock_file = None
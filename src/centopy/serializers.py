@@ -0,0 +1,242 @@
+"""
+    Package "centopy"
+
+    This module provides the codecs serializing the objects saved by files
+    managers and archives
+"""
+import io
+import json
+import pickle
+import struct
+import marshal
+import threading
+
+# Out-of-band buffers are aligned on this many bytes, e.g. for SIMD loads
+ALIGNMENT = 64
+
+# Start of the files holding a pickle and its out-of-band buffers
+PICKLE_MAGIC = b'CNTPK5\x00\x00'
+_PICKLE_HEADER = struct.Struct('<QQ')
+_LENGTH = struct.Struct('<Q')
+
+_codecs = {}
+_codecs_lock = threading.Lock()
+
+
+class Codec:
+    """
+    Serialize objects to buffers and back.
+
+    Subclasses implement `encode` and `decode`, and are registered by
+    name with `register_codec`.
+
+    Methods
+    -------
+    encode(obj) -> list:
+        Returns the buffers serializing an object, to be written in order.
+    decode(data: memoryview) -> object:
+        Returns the object serialized in `data`.
+    """
+    def encode(self, obj) -> list:
+        raise NotImplementedError
+
+    def decode(self, data: memoryview):
+        """
+        Deserialize an object.
+
+        `data` may be a view of a memory-mapped file. Objects decoded may
+        keep references to it instead of copying it, which keeps the file
+        mapped as long as they live.
+        """
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    """
+    Serialize objects as UTF-8 JSON.
+
+    Parameters
+    ----------
+    **kwargs
+        Additional keyword arguments for `json.dumps`, e.g. `indent`.
+    """
+    def __init__(self, **kwargs):
+        self.options = kwargs
+
+    def encode(self, obj) -> list:
+        return [json.dumps(obj, **self.options).encode('utf-8')]
+
+    def decode(self, data: memoryview):
+        return json.loads(bytes(data))
+
+
+class MarshalCodec(Codec):
+    """
+    Serialize objects of the built-in types with `marshal`.
+    """
+    def encode(self, obj) -> list:
+        return [marshal.dumps(obj)]
+
+    def decode(self, data: memoryview):
+        return marshal.loads(data)
+
+
+class PickleCodec(Codec):
+    """
+    Serialize objects with pickle protocol 5 and out-of-band buffers.
+
+    Buffers exposed through `pickle.PickleBuffer`, such as those of
+    bytearrays or NumPy arrays, are not copied into the pickle: they are
+    returned as separate buffers, written with vectored I/O after a small
+    index, each aligned on `ALIGNMENT` bytes. Decoding hands the objects
+    views of those buffers, so a memory-mapped file is unpickled without
+    copying them.
+
+    Files not starting with `PICKLE_MAGIC` are read as plain pickles.
+
+    Parameters
+    ----------
+    protocol : int, optional
+        The pickle protocol, by default 5. Buffers are only written out of
+        band from protocol 5.
+    """
+    def __init__(self, protocol: int = 5):
+        self.protocol = protocol
+
+    def encode(self, obj) -> list:
+        if self.protocol < 5:
+            return [pickle.dumps(obj, protocol=self.protocol)]
+        buffers = []
+
+        def out_of_band(buffer: pickle.PickleBuffer) -> bool:
+            try:
+                buffers.append(buffer.raw())
+            except BufferError:
+                return True  # Not contiguous, pickled in band
+            return False
+
+        data = pickle.dumps(
+            obj, protocol=self.protocol, buffer_callback=out_of_band
+        )
+        header = [
+            PICKLE_MAGIC,
+            _PICKLE_HEADER.pack(len(data), len(buffers)),
+            *(_LENGTH.pack(buffer.nbytes) for buffer in buffers),
+        ]
+        offset = sum(map(len, header))
+        chunks = [*header, data]
+        offset += len(data)
+        for buffer in buffers:
+            padding = -offset % ALIGNMENT
+            if padding:
+                chunks.append(bytes(padding))
+            chunks.append(buffer)
+            offset += padding + buffer.nbytes
+        return chunks
+
+    def decode(self, data: memoryview):
+        if data[:len(PICKLE_MAGIC)] != PICKLE_MAGIC:
+            return pickle.loads(data)
+        offset = len(PICKLE_MAGIC)
+        length, count = _PICKLE_HEADER.unpack_from(data, offset)
+        offset += _PICKLE_HEADER.size
+        lengths = [
+            _LENGTH.unpack_from(data, offset + index * _LENGTH.size)[0]
+            for index in range(count)
+        ]
+        offset += count * _LENGTH.size
+        pickled = data[offset:offset + length]
+        offset += length
+        buffers = []
+        for size in lengths:
+            offset += -offset % ALIGNMENT
+            buffers.append(data[offset:offset + size])
+            offset += size
+        return pickle.loads(pickled, buffers=buffers)
+
+
+def register_codec(name: str, codec: Codec, replace: bool = False):
+    """
+    Register a codec, usable by name in `save_obj` and `load_obj`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the codec.
+    codec : Codec
+        The codec, or any object with `encode` and `decode` methods.
+    replace : bool, optional
+        If True, replace a codec already registered under `name`, by
+        default False.
+
+    Raises
+    ------
+    ValueError
+        If a codec is already registered under `name` and `replace` is
+        False.
+    """
+    with _codecs_lock:
+        if name in _codecs and not replace:
+            raise ValueError(f"Codec already registered: {name}")
+        _codecs[name] = codec
+
+
+def get_codec(codec: str | Codec) -> Codec:
+    """
+    Get a registered codec by name. Codec instances are returned as is.
+
+    Raises
+    ------
+    ValueError
+        If no codec is registered under the name.
+    """
+    if not isinstance(codec, str):
+        return codec
+    try:
+        return _codecs[codec]
+    except KeyError:
+        raise ValueError(
+            f"Unknown codec: {codec}. Available: {', '.join(sorted(_codecs))}"
+        ) from None
+
+
+def codecs() -> list[str]:
+    """
+    Get the names of the registered codecs.
+    """
+    return sorted(_codecs)
+
+
+class BuffersReader(io.RawIOBase):
+    """
+    A binary stream reading a sequence of buffers as one, without joining
+    them.
+    """
+    def __init__(self, buffers):
+        super().__init__()
+        self._views = [memoryview(buffer).cast('B') for buffer in buffers]
+        self._index = 0
+        self._offset = 0
+
+    def readable(self,) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        target = memoryview(target).cast('B')
+        filled = 0
+        while filled < target.nbytes and self._index < len(self._views):
+            view = self._views[self._index]
+            count = min(target.nbytes - filled, view.nbytes - self._offset)
+            target[filled:filled + count] = \
+                view[self._offset:self._offset + count]
+            filled += count
+            self._offset += count
+            if self._offset == view.nbytes:
+                self._index += 1
+                self._offset = 0
+        return filled
+
+
+register_codec('json', JSONCodec())
+register_codec('pickle', PickleCodec())
+register_codec('marshal', MarshalCodec())
@@ -0,0 +1,464 @@
+"""
+    Package "centopy"
+
+    This module provides a local daemon serving a folder's files and
+    archives over a Unix domain socket, and its client.
+
+    The protocol is made of JSON lines. A request reads
+
+        {"id": 1, "target": "files", "method": "read", "args": ["a.txt"]}
+
+    with an optional "kwargs" object, and an "archive" name when the target
+    is "archive". Each request is answered, in any order, with
+
+        {"id": 1, "ok": true, "result": "..."}
+
+    or {"id": 1, "ok": false, "error": {"type": "...", "message": "..."}}.
+    Bytes are sent as {"__bytes__": "<base64>"} objects.
+"""
+import os
+import json
+import base64
+import socket
+import itertools
+import threading
+import socketserver
+
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .core import FilesManager, Archives, Compressor
+
+# Name of the socket created in the served folder, by default
+SOCKET_NAME = '.centopy.sock'
+
+# Methods callable on each target. Archive methods marked True create the
+# archive if it does not exist.
+FILES_METHODS = frozenset({
+    'write', 'writeb', 'append', 'appendb', 'read', 'readb', 'delete_file',
+    'list_files', 'get_file_state', 'stats',
+})
+ARCHIVE_METHODS = {
+    'namelist': False,
+    'read': False,
+    'readb': False,
+    'extract': False,
+    'extract_many': False,
+    'stats': False,
+    'add': True,
+    'add_many': True,
+    'write': True,
+    'writeb': True,
+    'append': False,
+    'appendb': False,
+    'update': True,
+    'remove': False,
+    'remove_many': False,
+}
+ARCHIVES_METHODS = frozenset({
+    'find', 'find_prefix', 'find_glob', 'index', 'stats', 'pool_stats',
+})
+SERVER_METHODS = frozenset({'ping', 'shutdown'})
+
+
+def default_socket(folder_path) -> Path:
+    """
+    Get the path of the socket of the daemon serving a folder.
+    """
+    return Path(folder_path) / SOCKET_NAME
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+
+def _decode(value: dict):
+    if value.keys() == {'__bytes__'}:
+        return base64.b64decode(value['__bytes__'])
+    return value
+
+
+def dumps(message: dict) -> bytes:
+    """
+    Encode a message as a JSON line.
+    """
+    return json.dumps(message, default=_encode).encode('utf-8') + b'\n'
+
+
+def loads(line: bytes) -> dict:
+    """
+    Decode a message from a JSON line.
+    """
+    return json.loads(line, object_hook=_decode)
+
+
+class RemoteError(Exception):
+    """
+    Raised by the client when a request failed on the server.
+
+    Attributes
+    ----------
+    type : str
+        The name of the exception raised on the server.
+    """
+    def __init__(self, type_: str, message: str):
+        super().__init__(f"{type_}: {message}")
+        self.type = type_
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    A daemon serving the files and the archives of a folder over a Unix
+    domain socket.
+
+    The files manager and the archives live as long as the daemon, so
+    their caches, open handles and state are shared by every request.
+    Requests of a connection run concurrently on a thread pool and are
+    answered as soon as they are done, so clients may multiplex them.
+
+    Parameters
+    ----------
+    folder_path : str
+        The folder to serve.
+    socket_path : str or Path, optional
+        The path of the socket, by default `SOCKET_NAME` in the folder.
+    workers : int, optional
+        Maximum number of requests run at once, by default the
+        ThreadPoolExecutor default.
+    max_open : int, optional
+        Maximum number of archives kept open, by default None (unbounded).
+    **kwargs
+        Additional keyword arguments for the FilesManager and the archive
+        handlers, e.g. `locking=True`.
+
+    Raises
+    ------
+    RuntimeError
+        If another daemon already listens on the socket.
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 folder_path: str,
+                 socket_path=None,
+                 workers: int = None,
+                 max_open: int = None,
+                 **kwargs):
+        self.manager = FilesManager(folder_path, **kwargs)
+        self.archives = Archives(
+            extension='zip', max_open=max_open, handler_options=kwargs
+        )
+        self.socket_path = Path(
+            socket_path or default_socket(self.manager.folder_path)
+        )
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._archives_lock = threading.Lock()
+        self._claim_socket()
+        super().__init__(os.fspath(self.socket_path), _Handler)
+        os.chmod(self.socket_path, 0o600)
+
+    def _claim_socket(self,):
+        """
+        Remove the socket left by a daemon that is gone, refusing to take
+        over a live one.
+        """
+        if not self.socket_path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(os.fspath(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+        else:
+            raise RuntimeError(
+                f"A daemon already listens on {self.socket_path}"
+            )
+        finally:
+            probe.close()
+
+    def _archive(self, name: str, create: bool) -> Compressor:
+        with self._archives_lock:
+            if name not in self.archives:
+                wdir = self.manager.folder_path
+                if create:
+                    # Registers the archive, creating it only if missing
+                    self.archives.new(
+                        name, wdir=wdir, confirm_func=lambda _, __: False
+                    )
+                if name not in self.archives:
+                    try:
+                        self.archives.load(name, wdir=wdir)
+                    except FileNotFoundError:
+                        raise FileNotFoundError(
+                            f"Archive not found: {name}"
+                        ) from None
+            return self.archives[name]
+
+    def dispatch(self, request: dict):
+        """
+        Run a request.
+
+        Returns
+        -------
+        object
+            The result of the method called.
+
+        Raises
+        ------
+        ValueError
+            If the request's target or method is unknown.
+        """
+        target = request.get('target')
+        method = request.get('method')
+        args = request.get('args', [])
+        kwargs = request.get('kwargs', {})
+        if target == 'files' and method in FILES_METHODS:
+            obj = self.manager
+        elif target == 'archive' and method in ARCHIVE_METHODS:
+            obj = self._archive(request['archive'], ARCHIVE_METHODS[method])
+        elif target == 'archives' and method in ARCHIVES_METHODS:
+            obj = self.archives
+        elif target == 'server' and method in SERVER_METHODS:
+            if method == 'shutdown':
+                threading.Thread(target=self.shutdown, daemon=True).start()
+            return 'pong' if method == 'ping' else None
+        else:
+            raise ValueError(f"Unknown method: {target}.{method}")
+        return getattr(obj, method)(*args, **kwargs)
+
+    def server_close(self,):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        self.archives.close_all()
+        self.socket_path.unlink(missing_ok=True)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    Read the requests of a connection, and answer each once done.
+    """
+    def handle(self,):
+        write_lock = threading.Lock()
+
+        def answer(request_id, response: dict):
+            response['id'] = request_id
+            try:
+                data = dumps(response)
+            except TypeError as err:
+                data = dumps(_failure(request_id, err))
+            with write_lock:
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                except OSError:
+                    pass  # The client is gone
+
+        def run(request_id, request: dict):
+            try:
+                response = {
+                    'ok': True, 'result': self.server.dispatch(request)
+                }
+            except Exception as err:
+                response = _failure(request_id, err)
+            answer(request_id, response)
+
+        pending = []
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = loads(line)
+            except ValueError as err:
+                answer(None, _failure(None, err))
+                continue
+            pending = [future for future in pending if not future.done()]
+            pending.append(
+                self.server.executor.submit(run, request.get('id'), request)
+            )
+        # Answer every request before the connection is closed
+        for future in pending:
+            future.result()
+
+
+def _failure(request_id, err: Exception) -> dict:
+    return {
+        'id': request_id,
+        'ok': False,
+        'error': {'type': type(err).__name__, 'message': str(err)},
+    }
+
+
+class _Remote:
+    """
+    Forward method calls to a target of the daemon.
+    """
+    def __init__(self, client: 'Client', target: str, archive: str = None):
+        self._client = client
+        self._target = target
+        self._archive = archive
+
+    def __getattr__(self, method: str):
+        def call(*args, **kwargs):
+            return self._client.call(
+                self._target, method, *args, archive=self._archive, **kwargs
+            )
+        call.__name__ = method
+        return call
+
+
+class Client:
+    """
+    A client of the daemon, multiplexing requests over one connection.
+
+    Requests may be sent from several threads at once: each is tagged
+    with an id, and its answer is routed back to it whatever the order the
+    daemon answers in.
+
+    Parameters
+    ----------
+    socket_path : str or Path
+        The path of the daemon's socket.
+    timeout : float, optional
+        Seconds to wait for an answer before raising TimeoutError, by
+        default None (wait forever).
+
+    Attributes
+    ----------
+    files : object
+        Calls the methods of the daemon's FilesManager, e.g.
+        `client.files.read('a.txt')`.
+    archives : object
+        Calls the methods of the daemon's Archives, e.g.
+        `client.archives.find('a.txt')`.
+
+    Examples
+    --------
+    >>> with Client(default_socket('data')) as client:
+    ...     client.files.write('a.txt', 'Hello')
+    ...     client.archive('backup').write('a.txt', 'Hello')
+    """
+    def __init__(self, socket_path, timeout: float = None):
+        self.timeout = timeout
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(os.fspath(socket_path))
+        self._reader = self._socket.makefile('rb')
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.files = _Remote(self, 'files')
+        self.archives = _Remote(self, 'archives')
+        self._receiver = threading.Thread(target=self._receive, daemon=True)
+        self._receiver.start()
+
+    def _receive(self,):
+        try:
+            for line in self._reader:
+                response = loads(line)
+                with self._lock:
+                    future = self._pending.pop(response.get('id'), None)
+                if future is None:
+                    continue
+                if response['ok']:
+                    future.set_result(response.get('result'))
+                else:
+                    error = response['error']
+                    future.set_exception(
+                        RemoteError(error['type'], error['message'])
+                    )
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(
+                ConnectionError("Connection to the daemon lost")
+            )
+
+    def submit(self,
+               target: str,
+               method: str,
+               *args,
+               archive: str = None,
+               **kwargs) -> Future:
+        """
+        Send a request without waiting for its answer.
+
+        Parameters
+        ----------
+        target : str
+            'files', 'archive', 'archives' or 'server'.
+        method : str
+            The name of the method to call.
+        *args, **kwargs
+            The arguments of the method.
+        archive : str, optional
+            The name of the archive, for the 'archive' target.
+
+        Returns
+        -------
+        Future
+            Resolved with the result of the method, or failing with
+            `RemoteError`.
+        """
+        request = {'target': target, 'method': method, 'args': args}
+        if kwargs:
+            request['kwargs'] = kwargs
+        if archive is not None:
+            request['archive'] = archive
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("Connection to the daemon lost")
+            request['id'] = next(self._ids)
+            self._pending[request['id']] = future
+            self._socket.sendall(dumps(request))
+        return future
+
+    def call(self, target: str, method: str, *args, archive=None, **kwargs):
+        """
+        Send a request and wait for its result.
+
+        Raises
+        ------
+        RemoteError
+            If the request failed on the server.
+        """
+        future = self.submit(target, method, *args, archive=archive, **kwargs)
+        return future.result(self.timeout)
+
+    def archive(self, name: str) -> _Remote:
+        """
+        Get an object calling the methods of an archive of the daemon, e.g.
+        `client.archive('backup').namelist()`.
+        """
+        return _Remote(self, 'archive', name)
+
+    def ping(self,) -> str:
+        return self.call('server', 'ping')
+
+    def shutdown(self,):
+        """
+        Stop the daemon.
+        """
+        self.call('server', 'shutdown')
+
+    def close(self,):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._receiver.join()
+        self._reader.close()
+
+    def __enter__(self,):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
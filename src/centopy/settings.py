@@ -1,30 +1,21 @@
 """
     This module provides the default settings of the
     package test
-"""
-
-from importlib import metadata
-
-
-package = metadata.metadata('centopy')
 
-name = package['name']
-version = package['version']
-author = package['author']
-author_email = package['author-email']
-summary = package['summary']
-
-TITLE = name
-DELIMITER = len(TITLE)*"="
-HEADER = f"""
-{DELIMITER}
-{TITLE}
-Version: {version}
-Description: {summary }
-Authors: {author}
-{DELIMITER}
+    The package metadata (`package`, `name`, `version`, `author`,
+    `author_email`, `summary`, `TITLE`, `DELIMITER` and `HEADER`) is only
+    read on first access.
 """
 
+# Metadata attributes mapped to their field in the package metadata
+_METADATA_FIELDS = {
+    'name': 'name',
+    'version': 'version',
+    'author': 'author',
+    'author_email': 'author-email',
+    'summary': 'summary',
+}
+
 CONFIG_LOG = {
     "version": 1,
     "formatters": {
@@ -85,3 +76,47 @@ CONFIG_LOG = {
         }
     },
 }
+
+
+def configure_logging(config: dict = None):
+    """
+    Configure the package's loggers and handlers.
+
+    Importing the package leaves logging untouched: applications call this
+    once at startup.
+
+    Parameters
+    ----------
+    config : dict, optional
+        A `logging.config.dictConfig` configuration, by default
+        `CONFIG_LOG`.
+    """
+    from logging.config import dictConfig
+    dictConfig(CONFIG_LOG if config is None else config)
+
+
+def __getattr__(attribute: str):
+    if attribute == 'package':
+        from importlib import metadata
+        value = metadata.metadata('centopy')
+    elif attribute in _METADATA_FIELDS:
+        value = __getattr__('package')[_METADATA_FIELDS[attribute]]
+    elif attribute == 'TITLE':
+        value = __getattr__('name')
+    elif attribute == 'DELIMITER':
+        value = len(__getattr__('TITLE'))*"="
+    elif attribute == 'HEADER':
+        value = f"""
+{__getattr__('DELIMITER')}
+{__getattr__('TITLE')}
+Version: {__getattr__('version')}
+Description: {__getattr__('summary')}
+Authors: {__getattr__('author')}
+{__getattr__('DELIMITER')}
+"""
+    else:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {attribute!r}"
+        )
+    globals()[attribute] = value
+    return value
@@ -0,0 +1,210 @@
+"""
+    Package "centopy"
+
+    This module provides the hooks used to trace file and archive
+    operations
+"""
+import time
+import logging
+
+from contextlib import contextmanager
+
+logger = logging.getLogger('standard')
+
+# Hooks called for the events of every instance. Replaced, never mutated,
+# so emitting needs no lock.
+_hooks = ()
+
+
+class Event:
+    """
+    An event of a traced operation.
+
+    Every operation emits a 'start' event, then an 'end' event once done.
+
+    Attributes
+    ----------
+    phase : str
+        'start' or 'end'.
+    operation : str
+        The name of the operation, e.g. 'read', 'write' or 'rewrite'.
+    target : str or None
+        The file or member operated on, if any.
+    nbytes : int or None
+        The number of bytes read or written, when known.
+    duration : float or None
+        Seconds the operation took, in 'end' events.
+    error : BaseException or None
+        The exception the operation raised, in 'end' events.
+    source : object
+        The files manager or archive running the operation.
+    """
+    __slots__ = (
+        'phase', 'operation', 'target', 'nbytes', 'duration', 'error',
+        'source'
+    )
+
+    def __init__(self, phase, operation, target, nbytes, duration, error,
+                 source):
+        self.phase = phase
+        self.operation = operation
+        self.target = target
+        self.nbytes = nbytes
+        self.duration = duration
+        self.error = error
+        self.source = source
+
+    def __repr__(self,):
+        return (
+            f"<Event {self.phase} {self.operation} target={self.target!r} "
+            f"nbytes={self.nbytes} duration={self.duration}>"
+        )
+
+
+def _emit(hooks, event: Event):
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("Tracing hook %r failed", hook)
+
+
+class Span:
+    """
+    The tracing of one operation, emitting its 'start' event on entering
+    and its 'end' event on exiting a `with` block.
+
+    Set `nbytes` within the block once the number of bytes is known.
+    """
+    __slots__ = ('hooks', 'source', 'operation', 'target', 'nbytes', 'start')
+
+    def __init__(self, hooks, source, operation, target, nbytes):
+        self.hooks = hooks
+        self.source = source
+        self.operation = operation
+        self.target = target
+        self.nbytes = nbytes
+        self.start = None
+
+    def __enter__(self,):
+        self.start = time.perf_counter()
+        _emit(self.hooks, Event(
+            'start', self.operation, self.target, self.nbytes, None, None,
+            self.source
+        ))
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _emit(self.hooks, Event(
+            'end', self.operation, self.target, self.nbytes,
+            time.perf_counter() - self.start, exc, self.source
+        ))
+
+
+class _NullSpan:
+    """
+    The span of an operation nobody traces.
+    """
+    __slots__ = ()
+
+    def __enter__(self,):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(source, operation: str, target=None, nbytes: int = None):
+    """
+    Trace an operation of a files manager or an archive.
+
+    Parameters
+    ----------
+    source : object
+        The instance running the operation. Its `hooks`, if any, are
+        called along with the global hooks.
+    operation : str
+        The name of the operation.
+    target : str, optional
+        The file or member operated on, by default None.
+    nbytes : int, optional
+        The number of bytes read or written, if already known, by default
+        None.
+
+    Returns
+    -------
+    Span
+        A context manager emitting the operation's events, or a no-op one
+        when no hook is registered.
+    """
+    hooks = _hooks
+    own = getattr(source, 'hooks', None)
+    if own:
+        hooks = hooks + tuple(own)
+    if not hooks:
+        return _NULL_SPAN
+    return Span(hooks, source, operation, target, nbytes)
+
+
+def add_hook(hook, instance=None):
+    """
+    Register a hook, called with every `Event`.
+
+    Parameters
+    ----------
+    hook : callable
+        Called as `hook(event)`. Exceptions it raises are logged and
+        otherwise ignored.
+    instance : object, optional
+        A files manager or archive whose events only are passed to `hook`,
+        by default None (events of every instance).
+    """
+    global _hooks
+    if instance is not None:
+        instance.hooks.append(hook)
+    else:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook, instance=None):
+    """
+    Unregister a hook registered with `add_hook`.
+
+    Raises
+    ------
+    ValueError
+        If `hook` is not registered.
+    """
+    global _hooks
+    if instance is not None:
+        instance.hooks.remove(hook)
+        return
+    hooks = list(_hooks)
+    hooks.remove(hook)
+    _hooks = tuple(hooks)
+
+
+@contextmanager
+def hooked(hook, instance=None):
+    """
+    Register a hook for the duration of a `with` block.
+
+    Parameters
+    ----------
+    hook : callable
+        Called as `hook(event)`.
+    instance : object, optional
+        A files manager or archive whose events only are passed to `hook`,
+        by default None (events of every instance).
+    """
+    add_hook(hook, instance)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook, instance)
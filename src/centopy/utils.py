@@ -3,11 +3,57 @@
 
     This module provides helpful objects
 """
+import os
 import re
+import stat
+import zlib
+import errno
+import logging
+import functools
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX
+    fcntl = None
 
-def clean_string(text: str, pattern: str=None) -> str:
+logger = logging.getLogger('standard')
+
+# Maximum number of buffers passed to a single `os.writev` call
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
+# `ioctl` request cloning a whole file on Linux (btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+# Largest count passed at once to `os.copy_file_range` and `os.sendfile`
+KERNEL_COPY_SIZE = 1 << 30
+# Errors of a kernel copy meaning it cannot copy these files, not that
+# copying failed
+_UNSUPPORTED = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EBADF,
+    errno.EOPNOTSUPP, errno.ENOTSUP, errno.EPERM, errno.ETXTBSY,
+    errno.ESPIPE, errno.ENOTSOCK,
+}
+
+
+# Pattern of the characters `clean_string` replaces, by default
+CLEAN_PATTERN = r"[^a-zA-Z0-9\.\s]+"
+
+
+@functools.lru_cache(maxsize=128)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Compiles a regular expression once, and returns the same compiled
+    pattern on later calls.
     """
+    return re.compile(pattern)
+
+
+def clean_string(text: str, pattern: str=None) -> str:
+    r"""
     Cleans up a string by replacing any non-alphanumeric characters
     (except spaces and dot) with underscores.
 
@@ -32,7 +78,9 @@ def clean_string(text: str, pattern: str=None) -> str:
     alphanumeric (excluding spaces) with underscores,
     effectively cleaning up the input string. If a `pattern` argument is provided,
     it will be used instead of the default
-    pattern r"[^a-zA-Z0-9\s]+".
+    pattern r"[^a-zA-Z0-9\s]+". Patterns are compiled once and cached.
+    Strings left empty or made of dots only, such as '..', have them
+    replaced by underscores, so they cannot name a folder or its parent.
 
     Examples
     --------
@@ -44,5 +92,253 @@ def clean_string(text: str, pattern: str=None) -> str:
     """
 
     if pattern is None:
-        pattern = r"[^a-zA-Z0-9\.\s]+"
-    return re.sub(pattern, "_", text.replace(" ", "_"))
+        pattern = CLEAN_PATTERN
+    return _clean(compile_pattern(pattern), text)
+
+
+def _clean(regex: re.Pattern, text: str) -> str:
+    cleaned = regex.sub("_", text.replace(" ", "_"))
+    if not cleaned.strip('.'):
+        # Empty, or naming the folder itself or its parent
+        cleaned = cleaned.replace('.', '_') or '_'
+    return cleaned
+
+
+def clean_names(names, taken=(), pattern: str = None):
+    """
+    Cleans up file names lazily with `clean_string`, renaming the names
+    that collide.
+
+    A cleaned name colliding with a name of `taken`, or with a name
+    yielded before, gets the first free suffix `_1`, `_2`... before its
+    extension: 'a.txt' becomes 'a_1.txt'. The result only depends on the
+    order of `names` and on `taken`, so it is the same on every run.
+
+    Parameters
+    ----------
+    names : Iterable[str]
+        The names to clean up, consumed one at a time.
+    taken : Container[str], optional
+        The names already in use, e.g. the files of a folder, by default
+        ().
+    pattern : str, optional
+        The pattern of `clean_string`, by default `CLEAN_PATTERN`.
+
+    Yields
+    ------
+    tuple
+        Each name, and its cleaned up, unique, version.
+
+    Examples
+    --------
+    >>> list(clean_names(['a b.txt', 'a?b.txt'], taken={'x'}))
+    [('a b.txt', 'a_b.txt'), ('a?b.txt', 'a_b_1.txt')]
+    """
+    regex = compile_pattern(CLEAN_PATTERN if pattern is None else pattern)
+    yielded = set()
+    # Next suffix to try for each cleaned name, so names colliding many
+    # times are not probed from 1 again
+    suffixes = {}
+    for name in names:
+        cleaned = _clean(regex, name)
+        unique = cleaned
+        if unique in taken or unique in yielded:
+            stem, dot, extension = cleaned.rpartition('.')
+            if not stem:
+                stem, dot, extension = cleaned, '', ''
+            suffix = suffixes.get(cleaned, 1)
+            while True:
+                unique = f'{stem}_{suffix}{dot}{extension}'
+                suffix += 1
+                if unique not in taken and unique not in yielded:
+                    break
+            suffixes[cleaned] = suffix
+        yielded.add(unique)
+        yield name, unique
+
+
+def file_crc32(path, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Computes the CRC-32 of a file, as stored in zip archives, reading it in
+    chunks.
+
+    Parameters
+    ----------
+    path : str or Path
+        The path of the file.
+    chunk_size : int, optional
+        The number of bytes read at once, by default 1 MiB.
+
+    Returns
+    -------
+    int
+        The unsigned CRC-32 of the file contents.
+    """
+    crc = 0
+    with open(path, 'rb') as file_:
+        while chunk := file_.read(chunk_size):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def copy_stream(source, target, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Copies a binary stream to another in chunks, holding at most one chunk
+    in memory.
+
+    Parameters
+    ----------
+    source : file-like
+        The stream to read from, until its end.
+    target : file-like
+        The stream to write to.
+    chunk_size : int, optional
+        The number of bytes read at once, by default 1 MiB.
+
+    Returns
+    -------
+    int
+        The number of bytes copied.
+    """
+    copied = 0
+    while chunk := source.read(chunk_size):
+        target.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+def write_buffers(fd: int, buffers) -> int:
+    """
+    Writes buffers to a file descriptor with vectored I/O, without joining
+    them first.
+
+    Buffers are passed to `os.writev` at most `SC_IOV_MAX` at a time, and
+    short writes are resumed where they stopped. Where `os.writev` is not
+    available, buffers are written one by one.
+
+    Parameters
+    ----------
+    fd : int
+        The file descriptor to write to.
+    buffers : Iterable[bytes-like]
+        The buffers to write, in order.
+
+    Returns
+    -------
+    int
+        The number of bytes written.
+    """
+    views = [
+        view for view in (memoryview(buffer).cast('B') for buffer in buffers)
+        if view.nbytes
+    ]
+    written = 0
+    if not hasattr(os, 'writev'):
+        for view in views:
+            while view.nbytes:
+                count = os.write(fd, view)
+                written += count
+                view = view[count:]
+        return written
+    start = 0
+    while start < len(views):
+        count = os.writev(fd, views[start:start + IOV_MAX])
+        written += count
+        # Skip the buffers written, and the written part of the next one
+        while start < len(views) and count >= views[start].nbytes:
+            count -= views[start].nbytes
+            start += 1
+        if count:
+            views[start] = views[start][count:]
+    return written
+
+
+def _kernel_copy(copy, source_fd: int, target_fd: int) -> int | None:
+    """
+    Copy the rest of a file with a kernel copy call, until it copies
+    nothing.
+
+    Returns
+    -------
+    int or None
+        The number of bytes copied, or None if the call cannot copy these
+        files and nothing was copied.
+    """
+    copied = 0
+    while True:
+        try:
+            count = copy(source_fd, target_fd, KERNEL_COPY_SIZE)
+        except OSError as err:
+            if copied or err.errno not in _UNSUPPORTED:
+                raise
+            return None
+        if not count:
+            return copied
+        copied += count
+
+
+def copy_fd(source_fd: int,
+            target_fd: int,
+            reflink: bool = True,
+            chunk_size: int = 1024 * 1024) -> tuple[int, str]:
+    """
+    Copies a file to another through the kernel, from the current offset
+    of `source_fd` to the current offset of `target_fd`.
+
+    The fastest method the platform and file systems support is used:
+    a reflink, sharing the data blocks until either file is modified
+    (whole files only), `os.copy_file_range`, copying within the kernel
+    or the file system, `os.sendfile`, and a plain loop of `os.readv` and
+    `os.write` into a single buffer otherwise.
+
+    Parameters
+    ----------
+    source_fd : int
+        The file descriptor to read from, until its end.
+    target_fd : int
+        The file descriptor to write to.
+    reflink : bool, optional
+        If True, try a reflink first, by default True. Only used if both
+        descriptors are at offset 0 and the target is empty.
+    chunk_size : int, optional
+        The size of the buffer of the plain loop, by default 1 MiB.
+
+    Returns
+    -------
+    tuple
+        The number of bytes copied, and the method used: 'reflink',
+        'copy_file_range', 'sendfile' or 'read'.
+    """
+    if reflink and fcntl is not None \
+            and stat.S_ISREG(os.fstat(source_fd).st_mode) \
+            and os.lseek(source_fd, 0, os.SEEK_CUR) == 0 \
+            and os.fstat(target_fd).st_size == 0:
+        try:
+            fcntl.ioctl(target_fd, FICLONE, source_fd)
+        except OSError as err:
+            logger.debug("Reflink unavailable: %s", err)
+        else:
+            size = os.fstat(source_fd).st_size
+            os.lseek(source_fd, size, os.SEEK_SET)
+            os.lseek(target_fd, size, os.SEEK_SET)
+            return size, 'reflink'
+    if hasattr(os, 'copy_file_range'):
+        copied = _kernel_copy(os.copy_file_range, source_fd, target_fd)
+        if copied is not None:
+            return copied, 'copy_file_range'
+    if hasattr(os, 'sendfile'):
+        def sendfile(source_fd, target_fd, count):
+            offset = os.lseek(source_fd, 0, os.SEEK_CUR)
+            sent = os.sendfile(target_fd, source_fd, offset, count)
+            os.lseek(source_fd, offset + sent, os.SEEK_SET)
+            return sent
+
+        copied = _kernel_copy(sendfile, source_fd, target_fd)
+        if copied is not None:
+            return copied, 'sendfile'
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    copied = 0
+    while count := os.readv(source_fd, [buffer]):
+        copied += write_buffers(target_fd, [view[:count]])
+    return copied, 'read'
@@ -0,0 +1,244 @@
+"""
+    Package "centopy"
+
+    This module provides a recursive, optionally parallel, walk of
+    directory trees built on `os.scandir`
+"""
+import os
+import fnmatch
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger('standard')
+
+
+class WalkEntry:
+    """
+    A file, or directory, found by `walk`.
+
+    The entry wraps the `os.DirEntry` of its directory scan, so its type
+    comes from the scan itself and its stat, once taken, is cached: no
+    file is stat-ed twice.
+
+    Attributes
+    ----------
+    name : str
+        The name of the file.
+    path : str
+        The path of the file relative to the root of the walk, with '/'
+        separators.
+    depth : int
+        The number of directories between the root and the file, 0 for
+        the files of the root itself.
+    """
+    __slots__ = ('name', 'path', 'depth', '_entry')
+
+    def __init__(self, entry: os.DirEntry, path: str, depth: int):
+        self.name = entry.name
+        self.path = path
+        self.depth = depth
+        self._entry = entry
+
+    @property
+    def full_path(self,) -> str:
+        """
+        The path of the file, including the root of the walk.
+        """
+        return self._entry.path
+
+    def __fspath__(self,) -> str:
+        return self._entry.path
+
+    def is_dir(self,) -> bool:
+        return self._entry.is_dir()
+
+    def is_file(self,) -> bool:
+        return self._entry.is_file()
+
+    def stat(self,) -> os.stat_result:
+        """
+        Get the stat of the file, following symlinks, taken on the first
+        call only.
+        """
+        return self._entry.stat()
+
+    def __repr__(self,):
+        return f"<WalkEntry {self.path!r}>"
+
+
+def _matches(patterns, name: str, path: str) -> bool:
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern)
+        for pattern in patterns
+    )
+
+
+def _as_patterns(patterns) -> tuple:
+    if patterns is None:
+        return ()
+    if isinstance(patterns, str):
+        return (patterns,)
+    return tuple(patterns)
+
+
+class _Walk:
+    """
+    The state of a walk: its options, and the directories already seen
+    through symlinks.
+    """
+    def __init__(self, include, exclude, max_depth, directories, stat,
+                 follow_symlinks):
+        self.include = _as_patterns(include)
+        self.exclude = _as_patterns(exclude)
+        self.max_depth = max_depth
+        self.directories = directories
+        self.stat = stat
+        self.follow_symlinks = follow_symlinks
+        self.seen = set()
+        self._seen_lock = threading.Lock()
+
+    def scan(self, path: str, prefix: str, depth: int) -> tuple:
+        """
+        Scan one directory.
+
+        Returns
+        -------
+        tuple
+            The entries to yield, and the (path, prefix, depth) of the
+            subdirectories to scan.
+        """
+        found = []
+        subdirectories = []
+        try:
+            entries = os.scandir(path)
+        except FileNotFoundError:
+            return found, subdirectories  # Deleted while walking
+        except OSError as err:
+            logger.warning("Cannot scan %s: %s", path, err)
+            return found, subdirectories
+        with entries:
+            for entry in entries:
+                relative = prefix + entry.name
+                if self.exclude and _matches(
+                        self.exclude, entry.name, relative):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                        if self.max_depth is None or depth < self.max_depth:
+                            if self._first_visit(entry):
+                                subdirectories.append(
+                                    (entry.path, relative + '/', depth + 1)
+                                )
+                        if not self.directories:
+                            continue
+                    elif not entry.is_file():
+                        continue
+                    if self.include and not _matches(
+                            self.include, entry.name, relative):
+                        continue
+                    if self.stat:
+                        entry.stat()  # Cached by the entry
+                except FileNotFoundError:
+                    continue  # Deleted while scanning
+                found.append(WalkEntry(entry, relative, depth))
+        return found, subdirectories
+
+    def _first_visit(self, entry: os.DirEntry) -> bool:
+        """
+        Tell whether a directory is walked for the first time, so cycles
+        of symlinks are walked once.
+        """
+        if not self.follow_symlinks:
+            return True
+        stat = entry.stat()
+        key = (stat.st_dev, stat.st_ino)
+        with self._seen_lock:
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+        return True
+
+
+def walk(root,
+         include=None,
+         exclude=None,
+         max_depth: int = None,
+         workers: int = None,
+         directories: bool = False,
+         stat: bool = False,
+         follow_symlinks: bool = False):
+    """
+    Walk a directory tree, yielding its files.
+
+    Each directory is read with a single `os.scandir`, whose entries
+    already tell files from directories, so walking takes no `stat`
+    unless asked for. With `workers`, directories are scanned by a thread
+    pool, many at once, which hides the latency of slow or network file
+    systems. Files are then yielded as their directory is scanned, in no
+    particular order.
+
+    Globs are matched with `fnmatch` against both the name of a file and
+    its path relative to `root`, e.g. '*.csv' or 'logs/2024-*'. Excluded
+    directories are not walked at all.
+
+    Parameters
+    ----------
+    root : str or Path
+        The directory to walk.
+    include : str or Iterable[str], optional
+        Globs of the files to yield, by default None (every file).
+    exclude : str or Iterable[str], optional
+        Globs of the files and directories to leave out, by default None.
+    max_depth : int, optional
+        Number of levels of subdirectories to walk, by default None (no
+        limit). 0 only yields the files of `root` itself.
+    workers : int, optional
+        Number of threads scanning directories at once, by default None
+        (the tree is walked depth-first in the calling thread).
+    directories : bool, optional
+        If True, also yield the directories matching `include`, by default
+        False.
+    stat : bool, optional
+        If True, stat every file yielded while scanning, in the scanning
+        threads, by default False. The stat is cached in the entries.
+    follow_symlinks : bool, optional
+        If True, walk symlinks to directories, each directory once, by
+        default False.
+
+    Yields
+    ------
+    WalkEntry
+        The entry of each file, or directory, found.
+    """
+    state = _Walk(
+        include, exclude, max_depth, directories, stat, follow_symlinks
+    )
+    root = os.fspath(root)
+    if follow_symlinks:
+        root_stat = os.stat(root)
+        state.seen.add((root_stat.st_dev, root_stat.st_ino))
+    if not workers or workers <= 1:
+        pending = [(root, '', 0)]
+        while pending:
+            found, subdirectories = state.scan(*pending.pop())
+            yield from found
+            # Walked in order, depth-first
+            pending.extend(reversed(subdirectories))
+        return
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='centopy-walk'
+    )
+    try:
+        running = {executor.submit(state.scan, root, '', 0)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirectories = future.result()
+                for subdirectory in subdirectories:
+                    running.add(executor.submit(state.scan, *subdirectory))
+                yield from found
+    finally:
+        # Also reached when the caller stops iterating early
+        executor.shutdown(wait=True, cancel_futures=True)
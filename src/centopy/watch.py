@@ -0,0 +1,343 @@
+"""
+    Package "centopy"
+
+    This module provides a polling watcher keeping an archive up to date
+    with the files of a folder
+"""
+import time
+import logging
+import threading
+
+from .core import FilesManager, Compressor, sync
+
+logger = logging.getLogger('standard')
+
+
+def snapshot(manager: FilesManager, exclude=()) -> dict:
+    """
+    Take a snapshot of the files of a folder, in a single scan of its
+    directories. Files held in the manager's packs are included, with the
+    signature of their record in the packs.
+
+    Parameters
+    ----------
+    manager : FilesManager
+        The manager of the folder.
+    exclude : Iterable[str], optional
+        Names of files to leave out, by default ().
+
+    Returns
+    -------
+    dict
+        File names mapped to their (inode, size, modification time in
+        nanoseconds) signature.
+    """
+    exclude = set(exclude)
+    files = {}
+    for entry in manager.iter_entries():
+        if entry.name in exclude:
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue  # Deleted while scanning
+        files[entry.name] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    packs = manager.packs
+    if packs is not None:
+        for name in packs:
+            if name in exclude:
+                continue
+            try:
+                files[name] = packs.signature(name)
+            except KeyError:
+                continue  # Deleted while scanning
+    return files
+
+
+def diff(old: dict, new: dict) -> tuple[list, list, list]:
+    """
+    Compare two snapshots taken by `snapshot`.
+
+    Returns
+    -------
+    tuple
+        The names of the files created, modified and deleted between the
+        snapshots.
+    """
+    created = [name for name in new if name not in old]
+    modified = [
+        name for name, signature in new.items()
+        if name in old and old[name] != signature
+    ]
+    deleted = [name for name in old if name not in new]
+    return created, modified, deleted
+
+
+class Watcher:
+    """
+    Keep an archive up to date with the files of a folder by polling it.
+
+    Each poll scans the folder once and compares the inode, size and
+    modification time of its files with the previous scan, so unchanged
+    files cost no read. Changes are debounced: a file is only archived
+    once it has not changed for `debounce` seconds, and every settled
+    change is applied in a single rewrite of the archive.
+
+    Polling is adaptive: the delay between polls starts at `interval`,
+    doubles after every poll finding no change, up to `max_interval`, and
+    is reset by any change.
+
+    Parameters
+    ----------
+    manager : FilesManager
+        The manager of the folder to watch.
+    archive : Compressor
+        The archive to keep up to date.
+    interval : float, optional
+        Seconds between polls while files change, by default 1.0.
+    max_interval : float, optional
+        Longest delay between polls, by default 30.0.
+    debounce : float, optional
+        Seconds a file must stay unchanged before it is archived, by
+        default 0.5.
+    delete : bool, optional
+        If True, remove the members of deleted files, by default True.
+    on_batch : callable, optional
+        Called with the report of every batch applied, by default None.
+
+    Examples
+    --------
+    >>> watcher = Watcher(FilesManager('data'), Compressor('backup'))
+    >>> watcher.start()
+    >>> ...
+    >>> watcher.stop()
+    """
+    def __init__(self,
+                 manager: FilesManager,
+                 archive: Compressor,
+                 interval: float = 1.0,
+                 max_interval: float = 30.0,
+                 debounce: float = 0.5,
+                 delete: bool = True,
+                 on_batch: callable = None) -> None:
+        if interval <= 0 or max_interval < interval:
+            raise ValueError(
+                "interval must be positive and at most max_interval"
+            )
+        self.manager = manager
+        self.archive = archive
+        self.interval = interval
+        self.max_interval = max_interval
+        self.debounce = debounce
+        self.delete = delete
+        self.on_batch = on_batch
+        self.delay = interval
+        self.scans = 0
+        self.batches = 0
+        self._snapshot = None
+        # File names mapped to the time of their last change
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _exclude(self,) -> set:
+        """
+        Get the names of the archive's own files, and of the temporary
+        files of its rewrites, in the watched folder.
+        """
+        folder = self.manager.folder_path.resolve()
+        names = set()
+        for path in self.archive.archive_paths():
+            if path.resolve().parent == folder:
+                names.add(path.name)
+        return names
+
+    def _scan(self,) -> dict:
+        exclude = self._exclude()
+        files = snapshot(self.manager, exclude)
+        self.scans += 1
+        return {
+            name: signature for name, signature in files.items()
+            if not any(name.startswith(f'.{own}.') for own in exclude)
+        }
+
+    def start_sync(self,) -> dict:
+        """
+        Bring the archive up to date with a full comparison, and take the
+        snapshot later polls are compared with.
+
+        Returns
+        -------
+        dict
+            The report of `centopy.core.sync`.
+        """
+        with self._lock:
+            # Taken first, so files changed while syncing are seen later
+            self._snapshot = self._scan()
+            self._pending.clear()
+            return sync(self.manager, self.archive, delete=self.delete)
+
+    def poll(self,) -> int:
+        """
+        Scan the folder and record the files changed since the last scan.
+
+        Returns
+        -------
+        int
+            The number of files created, modified or deleted.
+        """
+        with self._lock:
+            files = self._scan()
+            if self._snapshot is None:
+                self._snapshot = files
+                return 0
+            now = time.monotonic()
+            created, modified, deleted = diff(self._snapshot, files)
+            self._snapshot = files
+            for name in (*created, *modified, *deleted):
+                self._pending[name] = now
+            return len(created) + len(modified) + len(deleted)
+
+    def flush(self, force: bool = False) -> dict:
+        """
+        Apply the settled changes to the archive in a single rewrite.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, apply every pending change, settled or not, by
+            default False.
+
+        Returns
+        -------
+        dict
+            The names of the members 'added', 'replaced' and 'removed'.
+        """
+        report = {'added': [], 'replaced': [], 'removed': []}
+        with self._lock:
+            now = time.monotonic()
+            settled = [
+                name for name, changed_at in self._pending.items()
+                if force or now - changed_at >= self.debounce
+            ]
+            if not settled:
+                return report
+            members = self.archive.members
+            sources = {}
+            for name in sorted(settled):
+                source = None
+                if name in self._snapshot:
+                    source = self.manager._read_packed(name)
+                    if source is None:
+                        path = self.manager.file_path(name)
+                        if path.is_file():
+                            source = path
+                if source is not None:
+                    key = 'replaced' if name in members else 'added'
+                    report[key].append(name)
+                    sources[name] = source
+                elif self.delete and name in members:
+                    report['removed'].append(name)
+            if sources or report['removed']:
+                # Raises if a file vanished meanwhile, leaving the batch
+                # pending, so it is retried on next flush
+                self.archive._rewrite(add=sources, remove=report['removed'])
+            for name in settled:
+                del self._pending[name]
+            if not sources and not report['removed']:
+                return report
+            self.batches += 1
+        if self.on_batch is not None:
+            self.on_batch(report)
+        return report
+
+    def step(self,) -> dict:
+        """
+        Poll the folder, apply the settled changes and adapt the delay
+        before the next poll.
+
+        Returns
+        -------
+        dict
+            The report of `flush`.
+        """
+        if self.poll():
+            self.delay = self.interval
+        else:
+            self.delay = min(self.delay * 2, self.max_interval)
+        try:
+            report = self.flush()
+        except FileNotFoundError as err:
+            # Deleted since the poll, the next one will tell
+            logger.debug("Watched file vanished: %s", err)
+            report = {'added': [], 'replaced': [], 'removed': []}
+        if self._pending:
+            # Come back as soon as the pending changes settle
+            self.delay = min(self.delay, max(self.debounce, 0.01))
+        return report
+
+    def run(self, stop: threading.Event = None) -> None:
+        """
+        Watch the folder until `stop` is set, then apply every pending
+        change.
+
+        Parameters
+        ----------
+        stop : threading.Event, optional
+            The event ending the watch, by default the one set by `stop`.
+        """
+        stop = stop or self._stop
+        if self._snapshot is None:
+            self.start_sync()
+        while not stop.is_set():
+            self.step()
+            stop.wait(self.delay)
+        self.poll()
+        self.flush(force=True)
+
+    def start(self,) -> None:
+        """
+        Watch the folder in a background thread.
+        """
+        if self._thread is not None:
+            raise RuntimeError("The watcher is already running")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self,) -> None:
+        """
+        Stop the background watch, once the pending changes are applied.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self,) -> dict:
+        """
+        Get the counters of the watch.
+
+        Returns
+        -------
+        dict
+            The number of 'scans' and 'batches' applied, the number of
+            changes 'pending', and the current 'delay' between polls.
+        """
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'scans': self.scans,
+            'batches': self.batches,
+            'pending': pending,
+            'delay': self.delay,
+        }
+
+    def __enter__(self,):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
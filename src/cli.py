@@ -1,11 +1,29 @@
+import sys
+import json
+
 import click
 from apps import Files
+from centopy.settings import configure_logging
+# Light: importing them loads no compression nor the core module
+from centopy.formats import COMPRESSION_METHODS, FILE_COMPRESSIONS
 
 @click.group()
 @click.argument("directory", required=True)
+@click.option("--compression", "-z", default=None,
+              type=click.Choice(["auto", *FILE_COMPRESSIONS]),
+              help="Compress files of DIRECTORY transparently: 'auto' picks "
+                   "the compression from their extension.")
+@click.option("--level", default=None, type=int,
+              help="Compression level of the files written.")
+@click.option("--sanitize", is_flag=True,
+              help="Clean up the names of the files written.")
 @click.pass_context
-def cli(ctx, directory):
-    ctx.obj = Files(directory)
+def cli(ctx, directory, compression, level, sanitize):
+    configure_logging()
+    ctx.obj = Files(
+        directory, compression=compression, compresslevel=level,
+        sanitize=sanitize
+    )
 
 @cli.command()
 @click.pass_context
@@ -18,7 +36,7 @@ def list_files(ctx):
 @click.argument("file_name")
 @click.option("--encoding", default="utf-8")
 def load(ctx, file_name, encoding):
-    contents = ctx.obj.run("load_file", file_name, encoding=encoding)
+    contents = ctx.obj.run("read", file_name, encoding=encoding)
     click.echo(contents)
 
 @cli.command()
@@ -27,9 +45,44 @@ def load(ctx, file_name, encoding):
 @click.option("--encoding", default="utf-8")
 @click.pass_context
 def save(ctx, file_name, file_contents, encoding):
-    ctx.obj.run("save_file", file_name, file_contents, encoding=encoding)
+    ctx.obj.run("write", file_name, file_contents, encoding=encoding)
+    if ctx.obj.manager.sanitize:
+        file_name = ctx.obj.manager.clean_name(file_name)
     click.echo(f"Saved {file_name}")
 
+@cli.command()
+@click.argument("file_name")
+@click.option("--archive", "-a", metavar="NAME",
+              help="Read FILE_NAME from the archive NAME.zip.")
+@click.pass_context
+def cat(ctx, file_name, archive):
+    """Stream a file, or an archive member, to stdout."""
+    stdout = sys.stdout.buffer
+    if archive is None:
+        if ctx.obj.manager.read_into(file_name, stdout) is None:
+            ctx.exit(1)
+    else:
+        try:
+            ctx.obj.archive(archive, create=False).read_into(
+                file_name, stdout
+            )
+        except (FileNotFoundError, KeyError) as err:
+            raise click.ClickException(f"Not found: {err}") from err
+    stdout.flush()
+
+@cli.command()
+@click.argument("file_name")
+@click.option("--archive", "-a", metavar="NAME",
+              help="Write FILE_NAME into the archive NAME.zip.")
+@click.pass_context
+def put(ctx, file_name, archive):
+    """Stream stdin into a file, or an archive member."""
+    stdin = sys.stdin.buffer
+    if archive is None:
+        ctx.obj.manager.write_from(file_name, stdin)
+    else:
+        ctx.obj.archive(archive).write_from(file_name, stdin)
+
 @cli.command()
 @click.argument("file_name")
 @click.pass_context
@@ -37,5 +90,241 @@ def delete(ctx, file_name):
     ctx.obj.run("delete_file", file_name)
     click.echo(f"Deleted {file_name}")
 
+@cli.command()
+@click.argument("manifest", type=click.File("r"), default="-")
+@click.option("--jobs", "-j", default=1, show_default=True,
+              type=click.IntRange(min=1),
+              help="Number of operations run at once.")
+@click.pass_context
+def batch(ctx, manifest, jobs):
+    """Run the operations of a JSON-lines MANIFEST (stdin by default).
+
+    Each line is an operation, e.g. {"op": "write", "file": "a.txt",
+    "contents": "..."}. Operations are read, write, append and delete on a
+    "file", and archive, storing "files" in an "archive". One JSON result
+    per operation is printed as soon as it is available. Exits with status
+    1 if any operation failed.
+    """
+    failed = False
+    for result in ctx.obj.batch(manifest, jobs=jobs):
+        failed = failed or not result['ok']
+        click.echo(json.dumps(result))
+    ctx.exit(1 if failed else 0)
+
+@cli.group()
+def archive():
+    """Manage the zip archives of DIRECTORY, named without extension."""
+
+def _open_archive(ctx, name, create=False):
+    try:
+        return ctx.obj.archive(name, create=create)
+    except FileNotFoundError as err:
+        raise click.ClickException(f"Archive not found: {err}") from err
+
+jobs_option = click.option(
+    "--jobs", "-j", default=None, type=click.IntRange(min=1),
+    help="Number of files processed at once (default: one per CPU)."
+)
+
+@archive.command()
+@click.argument("name")
+@click.argument("files", nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option("--method", "-m", default="deflated", show_default=True,
+              type=click.Choice(sorted(COMPRESSION_METHODS)),
+              help="Compression method of the new members.")
+@click.option("--level", "-l", default=None, type=int,
+              help="Compression level of the new members.")
+@click.option("--delete-source", is_flag=True,
+              help="Delete the files once archived.")
+@click.pass_context
+def pack(ctx, name, files, method, level, delete_source):
+    """Add FILES to the archive NAME."""
+    compressor = _open_archive(ctx, name, create=True)
+    compressor.compression = COMPRESSION_METHODS[method]
+    compressor.compresslevel = level
+    for member in compressor.add_many(files, delete_source=delete_source):
+        click.echo(member)
+
+@archive.command()
+@click.argument("name")
+@click.argument("members", nargs=-1)
+@click.option("--to", "path", default=None,
+              type=click.Path(file_okay=False),
+              help="Folder to extract to (default: DIRECTORY).")
+@jobs_option
+@click.pass_context
+def unpack(ctx, name, members, path, jobs):
+    """Extract MEMBERS (default: all) of the archive NAME in parallel."""
+    compressor = _open_archive(ctx, name)
+    try:
+        extracted = compressor.extract_many(
+            members or None, path=path, workers=jobs
+        )
+    except KeyError as err:
+        raise click.ClickException(f"Member not found: {err}") from err
+    for extracted_path in extracted:
+        click.echo(extracted_path)
+
+@archive.command()
+@click.argument("name")
+@click.option("--long", "-l", "long_format", is_flag=True,
+              help="Show sizes, compressed sizes and dates.")
+@click.pass_context
+def ls(ctx, name, long_format):
+    """List the members of the archive NAME."""
+    compressor = _open_archive(ctx, name)
+    for info in compressor.infolist():
+        if long_format:
+            date = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}".format(
+                *info.date_time[:5]
+            )
+            click.echo(
+                f"{info.file_size:>12} {info.compress_size:>12} "
+                f"{date} {info.filename}"
+            )
+        else:
+            click.echo(info.filename)
+
+@archive.command()
+@click.argument("name")
+@click.argument("members", nargs=-1, required=True)
+@click.pass_context
+def rm(ctx, name, members):
+    """Remove MEMBERS from the archive NAME, in a single rewrite."""
+    compressor = _open_archive(ctx, name)
+    missing = [member for member in members
+               if member not in compressor.members]
+    if missing:
+        raise click.ClickException(f"Members not found: {', '.join(missing)}")
+    compressor.remove_many(members)
+
+@archive.command("cat")
+@click.argument("name")
+@click.argument("member")
+@click.pass_context
+def cat_member(ctx, name, member):
+    """Stream MEMBER of the archive NAME to stdout."""
+    compressor = _open_archive(ctx, name)
+    stdout = sys.stdout.buffer
+    try:
+        compressor.read_into(member, stdout)
+    except KeyError as err:
+        raise click.ClickException(f"Member not found: {err}") from err
+    stdout.flush()
+
+@cli.command()
+@click.option("--socket", "socket_path", default=None,
+              type=click.Path(dir_okay=False),
+              help="Socket to listen on (default: DIRECTORY/.centopy.sock).")
+@click.option("--workers", default=None, type=click.IntRange(min=1),
+              help="Number of requests run at once.")
+@click.option("--max-open", default=None, type=click.IntRange(min=1),
+              help="Number of archives kept open at once.")
+@click.option("--locking", is_flag=True,
+              help="Lock files and archives against other processes.")
+@click.pass_context
+def serve(ctx, socket_path, workers, max_open, locking):
+    """Serve the files and archives of DIRECTORY until stopped."""
+    from centopy.server import Server
+    try:
+        server = Server(
+            ctx.obj.manager.folder_path,
+            socket_path=socket_path,
+            workers=workers,
+            max_open=max_open,
+            locking=locking
+        )
+    except RuntimeError as err:
+        raise click.ClickException(str(err)) from err
+    click.echo(f"Serving {server.manager.folder_path} on {server.socket_path}",
+               err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def _argument(text):
+    """Read a call argument as JSON if it is, as text otherwise."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+@cli.command()
+@click.argument("target", type=click.Choice(
+    ["files", "archive", "archives", "server"]
+))
+@click.argument("method")
+@click.argument("args", nargs=-1)
+@click.option("--archive", "-a", "archive_name", metavar="NAME",
+              help="Archive to call METHOD on, for the archive TARGET.")
+@click.option("--socket", "socket_path", default=None,
+              type=click.Path(dir_okay=False),
+              help="Socket of the daemon (default: DIRECTORY/.centopy.sock).")
+@click.pass_context
+def call(ctx, target, method, args, archive_name, socket_path):
+    """Call METHOD of TARGET on the daemon serving DIRECTORY.
+
+    ARGS are read as JSON values when valid, as text otherwise. The result
+    is printed as JSON.
+    """
+    from centopy.server import Client, RemoteError, default_socket, dumps
+    if socket_path is None:
+        socket_path = default_socket(ctx.obj.manager.folder_path)
+    try:
+        with Client(socket_path) as client:
+            result = client.call(
+                target, method, *map(_argument, args), archive=archive_name
+            )
+    except OSError as err:
+        raise click.ClickException(f"No daemon on {socket_path}: {err}")
+    except RemoteError as err:
+        raise click.ClickException(str(err)) from err
+    click.echo(dumps(result).decode("utf-8"), nl=False)
+
+@archive.command()
+@click.argument("name")
+@click.option("--interval", default=1.0, show_default=True,
+              type=click.FloatRange(min=0, min_open=True),
+              help="Seconds between polls while files change.")
+@click.option("--max-interval", default=30.0, show_default=True,
+              type=click.FloatRange(min=0, min_open=True),
+              help="Longest delay between polls of an idle folder.")
+@click.option("--debounce", default=0.5, show_default=True,
+              type=click.FloatRange(min=0),
+              help="Seconds a file must stay unchanged before archiving.")
+@click.option("--keep-deleted", is_flag=True,
+              help="Keep the members of deleted files.")
+@click.pass_context
+def watch(ctx, name, interval, max_interval, debounce, keep_deleted):
+    """Keep the archive NAME up to date with DIRECTORY until stopped."""
+    from centopy import Watcher
+
+    def report(changes):
+        for key, names in changes.items():
+            for member in names:
+                click.echo(f"{key} {member}")
+
+    watcher = Watcher(
+        ctx.obj.manager,
+        _open_archive(ctx, name, create=True),
+        interval=interval,
+        max_interval=max(interval, max_interval),
+        debounce=debounce,
+        delete=not keep_deleted,
+        on_batch=report
+    )
+    report(
+        {key: value for key, value in watcher.start_sync().items()
+         if key != 'unchanged'}
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.flush(force=True)
+
 if __name__ == "__main__":
     cli()    
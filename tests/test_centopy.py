@@ -1,7 +1,15 @@
+import io
 import os
+import gzip
+import array
+import pickle
+import sys
 import shutil
 import unittest
 import tempfile
+import zipfile
+import threading
+import subprocess
 
 from pathlib import Path
 from unittest.mock import patch
@@ -10,6 +18,15 @@ from centopy.base import BaseFilesManager
 from centopy.core import FilesManager
 from centopy.core import Compressor
 from centopy.core import Archives
+from centopy.core import ShardedCompressor
+from centopy.core import sync
+from centopy.watch import Watcher
+from centopy.locks import RWLock, FileLock, LockTimeout
+from centopy import tracing
+from centopy import bench
+from centopy import serializers
+from centopy.server import Server, Client, RemoteError
+from apps import Files
 
 
 class TestBaseFilesManager(unittest.TestCase):
@@ -140,6 +157,295 @@ class TestFilesManager(unittest.TestCase):
         
         self.assertFalse(os.path.exists(self.manager.file_path(file_name)))
 
+    def test_stream_write_and_read(self):
+        content = os.urandom(3000)
+        copied = self.manager.write_from(
+            'stream.bin', io.BytesIO(content), chunk_size=1024
+        )
+        self.assertEqual(copied, len(content))
+        target = io.BytesIO()
+        self.manager.read_into('stream.bin', target, chunk_size=1024)
+        self.assertEqual(target.getvalue(), content)
+        self.assertIsNone(self.manager.read_into('missing.bin', target))
+
+    def test_fanout_mapping(self):
+        manager = FilesManager(self.temp_dir, fanout=2)
+        manager['a.txt'] = 'Text'
+        manager['b.bin'] = b'\x00\x01'
+        path = manager.file_path('a.txt')
+        self.assertEqual(len(path.relative_to(self.temp_dir).parts), 3)
+        self.assertTrue(path.is_file())
+        self.assertEqual(manager['a.txt'], b'Text')
+        self.assertIn('b.bin', manager)
+        self.assertNotIn('c.txt', manager)
+        self.assertEqual(len(manager), 2)
+        self.assertEqual(sorted(manager), ['a.txt', 'b.bin'])
+        self.assertEqual(sorted(manager.list_files()), ['a.txt', 'b.bin'])
+        del manager['a.txt']
+        self.assertEqual(list(manager), ['b.bin'])
+        with self.assertRaises(KeyError):
+            manager['a.txt']
+        with self.assertRaises(KeyError):
+            del manager['a.txt']
+        with self.assertRaises(ValueError):
+            manager.write('sub/c.txt', 'Text')
+        with self.assertRaises(KeyError):
+            manager['sub/c.txt']
+        # Files written by others are indexed once reindexed
+        other = FilesManager(self.temp_dir, fanout=2)
+        other['c.txt'] = 'Text'
+        self.assertEqual(len(manager), 1)
+        self.assertEqual(manager.reindex(), 2)
+        self.assertEqual(manager.pop('c.txt'), b'Text')
+        self.assertEqual(manager.pop('c.txt', None), None)
+        # Managers stay true without any file
+        self.assertTrue(FilesManager(Path(self.temp_dir) / 'empty'))
+
+    def test_packed_files(self):
+        manager = FilesManager(self.temp_dir, pack_threshold=100)
+        manager.write('a.txt', 'Small')
+        manager.append('a.txt', ' file')
+        manager.writeb('b.bin', [b'\x00', b'\x01'])
+        manager.writeb('large.bin', b'x' * 200)
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir)), ['.packs', 'large.bin']
+        )
+        self.assertEqual(manager.read('a.txt'), 'Small file')
+        self.assertEqual(manager.readb('b.bin'), b'\x00\x01')
+        self.assertEqual(
+            sorted(manager.list_files()), ['a.txt', 'b.bin', 'large.bin']
+        )
+        # Grown too large, a file moves out of the packs, and back in
+        manager.append('a.txt', '!' * 100)
+        self.assertTrue(manager.file_path('a.txt').is_file())
+        self.assertNotIn('a.txt', manager.packs)
+        manager.write('a.txt', 'Small again')
+        self.assertFalse(manager.file_path('a.txt').exists())
+        manager.delete_file('b.bin')
+        self.assertIsNone(manager.readb('b.bin'))
+        self.assertEqual(manager.stats()['packs']['files'], 1)
+        report = manager.compact()
+        self.assertEqual(report['moved'], 1)
+        self.assertEqual(manager.stats()['packs']['garbage'], 0)
+        # Concurrent appends to a packed file are all kept
+        manager.pack_threshold = 1000
+        manager.write('log', '')
+
+        def append_many():
+            for _ in range(100):
+                manager.append('log', 'x')
+
+        threads = [threading.Thread(target=append_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(manager.read('log'), 'x' * 800)
+        self.assertFalse(manager.file_path('log').exists())
+        manager.delete_file('log')
+        manager.pack_threshold = 100
+        # Only one manager packs a folder at a time
+        with self.assertRaises(RuntimeError):
+            FilesManager(self.temp_dir, pack_threshold=100)
+        # The packs are indexed again on opening
+        manager.packs.close()
+        reopened = FilesManager(self.temp_dir, pack_threshold=100)
+        self.addCleanup(reopened.packs.close)
+        self.assertEqual(reopened.read('a.txt'), 'Small again')
+        self.assertEqual(sorted(reopened), ['a.txt', 'large.bin'])
+
+    def test_write_buffers(self):
+        self.manager.writeb('test.bin', bytearray(b'ab'))
+        self.manager.appendb('test.bin', memoryview(b'cd'))
+        self.manager.appendb('test.bin', array.array('B', [101, 102]))
+        fragments = [b'g', bytearray(b'h'), memoryview(b'ij')] * 5
+        with patch('centopy.utils.IOV_MAX', 4):
+            self.manager.appendb('test.bin', fragments)
+        self.assertEqual(
+            self.manager.readb('test.bin'), b'abcdef' + b'ghij' * 5
+        )
+        self.assertEqual(self.manager.stats()['counters']['bytes_written'], 26)
+        with self.assertRaises(TypeError):
+            self.manager.writeb('test.bin', 'text')
+
+    def test_compressed_files(self):
+        manager = FilesManager(
+            self.temp_dir, compression='auto', compresslevel=1
+        )
+        manager.write('test.txt.gz', 'Test content ' * 100)
+        manager.append('test.txt.gz', 'end')
+        self.assertEqual(
+            manager.read('test.txt.gz'), 'Test content ' * 100 + 'end'
+        )
+        with gzip.open(manager.file_path('test.txt.gz'), 'rt') as file_:
+            self.assertTrue(file_.read().endswith('end'))
+        self.assertLess(
+            manager.file_path('test.txt.gz').stat().st_size, 1300
+        )
+        for name in ('test.bz2', 'test.xz'):
+            manager.writeb(name, [b'ab', b'cd'])
+            manager.appendb(name, b'ef')
+            self.assertEqual(manager.readb(name), b'abcdef')
+        manager.write_from('stream.gz', io.BytesIO(b'x' * 3000))
+        target = io.BytesIO()
+        self.assertEqual(manager.read_into('stream.gz', target), 3000)
+        manager.save_obj('obj.pkl.gz', {'data': bytearray(b'y' * 3000)})
+        self.assertEqual(len(manager.load_obj('obj.pkl.gz')['data']), 3000)
+        # Other files are left as they are
+        manager.write('plain.txt', 'Plain')
+        self.assertEqual(self.manager.read('plain.txt'), 'Plain')
+        self.assertEqual(manager.file_compression('plain.txt'), None)
+        self.assertEqual(
+            FilesManager(self.temp_dir, compression='lzma')
+            .file_compression('plain.txt'),
+            'lzma'
+        )
+        with self.assertRaises(ValueError):
+            FilesManager(self.temp_dir, compression='zip')
+
+    def test_save_and_load_obj(self):
+        obj = {'name': 'blob', 'data': bytearray(os.urandom(5000))}
+        self.manager.save_obj('obj.pkl', obj)
+        self.assertEqual(self.manager.load_obj('obj.pkl'), obj)
+        for codec in ('json', 'marshal'):
+            self.manager.save_obj('obj', [1, 'a'], codec=codec)
+            self.assertEqual(
+                list(self.manager.load_obj('obj', codec=codec)), [1, 'a']
+            )
+        # Plain pickles are read too
+        self.manager.writeb('plain.pkl', pickle.dumps({'a': 1}))
+        self.assertEqual(self.manager.load_obj('plain.pkl'), {'a': 1})
+        self.assertIsNone(self.manager.load_obj('missing.pkl'))
+        with self.assertRaises(ValueError):
+            self.manager.save_obj('obj', 1, codec='unknown')
+
+    def test_copy_and_move(self):
+        data = os.urandom(5000)
+        self.manager.writeb('data.bin', data)
+        self.assertEqual(self.manager.copy('data.bin', 'copy.bin'), 5000)
+        self.assertEqual(self.manager.readb('copy.bin'), data)
+        with self.assertRaises(ValueError):
+            self.manager.copy('data.bin')
+        with self.assertRaises(FileNotFoundError):
+            self.manager.move('missing.bin', 'other.bin')
+        other = FilesManager(
+            Path(self.temp_dir) / 'other', fanout=1, compression='auto',
+            pack_threshold=100
+        )
+        try:
+            # Renamed into a fanout subdirectory
+            self.assertEqual(self.manager.move('copy.bin', target=other), 5000)
+            self.assertFalse(self.manager.file_path('copy.bin').exists())
+            self.assertEqual(other['copy.bin'], data)
+            # Compressed by the target, and packed by it
+            self.manager.copy('data.bin', 'data.bin.gz', target=other)
+            self.assertEqual(other.readb('data.bin.gz'), data)
+            self.assertEqual(
+                gzip.decompress(other.file_path('data.bin.gz').read_bytes()),
+                data
+            )
+            # Sizes are counted as stored in the source folder
+            self.assertEqual(
+                other.copy('data.bin.gz', 'plain.bin', target=self.manager),
+                other.file_path('data.bin.gz').stat().st_size
+            )
+            self.assertEqual(self.manager.readb('plain.bin'), data)
+            self.manager.write('small.txt', 'Small')
+            self.manager.move('small.txt', target=other)
+            self.assertIn('small.txt', other.packs)
+            self.assertNotIn('small.txt', self.manager)
+            # And back, out of the packs
+            other.move('small.txt', 'small.txt.gz', target=self.manager)
+            self.assertEqual(self.manager.read('small.txt.gz'), 'Small')
+            self.assertEqual(
+                sorted(other), ['copy.bin', 'data.bin.gz']
+            )
+        finally:
+            other.packs.close()
+        self.assertEqual(
+            self.manager.stats()['counters']['bytes_moved'], 5005
+        )
+
+    def test_clean_names(self):
+        self.manager.write('report.txt', 'Existing')
+        names = iter(['report.txt', 'my report.txt', 'my?report.txt', '..'])
+        cleaned = self.manager.clean_names(names)
+        self.assertEqual(next(cleaned), ('report.txt', 'report_1.txt'))
+        self.assertEqual(list(cleaned), [
+            ('my report.txt', 'my_report.txt'),
+            ('my?report.txt', 'my_report_1.txt'),
+            ('..', '__'),
+        ])
+        sanitized = FilesManager(self.temp_dir, sanitize=True)
+        sanitized.write('../escape me.txt', 'Inside')
+        self.assertEqual(sanitized.read('.._escape_me.txt'), 'Inside')
+        self.assertFalse(
+            (Path(self.temp_dir).parent / 'escape me.txt').exists()
+        )
+        self.assertEqual(sanitized.clean_name('..'), '__')
+        sanitized.write('..', 'Not the parent')
+        self.assertEqual(sanitized.read('__'), 'Not the parent')
+        sanitized['a b.txt'] = b'Key'
+        self.assertEqual(sanitized['a b.txt'], b'Key')
+        self.assertIn('a b.txt', sanitized)
+        del sanitized['a b.txt']
+        self.assertNotIn('a_b.txt', sanitized)
+        custom = FilesManager(self.temp_dir, sanitize=r'[^a-z]+')
+        self.assertEqual(custom.clean_name('Ab c.txt'), '_b_c_txt')
+
+    def test_walk(self):
+        root = Path(self.temp_dir)
+        for path in ['a.txt', 'b.csv', 'logs/1.txt', 'logs/old/2.txt',
+                     'logs/old/3.csv', 'skip/4.txt']:
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+            (root / path).write_text(path, encoding='utf-8')
+        packed = FilesManager(self.temp_dir, pack_threshold=100)
+        packed.write('packed.txt', 'Packed')
+        self.addCleanup(packed.packs.close)
+        walked = [entry.path for entry in packed.walk(exclude='skip')]
+        self.assertEqual(sorted(walked), [
+            'a.txt', 'b.csv', 'logs/1.txt', 'logs/old/2.txt',
+            'logs/old/3.csv',
+        ])
+        self.assertEqual(
+            sorted(entry.path for entry in self.manager.walk(
+                include='*.txt', exclude=['skip'], max_depth=1,
+                workers=4, stat=True
+            )),
+            ['a.txt', 'logs/1.txt']
+        )
+        entries = {
+            entry.path: entry
+            for entry in self.manager.walk(include='logs/*', workers=2,
+                                           directories=True)
+        }
+        self.assertEqual(sorted(entries), [
+            'logs/1.txt', 'logs/old', 'logs/old/2.txt', 'logs/old/3.csv'
+        ])
+        entry = entries['logs/old/2.txt']
+        self.assertEqual(entry.depth, 2)
+        self.assertEqual(entry.stat().st_size, 14)
+        self.assertEqual(Path(entry).read_text(encoding='utf-8'),
+                         'logs/old/2.txt')
+
+    def test_stats(self):
+        self.manager.write('test.txt', 'Test content')
+        self.manager.read('test.txt')
+        self.manager.read('test.txt')
+        stats = self.manager.stats()
+        self.assertEqual(stats['operations']['write']['count'], 1)
+        self.assertEqual(stats['operations']['read']['count'], 2)
+        self.assertEqual(stats['counters']['bytes_written'], 12)
+        self.assertEqual(stats['counters']['bytes_read'], 24)
+        latency = stats['operations']['read']['latency']
+        self.assertLessEqual(latency['p50'], latency['max'])
+
+        disabled = FilesManager(self.temp_dir, metrics=False)
+        disabled.read('test.txt')
+        self.assertEqual(
+            disabled.stats()['operations'], {}
+        )
+
     def test_get_file_state(self):
         file_name = 'test_state.txt'
         content = "Test content"
@@ -317,6 +623,192 @@ class TestCompressor(unittest.TestCase):
         self.assertNotIn(content, updated_content_read)
         self.assertNotIn(file_name, self.compressor.manager.list_files())
 
+    def test_members_indexed_on_first_use(self,):
+        self.compressor.write('test.txt', 'Hello, World!')
+        redundant = Compressor(
+            self.archive_name, wdir=self.temp_dir, extension=self.archive_ext
+        )
+        self.assertIsNone(redundant._members)
+        self.assertEqual(redundant.members, {'test.txt': 'test.txt'})
+
+    def test_standalone_releases_handle(self,):
+        self.compressor.write('test.txt', 'Hello, World!')
+        self.assertEqual(self.compressor.read('test.txt'), 'Hello, World!')
+        self.assertIsNone(self.compressor._reader)
+
+    def test_close_releases_handle(self,):
+        self.compressor._pooled = True
+        self.compressor.write('test.txt', 'Hello, World!')
+        self.assertEqual(self.compressor.read('test.txt'), 'Hello, World!')
+        self.assertIsNotNone(self.compressor._reader)
+        self.assertGreater(self.compressor.memory_usage(), 0)
+        self.compressor.close()
+        self.assertIsNone(self.compressor._reader)
+        self.assertEqual(self.compressor.read('test.txt'), 'Hello, World!')
+
+    def test_write_skips_unchanged(self,):
+        self.compressor.write('keep.txt', 'Keep me')
+        self.compressor.write('test.txt', 'Hello, World!')
+        mtime = self.compressor.path().stat().st_mtime_ns
+        self.compressor.write('test.txt', 'Hello, World!')
+        self.assertEqual(self.compressor.skipped_writes, 1)
+        self.assertEqual(self.compressor.path().stat().st_mtime_ns, mtime)
+
+        self.compressor.write('test.txt', 'Goodbye!')
+        self.assertEqual(self.compressor.read('test.txt'), 'Goodbye!')
+        self.assertEqual(self.compressor.read('keep.txt'), 'Keep me')
+        self.assertEqual(self.compressor.namelist().count('test.txt'), 1)
+
+    def test_update_skips_unchanged(self,):
+        self.compressor.write('test.txt', 'Hello, World!')
+        self.compressor.update('test.txt')
+        self.assertEqual(self.compressor.skipped_writes, 1)
+
+    def test_handle_reopened_after_external_change(self,):
+        self.compressor.write('first.txt', 'First')
+        self.assertEqual(self.compressor.read('first.txt'), 'First')
+        other = Compressor(
+            self.archive_name, wdir=self.temp_dir, extension=self.archive_ext
+        )
+        other.write('second.txt', 'Second')
+        self.assertEqual(self.compressor.read('second.txt'), 'Second')
+
+    def test_concurrent_appends(self,):
+        file_name = 'counter.txt'
+        self.compressor.write(file_name, '')
+        self.compressor.write('other.txt', 'untouched')
+
+        def worker():
+            for _ in range(5):
+                self.compressor.append(file_name, 'x')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.compressor.read(file_name), 'x' * 20)
+        self.assertEqual(self.compressor.read('other.txt'), 'untouched')
+
+    def test_stream_write_and_read(self,):
+        content = os.urandom(3000)
+        self.compressor.write('keep.txt', 'Keep me')
+        self.compressor.write_from('stream.bin', io.BytesIO(content))
+        self.compressor.write_from('stream.bin', io.BytesIO(content))
+        self.assertEqual(self.compressor.skipped_writes, 1)
+        self.compressor.write_from('stream.bin', io.BytesIO(b'Replaced'))
+        target = io.BytesIO()
+        copied = self.compressor.read_into('stream.bin', target, 1024)
+        self.assertEqual(copied, 8)
+        self.assertEqual(target.getvalue(), b'Replaced')
+        self.assertEqual(self.compressor.read('keep.txt'), 'Keep me')
+        self.assertEqual(
+            sorted(self.compressor.namelist()), ['keep.txt', 'stream.bin']
+        )
+
+    def test_save_and_load_obj(self,):
+        class ReprCodec(serializers.Codec):
+            def encode(self, obj):
+                return [repr(obj).encode('utf-8')]
+
+            def decode(self, data):
+                return bytes(data).decode('utf-8')
+
+        obj = {'data': bytearray(b'x' * 3000)}
+        self.compressor.save_obj('obj.pkl', obj)
+        self.assertEqual(self.compressor.load_obj('obj.pkl'), obj)
+        self.compressor.save_obj('obj.pkl', [1, 2])
+        self.assertEqual(self.compressor.load_obj('obj.pkl'), [1, 2])
+        serializers.register_codec('repr', ReprCodec())
+        try:
+            with self.assertRaises(ValueError):
+                serializers.register_codec('repr', ReprCodec())
+            self.compressor.save_obj('obj.txt', (1,), codec='repr')
+            self.assertEqual(self.compressor.read('obj.txt'), '(1,)')
+        finally:
+            del serializers._codecs['repr']
+
+    def test_write_from_failing_stream(self,):
+        class Failing(io.RawIOBase):
+            def readable(self):
+                return True
+
+            def readinto(self, target):
+                raise OSError("Stream broken")
+
+        self.compressor.write('keep.txt', 'Keep me')
+        for name in ('new.bin', 'keep.txt'):
+            with self.assertRaises(OSError):
+                self.compressor.write_from(name, Failing())
+        self.assertEqual(self.compressor.namelist(), ['keep.txt'])
+        self.assertEqual(self.compressor.read('keep.txt'), 'Keep me')
+
+    def test_add_fd(self,):
+        source = Path(self.temp_dir) / 'source.bin'
+        source.write_bytes(b'Header' + b'x' * 10000)
+        with open(source, 'rb') as file_:
+            file_.read(6)
+            self.assertEqual(self.compressor.add_fd('data', file_), 10000)
+        self.assertEqual(self.compressor.readb('data'), b'x' * 10000)
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b'Piped')
+        os.close(write_fd)
+        try:
+            self.assertEqual(self.compressor.add_fd('data', read_fd), 5)
+        finally:
+            os.close(read_fd)
+        self.assertEqual(self.compressor.readb('data'), b'Piped')
+        self.assertEqual(self.compressor.namelist(), ['data'])
+
+    def test_add_many_and_extract(self,):
+        source_dir = Path(self.temp_dir) / 'sources'
+        source_dir.mkdir()
+        paths = []
+        for index in range(6):
+            path = source_dir / f'{index}.txt'
+            path.write_text(str(index) * 1000, encoding='utf-8')
+            paths.append(path)
+        self.compressor.write('0.txt', 'Replaced')
+        self.compressor.compression = zipfile.ZIP_DEFLATED
+        added = self.compressor.add_many(paths)
+        self.assertEqual(added, [path.name for path in paths])
+        self.assertEqual(self.compressor.read('0.txt'), '0' * 1000)
+        self.assertEqual(self.compressor.read('5.txt'), '5' * 1000)
+        self.assertEqual(len(self.compressor.namelist()), 6)
+        with zipfile.ZipFile(self.compressor.path()) as archive:
+            self.assertIsNone(archive.testzip())
+
+        target = Path(self.temp_dir) / 'extracted'
+        extracted = self.compressor.extract_many(path=target, workers=3)
+        self.assertEqual(len(extracted), 6)
+        self.assertEqual(
+            (target / '3.txt').read_text(encoding='utf-8'), '3' * 1000
+        )
+
+        removed = self.compressor.remove_many(['1.txt', '2.txt', 'x.txt'])
+        self.assertEqual(removed, ['1.txt', '2.txt'])
+        self.assertEqual(len(self.compressor.namelist()), 4)
+
+    def test_stats(self,):
+        self.compressor.write('keep.txt', 'Keep me')
+        self.compressor.write('test.txt', 'Hello')
+        self.compressor.append('test.txt', ', World!')
+        self.compressor.read('test.txt')
+        stats = self.compressor.stats()
+        operations = stats['operations']
+        self.assertEqual(operations['write']['count'], 2)
+        self.assertEqual(operations['append']['count'], 1)
+        # Reads and rewrites run by an operation are part of it
+        self.assertEqual(operations['read']['count'], 1)
+        self.assertNotIn('_rewrite', operations)
+        self.assertEqual(stats['counters']['rewrites'], 1)
+        self.assertEqual(
+            stats['counters']['rewrite_bytes'],
+            self.compressor.path().stat().st_size
+        )
+        self.assertEqual(stats['counters']['bytes_read'], 13)
+
     def tes_load_existing(self,):
         
         file_name1 = 'test_text.txt'
@@ -340,6 +832,213 @@ class TestCompressor(unittest.TestCase):
         self.assertEqual(content_1, read_content_1)
         self.assertEqual(content_2, read_content_2)
 
+class TestSync(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = FilesManager(Path(self.temp_dir) / 'data')
+        self.compressor = Compressor('backup', wdir=self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sync(self,):
+        self.manager.write('kept.txt', 'kept')
+        self.manager.write('changed.txt', 'before')
+        self.manager.write('deleted.txt', 'deleted')
+        report = sync(self.manager, self.compressor)
+        self.assertEqual(
+            sorted(report['added']),
+            ['changed.txt', 'deleted.txt', 'kept.txt']
+        )
+
+        self.manager.write('changed.txt', 'after!')
+        self.manager.delete_file('deleted.txt')
+        self.manager.write('new.txt', 'new')
+        # Same contents, different time: the CRC tells it is unchanged
+        os.utime(self.manager.file_path('kept.txt'), (0, 0))
+        report = sync(self.manager, self.compressor)
+        self.assertEqual(report['added'], ['new.txt'])
+        self.assertEqual(report['replaced'], ['changed.txt'])
+        self.assertEqual(report['removed'], ['deleted.txt'])
+        self.assertEqual(report['unchanged'], 1)
+        self.assertEqual(self.compressor.read('changed.txt'), 'after!')
+        self.assertEqual(self.compressor.read('kept.txt'), 'kept')
+        self.assertEqual(
+            sorted(self.compressor.namelist()),
+            ['changed.txt', 'kept.txt', 'new.txt']
+        )
+
+    def test_sync_packed(self,):
+        manager = FilesManager(
+            Path(self.temp_dir) / 'packed', pack_threshold=100
+        )
+        self.addCleanup(manager.packs.close)
+        manager.write('small.txt', 'ab')
+        manager.write('kept.txt', 'kept')
+        report = sync(manager, self.compressor)
+        self.assertEqual(sorted(report['added']), ['kept.txt', 'small.txt'])
+        self.assertEqual(self.compressor.read('small.txt'), 'ab')
+
+        manager.write('small.txt', 'cd')
+        report = sync(manager, self.compressor)
+        self.assertEqual(report['replaced'], ['small.txt'])
+        self.assertEqual(report['unchanged'], 1)
+        self.assertEqual(self.compressor.read('small.txt'), 'cd')
+
+    def test_nothing_changed(self,):
+        self.manager.write('kept.txt', 'kept')
+        sync(self.manager, self.compressor)
+        mtime = self.compressor.file_path.stat().st_mtime_ns
+        report = sync(self.manager, self.compressor)
+        self.assertEqual(report['unchanged'], 1)
+        self.assertEqual(self.compressor.file_path.stat().st_mtime_ns, mtime)
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = FilesManager(self.temp_dir)
+        self.compressor = Compressor('backup', wdir=self.temp_dir)
+        self.watcher = Watcher(self.manager, self.compressor, debounce=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_poll_and_flush(self,):
+        self.manager.write('kept.txt', 'kept')
+        self.manager.write('deleted.txt', 'deleted')
+        report = self.watcher.start_sync()
+        self.assertEqual(sorted(report['added']), ['deleted.txt', 'kept.txt'])
+
+        self.manager.write('new.txt', 'new')
+        self.manager.write('kept.txt', 'changed')
+        self.manager.delete_file('deleted.txt')
+        self.assertEqual(self.watcher.poll(), 3)
+        report = self.watcher.flush()
+        self.assertEqual(report, {
+            'added': ['new.txt'],
+            'replaced': ['kept.txt'],
+            'removed': ['deleted.txt'],
+        })
+        self.assertEqual(self.compressor.read('kept.txt'), 'changed')
+        self.assertEqual(sorted(self.compressor.namelist()),
+                         ['kept.txt', 'new.txt'])
+        # Its own rewrites are not changes
+        self.assertEqual(self.watcher.poll(), 0)
+        self.assertEqual(self.watcher.stats()['batches'], 1)
+
+    def test_vanished_file_retried(self,):
+        self.watcher.start_sync()
+        self.manager.write('a.txt', 'a')
+        self.manager.write('b.txt', 'b')
+        self.assertEqual(self.watcher.poll(), 2)
+        # b.txt vanishes while the archive is rewritten
+        with patch.object(
+                self.compressor, '_rewrite',
+                side_effect=FileNotFoundError('b.txt')):
+            self.manager.delete_file('b.txt')
+            self.watcher.step()
+        self.assertEqual(self.watcher.stats()['pending'], 2)
+        self.watcher.step()
+        self.assertEqual(self.compressor.read('a.txt'), 'a')
+        self.assertEqual(self.compressor.namelist(), ['a.txt'])
+        self.assertEqual(self.watcher.stats()['pending'], 0)
+
+    def test_packed_files(self,):
+        manager = FilesManager(
+            Path(self.temp_dir) / 'packed', pack_threshold=100
+        )
+        self.addCleanup(manager.packs.close)
+        watcher = Watcher(manager, self.compressor, debounce=0)
+        manager.write('small.txt', 'ab')
+        self.assertEqual(watcher.start_sync()['added'], ['small.txt'])
+        manager.write('small.txt', 'cd')
+        self.assertEqual(watcher.poll(), 1)
+        self.assertEqual(watcher.flush()['replaced'], ['small.txt'])
+        self.assertEqual(self.compressor.read('small.txt'), 'cd')
+
+    def test_debounce_and_backoff(self,):
+        watcher = Watcher(self.manager, self.compressor, interval=1,
+                          max_interval=4, debounce=60)
+        watcher.start_sync()
+        self.manager.write('a.txt', 'a')
+        watcher.step()
+        self.assertEqual(self.compressor.namelist(), [])
+        self.assertEqual(watcher.stats()['pending'], 1)
+        self.assertEqual(watcher.flush(force=True)['added'], ['a.txt'])
+        for delay in (2, 4, 4):
+            watcher.step()
+            self.assertEqual(watcher.delay, delay)
+
+    def test_background(self,):
+        batches = []
+        watcher = Watcher(self.manager, self.compressor, interval=0.01,
+                          debounce=0, on_batch=batches.append)
+        watcher.start_sync()
+        with watcher:
+            self.manager.write('a.txt', 'a')
+        self.assertEqual(self.compressor.read('a.txt'), 'a')
+        self.assertTrue(batches)
+
+
+class TestShardedCompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.compressor = ShardedCompressor(
+            'sharded', wdir=self.temp_dir, max_shard_members=2
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_rollover(self,):
+        for index in range(5):
+            self.compressor.write(f'member{index}.txt', f'content {index}')
+        shards = sorted(
+            name for name in os.listdir(self.temp_dir)
+            if name.startswith('sharded-')
+        )
+        self.assertEqual(
+            shards,
+            ['sharded-0001.zip', 'sharded-0002.zip', 'sharded-0003.zip']
+        )
+        self.assertEqual(self.compressor.read('member4.txt'), 'content 4')
+        self.assertEqual(
+            self.compressor.shard_map()['member2.txt'].name,
+            'sharded-0002.zip'
+        )
+        self.assertEqual(len(self.compressor.namelist()), 5)
+
+    def test_mutations_stay_in_shard(self,):
+        for index in range(4):
+            self.compressor.write(f'member{index}.txt', f'content {index}')
+        first_shard = self.compressor.shards[0].file_path
+        mtime = first_shard.stat().st_mtime_ns
+        self.compressor.append('member3.txt', ' appended')
+        self.compressor.remove('member2.txt')
+        self.assertEqual(first_shard.stat().st_mtime_ns, mtime)
+        self.assertEqual(
+            self.compressor.read('member3.txt'), 'content 3 appended'
+        )
+        self.assertNotIn('member2.txt', self.compressor.namelist())
+
+    def test_archives_handler(self,):
+        self.compressor.write('member.txt', 'content')
+        archives = Archives(
+            extension='zip',
+            archive_handler=ShardedCompressor,
+            handler_options={'max_shard_members': 2}
+        )
+        archive = archives.load('sharded', wdir=self.temp_dir)
+        self.assertEqual(archive.read('member.txt'), 'content')
+        self.assertEqual(archives.find('member.txt'), ['sharded'])
+        with self.assertRaises(FileNotFoundError):
+            archives.load('missing', wdir=self.temp_dir)
+
+
 class TestArchives(unittest.TestCase):
 
     def setUp(self):
@@ -380,6 +1079,20 @@ class TestArchives(unittest.TestCase):
 
         self.assertIsInstance(archive, Compressor)
 
+    def test_pooled_archive_keeps_handle(self,):
+        name = 'test_archive'
+        bounded = Archives(
+            extension=self.ext, archive_handler=Compressor, max_open=2
+        )
+        for archives in (self.archives, bounded):
+            archives.new(name, wdir=self.temp_dir)
+            archive = archives[name]
+            archive.write('test.txt', 'Hello, World!')
+            self.assertEqual(archive.read('test.txt'), 'Hello, World!')
+        # Only bounded pools keep handles open
+        self.assertIsNone(self.archives[name]._reader)
+        self.assertIsNotNone(bounded[name]._reader)
+
     def test_new_archive_existing_file(self,):
         name = 'test_archive'
         
@@ -416,5 +1129,454 @@ class TestArchives(unittest.TestCase):
         self.archives.close_all()
         self.assertEqual(0, len(self.archives))
 
+    def test_lazy_load(self,):
+        name = 'test_archive'
+        self.archives.new(name, wdir=self.temp_dir)
+        self.archives[name].write('member.txt', 'Lazy content')
+
+        archives = Archives(extension=self.ext, archive_handler=Compressor)
+        with patch.object(Compressor, '__init__') as mock_init:
+            archive = archives.load(name, wdir=self.temp_dir)
+            mock_init.assert_not_called()
+        self.assertFalse(archive._is_open)
+        self.assertIn(name, archives)
+
+        self.assertEqual(archive.read('member.txt'), 'Lazy content')
+        self.assertTrue(archive._is_open)
+        self.assertIsInstance(archive, Compressor)
+
+    def test_pool_evicts_least_recently_used(self,):
+        archives = Archives(
+            extension=self.ext, archive_handler=Compressor, max_open=2
+        )
+        names = ('a1', 'a2', 'a3')
+        for name in names:
+            archives.new(name, wdir=self.temp_dir)
+            archives[name].write('member.txt', name)
+
+        self.assertFalse(archives['a1']._is_open)
+        self.assertTrue(archives['a3']._is_open)
+        self.assertEqual(archives['a1'].read('member.txt'), 'a1')
+        self.assertFalse(archives['a2']._is_open)
+
+        stats = archives.pool_stats()
+        self.assertEqual(stats['open'], 2)
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(stats['reopens'], 1)
+
+    def test_map(self,):
+        names = ('a1', 'a2', 'a3')
+        for name in names:
+            self.archives.new(name, wdir=self.temp_dir)
+        results = self.archives.map(
+            lambda archive: archive.write('member.txt', archive.filename),
+            workers=3
+        )
+        self.assertEqual(results, [None, None, None])
+        contents = self.archives.map(
+            lambda archive: archive.read('member.txt'), names=names[::-1]
+        )
+        self.assertEqual(
+            contents, [f'{name}.{self.ext}' for name in names[::-1]]
+        )
+
+    def test_find_members(self,):
+        for name in ('a1', 'a2'):
+            self.archives.new(name, wdir=self.temp_dir)
+        self.archives['a1'].write('shared.txt', 'a1')
+        self.archives['a2'].write('shared.txt', 'a2')
+        self.archives['a2'].write('report_2023.csv', '')
+        self.archives['a2'].write('report_2024.csv', '')
+
+        loaded = Archives(extension=self.ext, archive_handler=Compressor)
+        for name in ('a1', 'a2'):
+            loaded.load(name, wdir=self.temp_dir)
+        self.assertEqual(loaded.find('shared.txt'), ['a1', 'a2'])
+        # Indexing opens nothing in the pool
+        self.assertEqual(loaded.pool_stats()['open'], 0)
+        self.assertFalse(loaded['a1']._is_open)
+        self.assertEqual(loaded.find('missing.txt'), [])
+        self.assertEqual(
+            list(loaded.find_prefix('report_')),
+            ['report_2023.csv', 'report_2024.csv']
+        )
+        self.assertEqual(
+            loaded.find_glob('report_*4.csv'), {'report_2024.csv': ['a2']}
+        )
+
+        loaded['a1'].write('new.txt', 'new')
+        loaded['a2'].remove('shared.txt')
+        self.assertEqual(loaded.find('new.txt'), ['a1'])
+        self.assertEqual(loaded.find('shared.txt'), ['a1'])
+        loaded.close('a1')
+        self.assertEqual(loaded.find('new.txt'), [])
+
+    def test_pool_memory_limit(self,):
+        archives = Archives(
+            extension=self.ext, archive_handler=Compressor, max_memory=1
+        )
+        for name in ('a1', 'a2'):
+            archives.new(name, wdir=self.temp_dir)
+            archives[name].write('member.txt', name)
+        self.assertEqual(archives.pool_stats()['open'], 1)
+        self.assertEqual(archives['a1'].read('member.txt'), 'a1')
+
+    def test_stats(self,):
+        archives = Archives(
+            extension=self.ext, archive_handler=Compressor, max_open=1
+        )
+        for name in ('a1', 'a2'):
+            archives.new(name, wdir=self.temp_dir)
+            archives[name].write('member.txt', name)
+        archives['a1'].read('member.txt')
+        stats = archives.stats(per_archive=True)
+        self.assertEqual(stats['operations']['write']['count'], 2)
+        self.assertEqual(
+            stats['archives']['a1']['operations']['read']['count'], 1
+        )
+        self.assertEqual(stats['pool']['evictions'], 2)
+
+class TestRWLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = RWLock()
+
+    def test_concurrent_readers(self,):
+        inside = threading.Barrier(2, timeout=5)
+
+        def reader():
+            with self.lock.read_lock():
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(inside.broken)
+
+    def test_writer_excludes_readers(self,):
+        acquired = threading.Event()
+
+        def reader():
+            with self.lock.read_lock():
+                acquired.set()
+
+        with self.lock.write_lock():
+            thread = threading.Thread(target=reader)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join()
+        self.assertTrue(acquired.is_set())
+
+    def test_reentrant(self,):
+        with self.lock.write_lock():
+            with self.lock.write_lock():
+                with self.lock.read_lock():
+                    pass
+        with self.lock.read_lock():
+            with self.lock.read_lock():
+                with self.assertRaises(RuntimeError):
+                    self.lock.acquire_write()
+
+
+class TestFileLock(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / 'locked.txt'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_exclusive_lock_times_out(self,):
+        with FileLock(self.path):
+            blocked = FileLock(self.path, shared=True, timeout=0.05)
+            with self.assertRaises(LockTimeout):
+                blocked.acquire()
+
+    def test_shared_locks_coexist(self,):
+        self.path.write_text('data', encoding='utf-8')
+        with FileLock(self.path, shared=True):
+            with FileLock(self.path, shared=True, timeout=0.05):
+                pass
+
+    def test_locking_with_fanout(self,):
+        manager = FilesManager(
+            Path(self.temp_dir) / 'fan', fanout=2, locking=True,
+            lock_timeout=1
+        )
+        manager.write('a.txt', 'x')
+        self.assertEqual(manager.read('a.txt'), 'x')
+        target = FilesManager(
+            Path(self.temp_dir) / 'other', fanout=2, locking=True,
+            lock_timeout=1
+        )
+        manager.copy('a.txt', 'b.txt', target=target)
+        self.assertEqual(target.read('b.txt'), 'x')
+
+    def test_locking_requires_fcntl(self,):
+        with patch('centopy.locks.fcntl', None):
+            with self.assertRaises(RuntimeError):
+                FilesManager(self.temp_dir, locking=True)
+            with self.assertRaises(RuntimeError):
+                FileLock(self.path)
+
+    def test_locking_managers(self,):
+        manager = FilesManager(self.temp_dir, locking=True, lock_timeout=1)
+        manager.write('locked.txt', 'Locked content')
+        self.assertEqual(manager.read('locked.txt'), 'Locked content')
+        self.assertEqual(manager.lock_stats.acquired, 2)
+
+        compressor = Compressor(
+            'locked', wdir=self.temp_dir, locking=True, lock_timeout=1
+        )
+        compressor.write('member.txt', 'First\n')
+        compressor.append('member.txt', 'Second\n')
+        self.assertEqual(compressor.read('member.txt'), 'First\nSecond\n')
+        compressor.lock_timeout = 0.05
+        with FileLock(compressor.file_path):
+            with self.assertRaises(LockTimeout):
+                compressor.remove('member.txt')
+        self.assertEqual(compressor.lock_stats.timeouts, 1)
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.events = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_global_hook(self,):
+        manager = FilesManager(self.temp_dir)
+        with tracing.hooked(self.events.append):
+            manager.write('test.txt', 'Test content')
+            manager.read('test.txt')
+        manager.read('test.txt')
+        self.assertEqual(
+            [(event.phase, event.operation) for event in self.events],
+            [('start', 'write'), ('end', 'write'),
+             ('start', 'read'), ('end', 'read')]
+        )
+        end = self.events[-1]
+        self.assertEqual(end.target, 'test.txt')
+        self.assertEqual(end.nbytes, 12)
+        self.assertGreaterEqual(end.duration, 0)
+        self.assertIs(end.source, manager)
+
+    def test_instance_hook_sees_rewrite_steps(self,):
+        compressor = Compressor('traced', wdir=self.temp_dir)
+        other = Compressor('other', wdir=self.temp_dir)
+        compressor.write('keep.txt', 'Keep me')
+        compressor.write('test.txt', 'Hello')
+        with tracing.hooked(self.events.append, compressor):
+            compressor.append('test.txt', ', World!')
+            other.write('test.txt', 'Not traced')
+        operations = [
+            (event.operation, event.target)
+            for event in self.events if event.phase == 'end'
+        ]
+        self.assertEqual(
+            operations,
+            [('rewrite.copy', 'keep.txt'),
+             ('rewrite.add', 'test.txt'),
+             ('rewrite', None)]
+        )
+        self.assertEqual(
+            self.events[-1].nbytes, compressor.path().stat().st_size
+        )
+        self.assertEqual(compressor.hooks, [])
+
+    def test_failing_hook_is_ignored(self,):
+        def hook(event):
+            raise RuntimeError('Broken hook')
+        manager = FilesManager(self.temp_dir, hooks=[hook])
+        with self.assertLogs('standard', level='ERROR'):
+            manager.write('test.txt', 'Test content')
+        self.assertEqual(manager.read('test.txt'), 'Test content')
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = Files(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_batch(self,):
+        manifest = [
+            '{"op": "write", "file": "a.txt", "contents": "Hello", "id": 1}',
+            '',
+            '{"op": "append", "file": "a.txt", "contents": "!"}',
+            '{"op": "read", "file": "a.txt"}',
+            '{"op": "archive", "archive": "arc", "files": ["a.txt"]}',
+            'not json',
+            '{"op": "move", "file": "a.txt"}',
+        ]
+        results = list(self.files.batch(manifest))
+        self.assertEqual([result['line'] for result in results],
+                         [1, 3, 4, 5, 6, 7])
+        self.assertEqual(results[0]['id'], 1)
+        self.assertEqual(results[2]['result'], 'Hello!')
+        self.assertEqual(self.files.archive('arc').read('a.txt'), 'Hello!')
+        self.assertEqual(
+            [result['ok'] for result in results],
+            [True, True, True, True, False, False]
+        )
+
+    def test_parallel_batch(self,):
+        manifest = [
+            {'op': 'write', 'file': f'{index}.txt', 'contents': str(index)}
+            for index in range(20)
+        ] + [{'op': 'read', 'file': '19.txt'}]
+        results = list(self.files.batch(manifest[:-1], jobs=4))
+        self.assertTrue(all(result['ok'] for result in results))
+        self.assertEqual(
+            list(self.files.batch(manifest[-1:]))[0]['result'], '19'
+        )
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = Server(self.temp_dir, workers=4)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = Client(self.server.socket_path, timeout=10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_files(self,):
+        self.assertEqual(self.client.ping(), 'pong')
+        self.client.files.write('a.txt', 'Hello')
+        self.assertEqual(self.client.files.read('a.txt'), 'Hello')
+        self.client.files.writeb('b.bin', b'\x00\x01')
+        self.assertEqual(self.client.files.readb('b.bin'), b'\x00\x01')
+        with self.assertRaises(RemoteError) as context:
+            self.client.files.rename('a.txt', 'c.txt')
+        self.assertEqual(context.exception.type, 'ValueError')
+
+    def test_multiplexing(self,):
+        futures = [
+            self.client.submit('files', 'write', f'{index}.txt', str(index))
+            for index in range(20)
+        ]
+        for future in futures:
+            future.result(10)
+        futures = [
+            self.client.submit('files', 'read', f'{index}.txt')
+            for index in range(20)
+        ]
+        self.assertEqual([future.result(10) for future in futures],
+                         [str(index) for index in range(20)])
+
+    def test_archive(self,):
+        archive = self.client.archive('arc')
+        archive.write('a.txt', 'Hello')
+        self.assertEqual(archive.read('a.txt'), 'Hello')
+        self.assertEqual(self.client.archives.find('a.txt'), ['arc'])
+        with self.assertRaises(RemoteError) as context:
+            self.client.archive('missing').read('a.txt')
+        self.assertEqual(context.exception.type, 'FileNotFoundError')
+
+    def test_single_daemon(self,):
+        with self.assertRaises(RuntimeError):
+            Server(self.temp_dir)
+
+
+class TestImport(unittest.TestCase):
+
+    def test_import_is_lazy(self,):
+        code = (
+            "import sys, centopy; "
+            "print(sorted(name for name in ("
+            "'zipfile', 'tempfile', 'centopy.core', 'logging.config', "
+            "'importlib.metadata') if name in sys.modules)); "
+            "print(centopy.__version__, centopy.CONFIG_LOG['version'], "
+            "centopy.FilesManager.__name__)"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout.splitlines()
+        self.assertEqual(output[0], '[]')
+        self.assertEqual(output[1].split()[1:], ['1', 'FilesManager'])
+
+    def test_cli_import_is_lazy(self,):
+        code = (
+            "import sys, cli; "
+            "cli.cli(['--help'], standalone_mode=False); "
+            "print(sorted(name for name in ("
+            "'zipfile', 'tempfile', 'centopy.core') if name in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout.splitlines()
+        self.assertEqual(output[-1], '[]')
+
+    def test_compression_methods(self,):
+        from centopy.formats import COMPRESSION_METHODS
+        self.assertEqual(COMPRESSION_METHODS, {
+            'stored': zipfile.ZIP_STORED,
+            'deflated': zipfile.ZIP_DEFLATED,
+            'bzip2': zipfile.ZIP_BZIP2,
+            'lzma': zipfile.ZIP_LZMA,
+        })
+
+    def test_file_compressions_imported_on_use(self,):
+        code = (
+            "import sys, centopy.core; "
+            "print(sorted(name for name in ('gzip', 'mmap') "
+            "if name in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout.strip()
+        self.assertEqual(output, '[]')
+
+
+class TestBench(unittest.TestCase):
+
+    def test_run_and_compare(self,):
+        results = bench.run(
+            members=(3,), sizes=(64,), compressions=('deflated',), repeat=2
+        )
+        names = {result['name'] for result in results['results']}
+        self.assertIn('import.centopy', names)
+        self.assertIn('import.cli', names)
+        self.assertIn('files.list_files', names)
+        self.assertIn('archive.remove', names)
+        self.assertEqual(bench.compare(results, results), [])
+
+        baseline = {'results': []}
+        for result in results['results']:
+            faster = dict(result, latency=dict(result['latency']))
+            faster['latency']['p50'] /= 4
+            baseline['results'].append(faster)
+        regressions = bench.compare(
+            results, baseline, tolerances={'files.read': 10}
+        )
+        self.assertEqual(len(regressions), len(results['results']) - 1)
+
+
 if __name__ == "__main__":
     unittest.main()